@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+DataAnalyzer.analyze_flights benchmark
+Çok tarihli aramalardan gelen büyük sonuç kümelerinde analiz süresini ölçer.
+
+Kullanım / Usage:
+    python benchmarks/bench_data_analysis.py [--sizes 1000,5000,10000,20000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.data_analysis import DataAnalyzer
+from modules.flight_search import FlightSearchEngine
+from utils.flight_batch import FlightBatch
+
+
+def build_flights(count, seed=42):
+    """Çok tarihli sahte sonuç kümesi - Multi-date mock result set"""
+    random.seed(seed)
+    engine = FlightSearchEngine()
+    start = datetime(2030, 6, 1)
+    flights = []
+
+    for i in range(count):
+        airline = engine.search_engines[i % len(engine.search_engines)]
+        flight_date = start + timedelta(days=i % 30)
+        flights.append(engine._generate_mock_flight(airline, 'IST', 'ESB', flight_date, i))
+
+    return flights
+
+
+def time_analysis(flights, repeat):
+    timings = []
+    for _ in range(repeat):
+        analyzer = DataAnalyzer()
+        started = time.perf_counter()
+        analyzer.analyze_flights(flights)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def run(sizes, repeat):
+    print("=" * 60)
+    print("VERİ ANALİZİ BENCHMARK - analyze_flights")
+    print("=" * 60)
+    print(f"{'uçuş':>10} {'dict (ms)':>12} {'µs/uçuş':>10} {'batch (ms)':>12} {'µs/uçuş':>10}")
+
+    for size in sizes:
+        flights = build_flights(size)
+        dict_best = time_analysis(flights, repeat)
+        batch_best = time_analysis(FlightBatch.from_dicts(flights), repeat)
+        print(f"{size:>10} {dict_best * 1000:>12.1f} {dict_best / size * 1e6:>10.2f}"
+              f" {batch_best * 1000:>12.1f} {batch_best / size * 1e6:>10.2f}")
+
+    print("\nDoğrusal ölçeklenmede µs/uçuş değeri sabit kalmalıdır.")
+    print("With linear scaling µs/flight stays roughly constant.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,5000,10000,20000')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    run([int(s) for s in args.sizes.split(',')], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
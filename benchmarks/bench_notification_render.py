@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Bildirim şablonu render benchmark
+Fiyat düşüşü mesajlarının saniyede kaç tane oluşturulabildiğini ölçer.
+
+Kullanım / Usage:
+    python benchmarks/bench_notification_render.py [--messages 10000] [--flights N] [--repeat 3]
+
+--flights varsayılan olarak mesaj sayısıdır, yani her bağlam farklıdır; daha küçük
+bir değer render_many önbelleğinin isabet ettiği paylaşılan uçuşları ölçer.
+--flights defaults to the message count, so every context is distinct; a smaller
+value measures shared flights, where the render_many memo hits.
+"""
+
+import argparse
+import os
+import sys
+import time
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.notification_templates import PRICE_DROP, build_email_message, price_drop_context
+
+
+def build_drops(count, flights):
+    """Aynı uçuşları izleyen kullanıcılar - Users watching a shared set of flights"""
+    drops = []
+    for i in range(count):
+        flight = i % flights
+        flight_info = {
+            'origin': 'IST', 'destination': 'ESB', 'flight_number': f'TK{1000 + flight}',
+            'airline': 'Turkish Airlines', 'booking_url': f'https://example.com/book/TK{1000 + flight}'
+        }
+        drops.append((f'user{i}@example.com', flight_info, 900.0, 900.0 - 5 * flight - 50))
+    return drops
+
+
+def render_inline(flight_info, old_price, new_price):
+    """Şablon öncesi f-string gövdeleri - Pre-template f-string bodies"""
+    title = "Uçuş Fiyatında Düşüş!"
+    message = (
+        f"Takip ettiğiniz {flight_info['origin']}-{flight_info['destination']} "
+        f"seferinde fiyat düşüşü var!\n\n"
+        f"Uçuş: {flight_info['flight_number']}\n"
+        f"Havayolu: {flight_info['airline']}\n"
+        f"Eski Fiyat: {old_price:.2f} TL\n"
+        f"Yeni Fiyat: {new_price:.2f} TL\n"
+        f"İndirim: {old_price - new_price:.2f} TL ({((old_price - new_price) / old_price * 100):.1f}%)\n\n"
+        f"Hemen rezervasyon yapmak için: {flight_info.get('booking_url', 'N/A')}"
+    )
+    html_message = f"""
+        <html>
+        <body>
+            <h2 style="color: #28a745;">🎉 Uçuş Fiyatında Düşüş!</h2>
+            <p>Takip ettiğiniz <strong>{flight_info['origin']}-{flight_info['destination']}</strong> seferinde fiyat düşüşü var!</p>
+            
+            <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #28a745; margin: 15px 0;">
+                <p><strong>Uçuş:</strong> {flight_info['flight_number']}</p>
+                <p><strong>Havayolu:</strong> {flight_info['airline']}</p>
+                <p><strong>Eski Fiyat:</strong> <span style="text-decoration: line-through;">{old_price:.2f} TL</span></p>
+                <p><strong>Yeni Fiyat:</strong> <span style="color: #28a745; font-size: 1.2em;">{new_price:.2f} TL</span></p>
+                <p><strong>İndirim:</strong> {old_price - new_price:.2f} TL ({((old_price - new_price) / old_price * 100):.1f}%)</p>
+            </div>
+            
+            <p>
+                <a href="{flight_info.get('booking_url', '#')}" 
+                   style="background-color: #007bff; color: white; padding: 10px 20px; 
+                          text-decoration: none; border-radius: 5px; display: inline-block;">
+                    Hemen Rezervasyon Yap
+                </a>
+            </p>
+        </body>
+        </html>
+        """
+    return title, message, html_message
+
+
+def mime_inline(recipient, subject, message, html_message):
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = 'alerts@example.com'
+    msg['To'] = recipient
+    msg.attach(MIMEText(message, 'plain', 'utf-8'))
+    msg.attach(MIMEText(html_message, 'html', 'utf-8'))
+    return msg
+
+
+def inline_render_only(drops):
+    for _, flight_info, old_price, new_price in drops:
+        render_inline(flight_info, old_price, new_price)
+
+
+def inline_with_mime(drops):
+    for recipient, flight_info, old_price, new_price in drops:
+        mime_inline(recipient, *render_inline(flight_info, old_price, new_price))
+
+
+def template_render_only(drops):
+    PRICE_DROP.render_many(price_drop_context(f, o, n) for _, f, o, n in drops)
+
+
+def template_with_mime(drops):
+    rendered = PRICE_DROP.render_many(price_drop_context(f, o, n) for _, f, o, n in drops)
+    for (recipient, _, _, _), message in zip(drops, rendered):
+        build_email_message('alerts@example.com', recipient, *message)
+
+
+def best_rate(func, drops, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(drops)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(drops) / best
+
+
+def run(messages, flights, repeat):
+    flights = flights or messages
+    drops = build_drops(messages, flights)
+
+    print("=" * 60)
+    print("BİLDİRİM RENDER BENCHMARK - price drop")
+    print("=" * 60)
+    print(f"{messages} mesaj, {flights} farklı uçuş / {messages} messages, {flights} distinct flights\n")
+    print(f"{'yöntem / method':<32} {'mesaj/sn':>12} {'µs/mesaj':>10}")
+
+    for label, func in [
+        ('f-string', inline_render_only),
+        ('f-string + MIME', inline_with_mime),
+        ('template render_many', template_render_only),
+        ('template render_many + MIME', template_with_mime),
+    ]:
+        rate = best_rate(func, drops, repeat)
+        print(f"{label:<32} {rate:>12,.0f} {1e6 / rate:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=10000)
+    parser.add_argument('--flights', type=int, default=None,
+                        help='Distinct flights (default: one per message)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.messages, args.flights, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
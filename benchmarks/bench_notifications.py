@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Bildirim teslim hızı benchmark
+Yerel sahte SMTP sunucusuna karşı e-posta/SMS/push kanallarını eşzamanlı
+olarak çalıştırır; mesaj/sn, p50/p99 gecikme ve hata sayılarını raporlar.
+
+Kullanım / Usage:
+    python benchmarks/bench_notifications.py [--messages 2000] [--concurrency 1,4,16]
+        [--latency 0.005] [--failure-rate 0.01] [--mix email=0.6,sms=0.2,push=0.2] [--pool-size N] [--seed 42]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.notification_service import NotificationService
+from utils.local_smtp import LocalSMTPServer
+from utils.smtp_pool import get_smtp_pool
+
+
+def parse_mix(value):
+    """'email=0.6,sms=0.2' -> {'email': 0.6, 'sms': 0.2}"""
+    mix = {}
+    for part in value.split(','):
+        channel, weight = part.split('=')
+        mix[channel.strip()] = float(weight)
+    total = sum(mix.values())
+    return {channel: weight / total for channel, weight in mix.items()}
+
+
+def build_jobs(messages, mix, seed):
+    """Kanal karışımına göre iş listesi - Jobs spread by channel weight"""
+    jobs = []
+    for channel, weight in mix.items():
+        recipient = '+905550000000' if channel == 'sms' else 'user{}@example.com'
+        jobs.extend((channel, recipient.format(i)) for i in range(round(messages * weight)))
+    # Interleave channels like a real alert burst, in the same order on every run
+    random.Random(seed).shuffle(jobs)
+    return jobs
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_once(jobs, concurrency, latency, failure_rate, pool_size, seed):
+    with LocalSMTPServer(latency=latency, failure_rate=failure_rate, seed=seed) as server:
+        service = NotificationService()
+        service.email_config.update({
+            'smtp_server': server.host, 'smtp_port': server.port,
+            'email': 'alerts@example.com', 'password': 'bench', 'use_tls': False
+        })
+        pool = get_smtp_pool(server.host, server.port, 'alerts@example.com', 'bench',
+                             size=pool_size or concurrency, use_tls=False)
+
+        def send(job):
+            channel, recipient = job
+            started = time.perf_counter()
+            ok = service.send_notification(recipient, 'Fiyat düştü: IST-ESB 450 TL', channel, 'Fiyat Uyarısı')
+            return channel, ok, time.perf_counter() - started
+
+        # The mock SMS/push channels print every message; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(send, jobs))
+            elapsed = time.perf_counter() - started
+
+        stats = pool.get_stats()
+        pool.close()
+    return results, elapsed, stats
+
+
+def report(concurrency, results, elapsed, smtp_stats):
+    latencies = [latency for _, _, latency in results]
+    errors = sum(1 for _, ok, _ in results if not ok)
+    print(f"{concurrency:>6} {len(results) / elapsed:>10,.0f} {percentile(latencies, 0.5) * 1000:>9.2f}"
+          f" {percentile(latencies, 0.99) * 1000:>9.2f} {errors:>7} {smtp_stats['messages_per_connection']:>10.1f}")
+
+    for channel in sorted({channel for channel, _, _ in results}):
+        channel_latencies = [latency for c, _, latency in results if c == channel]
+        channel_errors = sum(1 for c, ok, _ in results if c == channel and not ok)
+        print(f"{'':>6} {channel:>10} {percentile(channel_latencies, 0.5) * 1000:>9.2f}"
+              f" {percentile(channel_latencies, 0.99) * 1000:>9.2f} {channel_errors:>7}"
+              f"   n={len(channel_latencies)} ort/avg={statistics.fmean(channel_latencies) * 1000:.2f}ms")
+
+
+def run(messages, concurrencies, latency, failure_rate, mix, pool_size, seed):
+    jobs = build_jobs(messages, mix, seed)
+
+    print("=" * 72)
+    print("BİLDİRİM TESLİM BENCHMARK - NotificationService")
+    print("=" * 72)
+    print(f"{len(jobs)} mesaj / messages, SMTP gecikme / latency {latency * 1000:.1f} ms,"
+          f" hata oranı / failure rate {failure_rate:.1%}, karışım / mix {mix}\n")
+    print(f"{'eşz.':>6} {'mesaj/sn':>10} {'p50 ms':>9} {'p99 ms':>9} {'hata':>7} {'msg/bağl.':>10}")
+
+    for concurrency in concurrencies:
+        results, elapsed, smtp_stats = run_once(jobs, concurrency, latency, failure_rate, pool_size, seed)
+        report(concurrency, results, elapsed, smtp_stats)
+
+    print("\nmsg/bağl. = SMTP bağlantısı başına e-posta / emails per SMTP connection")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--concurrency', default='1,4,16')
+    parser.add_argument('--latency', type=float, default=0.005, help='SMTP DATA latency in seconds')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of emails answered with 451')
+    parser.add_argument('--mix', default='email=0.6,sms=0.2,push=0.2')
+    parser.add_argument('--pool-size', type=int, default=None, help='SMTP connections (default: concurrency)')
+    parser.add_argument('--seed', type=int, default=42, help='Seed for the job order and the SMTP failures')
+    args = parser.parse_args()
+
+    run(args.messages, [int(c) for c in args.concurrency.split(',')], args.latency, args.failure_rate,
+        parse_mix(args.mix), args.pool_size, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Şifre doğrulama benchmark
+Giriş fırtınasını taklit eder: istek iş parçacıkları aynı anda şifre doğrular;
+satır içi, iş parçacığı ve süreç havuzlarıyla giriş/sn, çekirdek başına giriş/sn
+ve bu sırada yorumlayıcıda kalan hesaplama payını raporlar.
+
+Kullanım / Usage:
+    python benchmarks/bench_password_hashing.py [--logins 64] [--concurrency 16]
+        [--method scrypt:32768:8:1] [--executors inline,thread,process] [--workers N]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.passwords import PasswordHasher
+
+
+def probe(stop, counter):
+    """Saf Python iş - Pure Python work standing in for other requests"""
+    while not stop.is_set():
+        sum(range(1000))
+        counter[0] += 1
+
+
+def probe_rate(seconds=0.5):
+    stop, counter = threading.Event(), [0]
+    thread = threading.Thread(target=probe, args=(stop, counter))
+    thread.start()
+    time.sleep(seconds)
+    stop.set()
+    thread.join()
+    return counter[0] / seconds
+
+
+def run_once(hasher, stored_hash, logins, concurrency):
+    stop, counter = threading.Event(), [0]
+    prober = threading.Thread(target=probe, args=(stop, counter))
+
+    # Warm the pool so worker start-up is not measured
+    hasher.verify(stored_hash, 'Sifre123!')
+
+    started = time.perf_counter()
+    prober.start()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda _: hasher.verify(stored_hash, 'Sifre123!'), range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    prober.join()
+
+    assert all(results), "doğrulama başarısız / verification failed"
+    return logins / elapsed, counter[0] / elapsed
+
+
+def run(logins, concurrency, method, executors, workers):
+    cores = os.cpu_count() or 1
+    workers = workers or cores
+    stored_hash = PasswordHasher(method=method, executor='inline').hash('Sifre123!')
+    idle_probe = probe_rate()
+
+    print("=" * 72)
+    print("ŞİFRE DOĞRULAMA BENCHMARK - PasswordHasher")
+    print("=" * 72)
+    print(f"Yöntem / method: {method}, {logins} giriş / logins, {concurrency} istek iş parçacığı / request threads,"
+          f" {workers} işçi / workers, {cores} çekirdek / cores\n")
+    print(f"{'havuz':>8} {'giriş/sn':>10} {'giriş/sn/çekirdek':>18} {'diğer iş payı':>15}")
+
+    for executor in executors:
+        hasher = PasswordHasher(method=method, workers=workers, executor=executor)
+        rate, probe_during = run_once(hasher, stored_hash, logins, concurrency)
+        hasher.close()
+        # Share of the idle interpreter throughput left to other requests while logins run
+        print(f"{executor:>8} {rate:>10.1f} {rate / min(workers, cores):>18.1f} {probe_during / idle_probe:>14.0%}")
+
+    print("\ndiğer iş payı = giriş fırtınası sırasında saf Python işin boşta hızına oranı"
+          " / pure Python throughput during the storm relative to idle")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=64)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--method', default=os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1'))
+    parser.add_argument('--executors', default='inline,thread,process')
+    parser.add_argument('--workers', type=int, default=None, help='Pool size (default: CPU count)')
+    args = parser.parse_args()
+
+    run(args.logins, args.concurrency, args.method, args.executors.split(','), args.workers)
+
+
+if __name__ == "__main__":
+    main()
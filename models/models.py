@@ -5,10 +5,14 @@ All models follow MYK Level 5 standards for data modeling.
 
 from app import db, login_manager
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import case, delete, func, insert, inspect, update
+from sqlalchemy.exc import IntegrityError, OperationalError
 from datetime import datetime
+import logging
 import uuid
 
+from utils.passwords import password_hasher
+
 
 class User(UserMixin, db.Model):
     """User model for authentication and user management."""
@@ -27,14 +31,23 @@ class User(UserMixin, db.Model):
     # Relationships
     flight_searches = db.relationship('FlightSearch', backref='user', lazy=True, cascade='all, delete-orphan')
     notifications = db.relationship('Notification', backref='user', lazy=True, cascade='all, delete-orphan')
+    notification_counter = db.relationship('NotificationCounter', uselist=False, lazy=True,
+                                           cascade='all, delete-orphan')
     
     def set_password(self, password):
         """Set password hash."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        """Check password against hash."""
-        return check_password_hash(self.password_hash, password)
+        """Check password against hash.
+        
+        A hash made with an older work factor is replaced on success; the
+        caller's next commit stores it.
+        """
+        valid, new_hash = password_hasher.verify_and_update(self.password_hash, password)
+        if new_hash:
+            self.password_hash = new_hash
+        return valid
     
     def get_full_name(self):
         """Get user's full name."""
@@ -48,6 +61,12 @@ class FlightSearch(db.Model):
     """Model for storing user flight search criteria."""
     
     __tablename__ = 'flight_searches'
+    __table_args__ = (
+        # Dashboard and my_searches: a user's (active) searches, newest first
+        db.Index('ix_flight_searches_user_active_created', 'user_id', 'is_active', 'created_at'),
+        # Keyset pages of all of a user's searches
+        db.Index('ix_flight_searches_user_created_id', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
@@ -62,6 +81,22 @@ class FlightSearch(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    def to_dict(self):
+        """Serialize the search for JSON responses."""
+        return {
+            'id': self.id,
+            'origin': self.origin,
+            'destination': self.destination,
+            'departure_date': self.departure_date.isoformat(),
+            'return_date': self.return_date.isoformat() if self.return_date else None,
+            'passenger_count': self.passenger_count,
+            'max_price': self.max_price,
+            'airline_preference': self.airline_preference,
+            'notification_enabled': self.notification_enabled,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat()
+        }
+    
     def __repr__(self):
         return f'<FlightSearch {self.origin}-{self.destination} on {self.departure_date}>'
 
@@ -70,6 +105,11 @@ class Flight(db.Model):
     """Model for storing flight information."""
     
     __tablename__ = 'flights'
+    __table_args__ = (
+        db.Index('ix_flights_route_departure', 'origin', 'destination', 'departure_time'),
+        # Upsert key of the fetched flight inventory
+        db.Index('uq_flights_number_departure', 'flight_number', 'departure_time', unique=True),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     flight_number = db.Column(db.String(20), nullable=False)
@@ -92,6 +132,27 @@ class Flight(db.Model):
         """Check if flight is still available."""
         return self.departure_time > datetime.utcnow()
     
+    @classmethod
+    def remove_duplicates(cls):
+        """Keep only the latest row per (flight_number, departure_time) and commit.
+        
+        Databases from before the inventory upsert may hold the same flight
+        several times, which blocks its unique index. Returns the number of
+        rows deleted.
+        """
+        groups = db.session.query(cls.flight_number, cls.departure_time).group_by(
+            cls.flight_number, cls.departure_time).having(func.count() > 1).all()
+        stale_ids = []
+        for flight_number, departure_time in groups:
+            ids = [flight_id for flight_id, in db.session.query(cls.id).filter_by(
+                flight_number=flight_number, departure_time=departure_time
+            ).order_by(cls.last_updated.desc(), cls.id.desc())]
+            stale_ids.extend(ids[1:])
+        for start in range(0, len(stale_ids), 500):
+            db.session.execute(delete(cls).where(cls.id.in_(stale_ids[start:start + 500])))
+        db.session.commit()
+        return len(stale_ids)
+    
     def __repr__(self):
         return f'<Flight {self.flight_number} {self.origin}-{self.destination}>'
 
@@ -100,6 +161,12 @@ class Notification(db.Model):
     """Model for user notifications."""
     
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # Unread list on the dashboard and the per-user notification list
+        db.Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),
+        # Keyset pages of all of a user's notifications
+        db.Index('ix_notifications_user_created_id', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
@@ -111,8 +178,230 @@ class Notification(db.Model):
     
     def mark_as_read(self):
         """Mark notification as read."""
-        self.is_read = True
+        if not self.is_read:
+            self.is_read = True
+            NotificationCounter.adjust(self.user_id, -1)
         db.session.commit()
+        
+        from utils.unread_counter import unread_counter
+        unread_counter.invalidate(self.user_id)
+    
+    def to_dict(self):
+        """Serialize the notification for JSON responses."""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'message': self.message,
+            'type': self.type,
+            'is_read': self.is_read,
+            'created_at': self.created_at.isoformat()
+        }
+    
+    def __repr__(self):
+        return f'<Notification {self.title}>'
+
+
+class NotificationCounter(db.Model):
+    """Materialized unread notification count per user."""
+    
+    __tablename__ = 'notification_counters'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    unread = db.Column(db.Integer, nullable=False, default=0)
+    
+    @classmethod
+    def adjust(cls, user_id, delta):
+        """Add delta to a user's unread count in the current transaction (never below 0)."""
+        if delta >= 0:
+            value = cls.unread + delta
+        else:
+            value = case((cls.unread > -delta, cls.unread + delta), else_=0)
+        updated = db.session.execute(
+            update(cls).where(cls.user_id == user_id).values(unread=value)
+        ).rowcount
+        if not updated:
+            # First change for this user: seed from the table, which already holds this change
+            db.session.flush()
+            db.session.add(cls(user_id=user_id, unread=Notification.query.filter_by(
+                user_id=user_id, is_read=False).count()))
+    
+    @classmethod
+    def reset(cls, user_id, value=0):
+        """Set a user's unread count in the current transaction."""
+        updated = db.session.execute(
+            update(cls).where(cls.user_id == user_id).values(unread=value)
+        ).rowcount
+        if not updated:
+            db.session.add(cls(user_id=user_id, unread=value))
+    
+    def __repr__(self):
+        return f'<NotificationCounter {self.user_id} {self.unread}>'
+
+
+class WatchChange(db.Model):
+    """A saved search whose price watch changed, for processes holding a watch index."""
+    
+    __tablename__ = 'price_watch_changes'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # No foreign key: deleted searches are logged too
+    search_id = db.Column(db.String(36), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    @classmethod
+    def record(cls, search_ids):
+        """Log changed searches in the current transaction."""
+        rows = [{'search_id': search_id, 'created_at': datetime.utcnow()} for search_id in search_ids]
+        if rows:
+            db.session.execute(insert(cls), rows)
+    
+    @classmethod
+    def latest(cls):
+        """Id of the newest committed change; 0 if there is none."""
+        return db.session.query(func.max(cls.id)).scalar() or 0
+    
+    def __repr__(self):
+        return f'<WatchChange {self.id} {self.search_id}>'
+
+
+class PriceObservation(db.Model):
+    """Model for a single observed flight price (time series)."""
+    
+    __tablename__ = 'price_observations'
+    __table_args__ = (
+        db.Index('ix_price_observations_route_date_observed',
+                 'origin', 'destination', 'departure_date', 'observed_at'),
+    )
+    
+    # Append-only and high volume, so an integer key keeps rows and the index small
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    origin = db.Column(db.String(10), nullable=False)
+    destination = db.Column(db.String(10), nullable=False)
+    departure_date = db.Column(db.Date, nullable=False)
+    observed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    price = db.Column(db.Float, nullable=False)
+    currency = db.Column(db.String(3), default='TRY')
+    airline = db.Column(db.String(100), nullable=True)
+    flight_number = db.Column(db.String(20), nullable=True)
+    
+    def __repr__(self):
+        return f'<PriceObservation {self.origin}-{self.destination} {self.departure_date} {self.price}>'
+
+
+class PriceRollup(db.Model):
+    """Hourly price rollup per route and departure date."""
+    
+    __tablename__ = 'price_rollups_hourly'
+    __table_args__ = (
+        db.UniqueConstraint('origin', 'destination', 'departure_date', 'bucket_start',
+                            name='uq_price_rollups_route_date_bucket'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    origin = db.Column(db.String(10), nullable=False)
+    destination = db.Column(db.String(10), nullable=False)
+    departure_date = db.Column(db.Date, nullable=False)
+    bucket_start = db.Column(db.DateTime, nullable=False)  # Start of the hour
+    min_price = db.Column(db.Float, nullable=False)
+    max_price = db.Column(db.Float, nullable=False)
+    price_sum = db.Column(db.Float, nullable=False, default=0)
+    sample_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    @property
+    def avg_price(self):
+        """Average observed price in the bucket."""
+        return self.price_sum / self.sample_count if self.sample_count else None
     
     def __repr__(self):
-        return f'<Notification {self.title}>'
\ No newline at end of file
+        return f'<PriceRollup {self.origin}-{self.destination} {self.departure_date} {self.bucket_start}>'
+
+
+class OutboxMessage(db.Model):
+    """Outgoing notification waiting to be delivered by the outbox workers."""
+    
+    __tablename__ = 'notification_outbox'
+    __table_args__ = (
+        db.Index('ix_notification_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    channel = db.Column(db.String(20), nullable=False, default='email')
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(200), nullable=True)
+    body = db.Column(db.Text, nullable=False)
+    html_body = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sending, sent, dead
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Earliest retry time; while sending it is the lease expiry of the claiming worker
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<OutboxMessage {self.id} {self.channel} {self.status}>'
+
+
+class DigestItem(db.Model):
+    """Notification item buffered for a user's next digest."""
+
+    __tablename__ = 'notification_digest_items'
+    __table_args__ = (
+        db.Index('ix_notification_digest_items_deliver_user', 'deliver_after', 'user_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    # When the user's digest window closes; shared by all of the user's buffered items
+    deliver_after = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<DigestItem {self.id} {self.user_id}>'
+
+
+logger = logging.getLogger(__name__)
+
+# Unique indexes whose existing duplicate rows can be removed before creating them
+UNIQUE_INDEX_MIGRATIONS = {
+    'uq_flights_number_departure': lambda: Flight.remove_duplicates(),
+}
+
+
+def ensure_indexes():
+    """Create indexes declared on the models that an existing database is missing.
+    
+    ``db.create_all`` only creates missing tables, so indexes added to a table
+    that already exists would never reach older databases. Several workers
+    may start at once, so an index another one created in the meantime is
+    skipped rather than failing startup. Duplicate rows are removed before a
+    unique index with a known migration is created; any other unique index
+    that existing rows violate is skipped and logged.
+    """
+    inspector = inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            if index.name in UNIQUE_INDEX_MIGRATIONS:
+                removed = UNIQUE_INDEX_MIGRATIONS[index.name]()
+                if removed:
+                    logger.warning(f"Removed {removed} duplicate rows from {table.name} "
+                                   f"before creating {index.name}")
+            try:
+                index.create(db.engine, checkfirst=True)
+            except IntegrityError:
+                columns = ', '.join(column.name for column in index.columns)
+                logger.error(f"Could not create unique index {index.name}: {table.name} has duplicate "
+                             f"({columns}) rows. Remove the duplicates and restart to add it.")
+                continue
+            except OperationalError:
+                # Lost the race between the existence check and CREATE INDEX
+                if index.name not in {i['name'] for i in inspect(db.engine).get_indexes(table.name)}:
+                    raise
+                continue
+            created.append(index.name)
+    return created
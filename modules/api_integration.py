@@ -3,10 +3,14 @@ API Integration Module
 API entegrasyonu modülü
 """
 
-import requests
 import json
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
 import os
+import threading
+import time
+
+from utils.http_pool import get_session, http_pool
 
 class APIManager:
     """API yönetimi sınıfı - API management class"""
@@ -24,8 +28,21 @@ class APIManager:
             'thy': 'https://api.turkishairlines.com/v1',
             'pegasus': 'https://api.flypgs.com/v1'
         }
+        # Sağlayıcı başına süre bütçesi (saniye) - Per-provider time budget (seconds)
+        self.provider_timeouts = {
+            'amadeus': float(os.getenv('AMADEUS_TIMEOUT', '8')),
+            'skyscanner': float(os.getenv('SKYSCANNER_TIMEOUT', '8')),
+            'thy': float(os.getenv('THY_TIMEOUT', '8')),
+            'pegasus': float(os.getenv('PEGASUS_TIMEOUT', '8'))
+        }
+        # Toplu aramanın genel süre sınırı - Overall deadline for aggregated search
+        self.search_deadline = float(os.getenv('API_SEARCH_DEADLINE', '10'))
+        # Sağlayıcı başına işçi sayısı - Worker threads per provider
+        self.provider_workers = int(os.getenv('API_PROVIDER_WORKERS', '8'))
+        self._executors = {}
+        self._executor_lock = threading.Lock()
         
-    def search_amadeus_flights(self, origin, destination, departure_date):
+    def search_amadeus_flights(self, origin, destination, departure_date, budget=None):
         """Amadeus API ile uçuş ara - Search flights with Amadeus API"""
         if not self.api_keys['amadeus']:
             return self._mock_api_response('amadeus')
@@ -45,7 +62,7 @@ class APIManager:
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response = get_session(url).get(url, headers=headers, params=params, timeout=self._attempt_timeout('amadeus', budget))
             if response.status_code == 200:
                 return self._parse_amadeus_response(response.json())
             else:
@@ -55,7 +72,7 @@ class APIManager:
             print(f"Amadeus API connection error: {e}")
             return self._mock_api_response('amadeus')
     
-    def search_skyscanner_flights(self, origin, destination, departure_date):
+    def search_skyscanner_flights(self, origin, destination, departure_date, budget=None):
         """Skyscanner API ile uçuş ara - Search flights with Skyscanner API"""
         if not self.api_keys['skyscanner']:
             return self._mock_api_response('skyscanner')
@@ -67,7 +84,7 @@ class APIManager:
         }
         
         try:
-            response = requests.get(url, headers=headers, timeout=30)
+            response = get_session(url).get(url, headers=headers, timeout=self._attempt_timeout('skyscanner', budget))
             if response.status_code == 200:
                 return self._parse_skyscanner_response(response.json())
             else:
@@ -77,7 +94,7 @@ class APIManager:
             print(f"Skyscanner API connection error: {e}")
             return self._mock_api_response('skyscanner')
     
-    def search_thy_flights(self, origin, destination, departure_date):
+    def search_thy_flights(self, origin, destination, departure_date, budget=None):
         """THY API ile uçuş ara - Search flights with Turkish Airlines API"""
         if not self.api_keys['thy']:
             return self._mock_api_response('thy')
@@ -98,7 +115,7 @@ class APIManager:
         }
         
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = get_session(url).post(url, headers=headers, json=data, timeout=self._attempt_timeout('thy', budget))
             if response.status_code == 200:
                 return self._parse_thy_response(response.json())
             else:
@@ -108,7 +125,7 @@ class APIManager:
             print(f"THY API connection error: {e}")
             return self._mock_api_response('thy')
     
-    def search_pegasus_flights(self, origin, destination, departure_date):
+    def search_pegasus_flights(self, origin, destination, departure_date, budget=None):
         """Pegasus API ile uçuş ara - Search flights with Pegasus API"""
         if not self.api_keys['pegasus']:
             return self._mock_api_response('pegasus')
@@ -127,7 +144,7 @@ class APIManager:
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response = get_session(url).get(url, headers=headers, params=params, timeout=self._attempt_timeout('pegasus', budget))
             if response.status_code == 200:
                 return self._parse_pegasus_response(response.json())
             else:
@@ -137,6 +154,106 @@ class APIManager:
             print(f"Pegasus API connection error: {e}")
             return self._mock_api_response('pegasus')
     
+    def search_all(self, origin, destination, departure_date, deadline=None):
+        """Tüm sağlayıcılarda eşzamanlı ara - Search all providers concurrently
+        
+        Her sağlayıcı kendi süre bütçesi ve genel süre sınırı içinde
+        tamamlanmalıdır; zamanında biten sonuçlar döndürülür.
+        Each provider must finish within its own budget and the overall
+        deadline; whatever finished in time is returned together with a
+        per-provider status map.
+        """
+        providers = {
+            'amadeus': self.search_amadeus_flights,
+            'skyscanner': self.search_skyscanner_flights,
+            'thy': self.search_thy_flights,
+            'pegasus': self.search_pegasus_flights
+        }
+        deadline = self.search_deadline if deadline is None else deadline
+        
+        started = time.monotonic()
+        budgets = {name: min(self.provider_timeouts.get(name, deadline), deadline) for name in providers}
+        futures = {
+            name: self._get_executor(name).submit(search, origin, destination, departure_date, budgets[name])
+            for name, search in providers.items()
+        }
+        
+        flights = []
+        status = {}
+        # Her sağlayıcının mutlak bitiş zamanı - Absolute finish time per provider
+        provider_deadlines = {name: started + budgets[name] for name in futures}
+        for name in sorted(futures, key=provider_deadlines.get):
+            future = futures[name]
+            remaining = max(0.0, provider_deadlines[name] - time.monotonic())
+            try:
+                provider_flights = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                future.cancel()
+                status[name] = {
+                    'status': 'timeout',
+                    'configured': self.api_keys.get(name) is not None,
+                    'flights': 0,
+                    'elapsed': round(time.monotonic() - started, 3)
+                }
+                continue
+            except Exception as e:
+                print(f"{name} API search error: {e}")
+                status[name] = {
+                    'status': 'error',
+                    'configured': self.api_keys.get(name) is not None,
+                    'flights': 0,
+                    'elapsed': round(time.monotonic() - started, 3),
+                    'error': str(e)
+                }
+                continue
+            
+            provider_flights = provider_flights or []
+            flights.extend(provider_flights)
+            status[name] = {
+                'status': 'ok',
+                'configured': self.api_keys.get(name) is not None,
+                'flights': len(provider_flights),
+                'elapsed': round(time.monotonic() - started, 3)
+            }
+        
+        flights.sort(key=lambda x: x.get('price', float('inf')))
+        
+        return {
+            'flights': flights,
+            'status': status,
+            'elapsed': round(time.monotonic() - started, 3)
+        }
+    
+    def _get_executor(self, provider):
+        """Sağlayıcıya ayrılmış iş parçacığı havuzu - Thread pool reserved for one provider
+        
+        Zaman aşımına uğrayan çağrılar arka planda bitene kadar bir işçi
+        tutar; her sağlayıcının kendi havuzu olduğundan yavaş bir sağlayıcı
+        diğerlerinin işçilerini tüketemez.
+        Timed-out calls keep a worker until they finish; with one pool per
+        provider a slow provider cannot use up the workers of the others.
+        """
+        with self._executor_lock:
+            executor = self._executors.get(provider)
+            if executor is None:
+                executor = self._executors[provider] = ThreadPoolExecutor(
+                    max_workers=self.provider_workers,
+                    thread_name_prefix=f'api-{provider}'
+                )
+            return executor
+    
+    def _attempt_timeout(self, provider, budget=None):
+        """Deneme başına zaman aşımı - Per-attempt timeout
+        
+        Bağlantı havuzunun yeniden denemeleri de sağlayıcının süre
+        bütçesine sığar.
+        The HTTP pool's retries and their backoff also fit in the
+        provider's time budget.
+        """
+        if budget is None:
+            budget = self.provider_timeouts[provider]
+        return http_pool.attempt_timeout(budget)
+    
     def _parse_amadeus_response(self, data):
         """Amadeus API yanıtını ayrıştır - Parse Amadeus API response"""
         flights = []
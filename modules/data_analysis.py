@@ -3,10 +3,13 @@ Data Analysis Module
 Veri analizi modülü
 """
 
+from collections import deque
 from datetime import datetime, timedelta
 import statistics
 import random
 
+from utils.flight_batch import FlightBatch
+
 # Mock numpy for basic functions
 class MockNumpy:
     @staticmethod
@@ -23,67 +26,108 @@ np = MockNumpy()
 class DataAnalyzer:
     """Veri analizi sınıfı - Data analysis class"""
     
-    def __init__(self):
-        self.flight_data_history = []
+    def __init__(self, history_store=None):
+        # Son 1000 kayıt; taşan kayıtlar O(1) düşer - Last 1000 records, O(1) trimming
+        self.flight_data_history = deque(maxlen=1000)
+        # Kalıcı fiyat geçmişi (ör. utils.price_history.PriceHistoryStore)
+        # Optional persistent price history store
+        self.history_store = history_store
         self.price_trends = {}
         
     def analyze_flights(self, flights):
-        """Uçuşları analiz et - Analyze flights"""
+        """Uçuşları analiz et - Analyze flights
+        
+        Rota istatistikleri bir kez hesaplanır, her uçuş tek geçişte bir kez
+        puanlanır ve kategorilendirilir. FlightBatch girdisi doğrudan
+        sütunlar üzerinde işlenir ve FlightBatch döner; liste girdisi için
+        sözlük listesi döner.
+        Route statistics are computed once; each flight is scored and
+        categorized exactly once in a single pass. A FlightBatch is processed
+        column-wise and a FlightBatch is returned; a list input returns a
+        list of dicts.
+        """
+        is_batch = isinstance(flights, FlightBatch)
         if not flights:
-            return []
+            return FlightBatch() if is_batch else []
+        
+        batch = flights if is_batch else FlightBatch.from_dicts(flights)
+        thresholds = self._price_thresholds(batch.column('price'))
         
-        # Add analysis scores to flights
-        analyzed_flights = []
-        for flight in flights:
-            analyzed_flight = flight.copy()
-            analyzed_flight['score'] = self._calculate_flight_score(flight)
-            analyzed_flight['price_category'] = self._categorize_price(flight['price'], flights)
-            analyzed_flight['recommendation'] = self._get_recommendation(flight, flights)
-            analyzed_flights.append(analyzed_flight)
+        scores = []
+        categories = []
+        recommendations = []
+        for price, departure_time, airline, seats, baggage, refundable in zip(
+                batch.column('price'), batch.column('departure_time'), batch.column('airline'),
+                batch.column('available_seats'), batch.column('baggage_included'),
+                batch.column('refundable')):
+            score = self._score_values(price, departure_time, airline, seats, baggage, refundable)
+            price_category = self._category_for_price(price, thresholds)
+            scores.append(score)
+            categories.append(price_category)
+            recommendations.append(self._recommendation_for(score, price_category))
+        
+        # Yalnızca yeni sütunlar eklenir, mevcutlar paylaşılır - Only new columns are built
+        analyzed_flights = batch.with_columns(
+            score=scores,
+            price_category=categories,
+            recommendation=recommendations
+        )
         
         # Sort by score (best first)
-        analyzed_flights.sort(key=lambda x: x['score'], reverse=True)
+        analyzed_flights = analyzed_flights.sort_by('score', reverse=True)
         
         # Store data for future analysis
         self._store_flight_data(analyzed_flights)
         
-        return analyzed_flights
+        return analyzed_flights if is_batch else analyzed_flights.to_dicts()
     
     def _calculate_flight_score(self, flight):
         """Uçuş puanı hesapla - Calculate flight score"""
+        return self._score_values(
+            flight['price'],
+            flight['departure_time'],
+            flight['airline'],
+            flight['available_seats'],
+            flight.get('baggage_included', False),
+            flight.get('refundable', False)
+        )
+    
+    def _score_values(self, price, departure_time, airline, available_seats,
+                      baggage_included=False, refundable=False):
+        """Alan değerlerinden puan hesapla - Calculate score from field values"""
         score = 100  # Base score
         
         # Price factor (lower price = higher score)
-        if flight['price'] < 300:
+        if price < 300:
             score += 20
-        elif flight['price'] < 500:
+        elif price < 500:
             score += 10
-        elif flight['price'] > 800:
+        elif price > 800:
             score -= 20
         
         # Time factor (convenient times get bonus)
-        departure_hour = int(flight['departure_time'].split(':')[0])
+        departure_hour = int(departure_time.split(':')[0])
         if 8 <= departure_hour <= 10 or 14 <= departure_hour <= 18:
             score += 15  # Good departure times
         elif departure_hour < 6 or departure_hour > 22:
             score -= 10  # Very early or very late
         
         # Airline factor (premium airlines get bonus)
-        if flight['airline'].upper() in ['THY', 'TURKISH']:
+        if airline.upper() in ['THY', 'TURKISH']:
             score += 10
-        elif flight['airline'].upper() in ['PEGASUS', 'SUNEXPRESS']:
+        elif airline.upper() in ['PEGASUS', 'SUNEXPRESS']:
             score += 5
         
         # Availability factor
-        if flight['available_seats'] < 10:
+        if available_seats < 10:
             score -= 5  # Low availability
-        elif flight['available_seats'] > 30:
+        elif available_seats > 30:
             score += 5  # High availability
         
         # Additional services
-        if flight.get('baggage_included', False):
+        if baggage_included:
             score += 10
-        if flight.get('refundable', False):
+        if refundable:
             score += 5
         
         return max(0, min(100, score))  # Keep score between 0-100
@@ -93,14 +137,26 @@ class DataAnalyzer:
         if not all_flights:
             return 'orta'
         
-        prices = [f['price'] for f in all_flights]
+        thresholds = self._price_thresholds([f['price'] for f in all_flights])
+        return self._category_for_price(price, thresholds)
+    
+    def _price_thresholds(self, prices):
+        """Ucuz/pahalı eşiklerini hesapla - Compute cheap/expensive thresholds"""
         min_price = min(prices)
         max_price = max(prices)
-        avg_price = statistics.mean(prices)
+        avg_price = statistics.fmean(prices)
         
-        if price <= min_price + (avg_price - min_price) * 0.3:
+        return (
+            min_price + (avg_price - min_price) * 0.3,
+            avg_price + (max_price - avg_price) * 0.7
+        )
+    
+    def _category_for_price(self, price, thresholds):
+        """Eşiklere göre kategori - Category from precomputed thresholds"""
+        cheap_limit, expensive_limit = thresholds
+        if price <= cheap_limit:
             return 'ucuz'
-        elif price >= avg_price + (max_price - avg_price) * 0.7:
+        elif price >= expensive_limit:
             return 'pahalı'
         else:
             return 'orta'
@@ -110,6 +166,10 @@ class DataAnalyzer:
         price_category = self._categorize_price(flight['price'], all_flights)
         score = self._calculate_flight_score(flight)
         
+        return self._recommendation_for(score, price_category)
+    
+    def _recommendation_for(self, score, price_category):
+        """Puan ve kategoriden öneri - Recommendation from score and category"""
         if score >= 80:
             if price_category == 'ucuz':
                 return "🌟 Mükemmel fiyat! Hemen rezervasyon yapın."
@@ -131,7 +191,7 @@ class DataAnalyzer:
         if not flights:
             return {}
         
-        prices = [f['price'] for f in flights]
+        prices = self._values(flights, 'price')
         
         return {
             'min_price': min(prices),
@@ -142,14 +202,27 @@ class DataAnalyzer:
             'total_flights': len(flights)
         }
     
+    def _values(self, flights, name):
+        """Bir alanın tüm değerleri - All values of a field"""
+        if isinstance(flights, FlightBatch):
+            return flights.column(name)
+        return [f[name] for f in flights]
+    
+    def _optional_values(self, flights, name):
+        """Eksik olabilen alanın değerleri - Values of an optional field"""
+        if isinstance(flights, FlightBatch):
+            return flights.column(name)
+        return [f.get(name) for f in flights]
+    
     def get_airline_analysis(self, flights):
         """Havayolu analizi - Airline analysis"""
         if not flights:
             return {}
         
         airline_stats = {}
-        for flight in flights:
-            airline = flight['airline']
+        for airline, price, score in zip(self._values(flights, 'airline'),
+                                         self._values(flights, 'price'),
+                                         self._optional_values(flights, 'score')):
             if airline not in airline_stats:
                 airline_stats[airline] = {
                     'flight_count': 0,
@@ -159,9 +232,9 @@ class DataAnalyzer:
                 }
             
             airline_stats[airline]['flight_count'] += 1
-            airline_stats[airline]['prices'].append(flight['price'])
-            if 'score' in flight:
-                airline_stats[airline]['scores'].append(flight['score'])
+            airline_stats[airline]['prices'].append(price)
+            if score is not None:
+                airline_stats[airline]['scores'].append(score)
         
         # Calculate averages
         for airline, stats in airline_stats.items():
@@ -185,8 +258,9 @@ class DataAnalyzer:
             'gece': {'count': 0, 'prices': [], 'flights': []}        # 00:00-06:00
         }
         
-        for flight in flights:
-            hour = int(flight['departure_time'].split(':')[0])
+        for i, (departure_time, price) in enumerate(zip(self._values(flights, 'departure_time'),
+                                                        self._values(flights, 'price'))):
+            hour = int(departure_time.split(':')[0])
             
             if 6 <= hour < 12:
                 slot = 'sabah'
@@ -198,8 +272,8 @@ class DataAnalyzer:
                 slot = 'gece'
             
             time_slots[slot]['count'] += 1
-            time_slots[slot]['prices'].append(flight['price'])
-            time_slots[slot]['flights'].append(flight)
+            time_slots[slot]['prices'].append(price)
+            time_slots[slot]['flights'].append(flights[i])
         
         # Calculate averages
         for slot, data in time_slots.items():
@@ -244,16 +318,19 @@ class DataAnalyzer:
     
     def _store_flight_data(self, flights):
         """Uçuş verilerini sakla - Store flight data"""
-        for flight in flights:
-            flight_record = {
-                'timestamp': datetime.now().isoformat(),
-                'flight_data': flight
-            }
-            self.flight_data_history.append(flight_record)
+        if self.history_store is not None:
+            try:
+                self.history_store.record_flights(flights)
+            except Exception as e:
+                print(f"Fiyat geçmişi kaydedilemedi: {e}")
         
-        # Keep only last 1000 records
-        if len(self.flight_data_history) > 1000:
-            self.flight_data_history = self.flight_data_history[-1000:]
+        timestamp = datetime.now().isoformat()
+        # Zaten düşecek kayıtları hiç ekleme - Skip records that would be dropped anyway
+        for flight in flights[-self.flight_data_history.maxlen:]:
+            self.flight_data_history.append({
+                'timestamp': timestamp,
+                'flight_data': flight
+            })
     
     def get_insights(self, flights):
         """Genel içgörüler - Get general insights"""
@@ -4,14 +4,23 @@ Uçuş arama motoru modülü
 """
 
 import requests
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as date_type, datetime, timedelta
+import os
 import random
+import threading
 import time
 
+from utils.flight_batch import FlightBatch
+from utils.search_cache import search_cache, make_search_key
+
 class FlightSearchEngine:
     """Uçuş arama motoru - Flight search engine"""
     
-    def __init__(self):
+    def __init__(self, cache=None, api_manager=None):
+        self.cache = cache if cache is not None else search_cache
+        # Verilirse aramalar sağlayıcı API'lerine gider - When given, searches go to the provider APIs
+        self.api_manager = api_manager
         self.search_engines = [
             'pegasus', 'thy', 'sunexpress', 'anadolujet'
         ]
@@ -24,9 +33,17 @@ class FlightSearchEngine:
             'Trabzon': ['TZX'],
             'Gaziantep': ['GZT']
         }
+        # Esnek tarih aramasında en fazla gün sayısı - Max days in a flexible-date search
+        self.max_range_days = int(os.getenv('FARE_CALENDAR_MAX_DAYS', '31'))
+        self._executor = None
+        self._executor_lock = threading.Lock()
     
     def search_flights(self, departure, destination, date, return_date=None):
-        """Uçuş ara - Search flights"""
+        """Uçuş ara - Search flights
+        
+        Sonuçlar sütunlu FlightBatch olarak döner.
+        Results are returned as a columnar FlightBatch.
+        """
         try:
             # Parse date
             flight_date = datetime.strptime(date, '%Y-%m-%d')
@@ -36,25 +53,216 @@ class FlightSearchEngine:
             dest_codes = self._get_airport_codes(destination)
             
             if not dep_codes or not dest_codes:
-                return []
-            
-            flights = []
-            
-            # Search on different engines
-            for engine in self.search_engines:
-                engine_flights = self._search_on_engine(
-                    engine, dep_codes[0], dest_codes[0], flight_date
-                )
-                flights.extend(engine_flights)
-            
-            # Sort by price
-            flights.sort(key=lambda x: x['price'])
+                return FlightBatch()
             
+            # Aynı rota ve tarih için önbellekten dön - Serve repeated searches from cache
+            # Eksik sonuçlar kısa süre saklanır - Partial results are only kept briefly
+            key = make_search_key(dep_codes[0], dest_codes[0], flight_date, return_date, source='engine')
+            flights, complete = self.cache.get_or_fetch(
+                key,
+                lambda: self._search_all_engines(dep_codes[0], dest_codes[0], flight_date),
+                ttl_for=lambda result: None if result[1] else self.cache.partial_ttl
+            )
             return flights
             
         except Exception as e:
             print(f"Arama hatası: {e}")
-            return []
+            return FlightBatch()
+    
+    def search_date_range(self, departure, destination, start, end, return_window=None):
+        """Esnek tarihli fiyat matrisi - Flexible-date cheapest-fare matrix
+        
+        start-end arasındaki tüm gidiş tarihleri (ve return_window verilirse
+        dönüş tarihleri) tek bir eşzamanlı toplu işte aranır. Aynı tarih bir
+        kez aranır; önbellekteki sonuçlar yeniden kullanılır.
+        Every departure date between start and end (and, when return_window
+        is given, every return date) is fetched in one concurrent batch. Each
+        date is searched once and cached results are reused.
+        
+        return_window: (min_days, max_days) after departure, or None for one-way.
+        One-way results have a flat 'fares' list; round trips have a
+        departure × return matrix where impossible combinations are None.
+        """
+        start = self._to_date(start)
+        end = self._to_date(end)
+        if end < start:
+            raise ValueError("Bitiş tarihi başlangıç tarihinden önce olamaz")
+        if (end - start).days + 1 > self.max_range_days:
+            raise ValueError(f"Tarih aralığı en fazla {self.max_range_days} gün olabilir")
+        
+        departure_dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+        return_dates = []
+        if return_window is not None:
+            min_days, max_days = return_window
+            if min_days < 0 or max_days < min_days:
+                raise ValueError("Geçersiz dönüş aralığı")
+            # Dönüş tarihleri gidiş aralığı + pencere genişliği kadardır
+            # Return dates span the departure range plus the window width
+            if max_days - min_days + 1 > self.max_range_days:
+                raise ValueError(f"Dönüş aralığı en fazla {self.max_range_days} gün olabilir")
+            try:
+                first_return = start + timedelta(days=min_days)
+                last_return = end + timedelta(days=max_days)
+            except OverflowError:
+                raise ValueError("Geçersiz dönüş aralığı")
+            return_dates = [first_return + timedelta(days=i)
+                            for i in range((last_return - first_return).days + 1)]
+        
+        # Tüm aramalar tek seferde planlanır - Schedule every search in one batch
+        searches = {('out', d): (departure, destination, d) for d in departure_dates}
+        searches.update({('in', d): (destination, departure, d) for d in return_dates})
+        executor = self._get_executor()
+        futures = {
+            key: executor.submit(self.search_flights, origin, dest, d.isoformat())
+            for key, (origin, dest, d) in searches.items()
+        }
+        cheapest = {key: self._cheapest_fare(future.result()) for key, future in futures.items()}
+        
+        result = {
+            'departure': departure,
+            'destination': destination,
+            'departure_dates': [d.isoformat() for d in departure_dates],
+            'return_dates': [d.isoformat() for d in return_dates],
+            'currency': 'TL',
+            'cheapest': None
+        }
+        
+        best = None
+        if return_window is None:
+            fares = [cheapest[('out', d)] for d in departure_dates]
+            for d, fare in zip(departure_dates, fares):
+                if fare is not None and (best is None or fare < best[0]):
+                    best = (fare, d, None)
+        else:
+            fares = []
+            for d in departure_dates:
+                outbound = cheapest[('out', d)]
+                row = []
+                for r in return_dates:
+                    stay = (r - d).days
+                    inbound = cheapest[('in', r)]
+                    if outbound is None or inbound is None or not min_days <= stay <= max_days:
+                        row.append(None)
+                        continue
+                    fare = outbound + inbound
+                    row.append(fare)
+                    if best is None or fare < best[0]:
+                        best = (fare, d, r)
+                fares.append(row)
+        
+        result['fares'] = fares
+        if best is not None:
+            result['cheapest'] = {
+                'price': best[0],
+                'departure_date': best[1].isoformat(),
+                'return_date': best[2].isoformat() if best[2] else None
+            }
+        
+        return result
+    
+    def _cheapest_fare(self, flights):
+        """En düşük fiyat - Cheapest price in a result set"""
+        prices = [p for p in flights.column('price') if p is not None] if len(flights) else []
+        return min(prices) if prices else None
+    
+    def _to_date(self, value):
+        """Tarihe dönüştür - Convert to date"""
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date_type):
+            return value
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    
+    def _get_executor(self):
+        """Paylaşılan iş parçacığı havuzu - Shared worker thread pool
+        
+        Her tarih her sağlayıcı havuzundan bir işçi kullanır; havuzlardan
+        büyük olursa tarihler sağlayıcı kuyruğunda bekleyip süre sınırını
+        kaçırır.
+        Every date takes one worker from each provider pool; a fan-out wider
+        than those pools would leave dates queued past the search deadline.
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                workers = int(os.getenv('FARE_CALENDAR_WORKERS', '8'))
+                if self.api_manager is not None:
+                    workers = min(workers, self.api_manager.provider_workers)
+                self._executor = ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix='date-range-search'
+                )
+            return self._executor
+    
+    def _search_all_engines(self, departure_code, destination_code, flight_date):
+        """Tüm motorlarda ara - Search on all engines
+        
+        (uçuşlar, tam mı) döner - Returns (flights, whether every source answered)
+        """
+        if self.api_manager is not None:
+            return self._search_providers(departure_code, destination_code, flight_date)
+        
+        flights = []
+        
+        # Search on different engines
+        for engine in self.search_engines:
+            engine_flights = self._search_on_engine(
+                engine, departure_code, destination_code, flight_date
+            )
+            flights.extend(engine_flights)
+        
+        # Sort by price
+        flights.sort(key=lambda x: x['price'])
+        
+        return FlightBatch.from_dicts(flights), True
+    
+    def _search_providers(self, departure_code, destination_code, flight_date):
+        """Sağlayıcı API'lerinde eşzamanlı ara - Search the provider APIs concurrently
+        
+        Süre sınırına yetişmeyen sağlayıcılar sonuca katılmaz ve sonuç
+        eksik sayılır.
+        Providers that miss the search deadline are left out of the result,
+        which is then reported as incomplete.
+        """
+        result = self.api_manager.search_all(
+            departure_code, destination_code, flight_date.strftime('%Y-%m-%d')
+        )
+        flights = [
+            self._from_provider(flight, departure_code, destination_code, flight_date)
+            for flight in result['flights']
+        ]
+        complete = all(provider['status'] == 'ok' for provider in result['status'].values())
+        return FlightBatch.from_dicts([f for f in flights if f['departure_time'] and f['price'] is not None]), complete
+    
+    def _from_provider(self, flight, dep_code, dest_code, date):
+        """Sağlayıcı uçuşunu arama biçimine çevir - Convert a provider flight to the search format"""
+        segments = flight.get('segments') or []
+        departure_time = flight.get('departure_time')
+        arrival_time = flight.get('arrival_time')
+        if segments and not departure_time:
+            # Amadeus: ISO zamanları segmentlerde - ISO times live in the segments
+            departure_time = (segments[0]['departure'].get('at') or '')[11:16] or None
+            arrival_time = (segments[-1]['arrival'].get('at') or '')[11:16] or None
+        source = flight.get('source', '')
+        flight_number = flight.get('flight_number') or (segments[0].get('flight_number') if segments else None)
+        
+        return {
+            'id': f"{source}_{dep_code}_{dest_code}_{flight_number}",
+            'airline': flight.get('airline') or source.upper(),
+            'flight_number': flight_number,
+            'departure_airport': dep_code,
+            'destination_airport': dest_code,
+            'departure_date': date.strftime('%Y-%m-%d'),
+            'departure_time': departure_time,
+            'arrival_time': arrival_time,
+            'duration': flight.get('duration'),
+            'price': flight.get('price'),
+            'currency': flight.get('currency', 'TL'),
+            # Bilinmeyen koltuk sayısı düşük sayılır - Unknown availability counts as low
+            'available_seats': flight.get('available_seats', 0),
+            'booking_url': flight.get('booking_url'),
+            'baggage_included': flight.get('baggage_included', False),
+            'refundable': flight.get('refundable', False)
+        }
     
     def _search_on_engine(self, engine, departure_code, destination_code, date):
         """Belirli bir motorda ara - Search on specific engine"""
@@ -99,6 +307,7 @@ class FlightSearchEngine:
             'flight_number': f"{airline.upper()}{random.randint(100, 999)}",
             'departure_airport': dep_code,
             'destination_airport': dest_code,
+            'departure_date': date.strftime('%Y-%m-%d'),
             'departure_time': departure_time.strftime('%H:%M'),
             'arrival_time': arrival_time.strftime('%H:%M'),
             'duration': str(flight_duration).split(':')[0] + 'sa ' + str(flight_duration).split(':')[1] + 'dk',
@@ -3,13 +3,77 @@ Notification Service Module
 Bildirim servisi modülü
 """
 
-import smtplib
 import os
+import threading
+from collections import deque
+from itertools import islice
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import json
 
+from utils.notification_templates import (BOOKING_CONFIRMATION, DEAL_ALERT, PRICE_ALERT,
+                                          PRICE_WATCH_CONFIRMATION, TRIP_REMINDER)
+from utils.smtp_pool import get_smtp_pool
+
+
+class NotificationHistory:
+    """Bildirim geçmişi halka tamponu - Notification history ring buffer
+    
+    Sabit kapasiteli deque ve alıcı bazlı ikincil indeks tutar. Ekleme ve
+    kırpma O(1), alıcı sorguları O(limit) sürer; eşzamanlı yazıcılar için
+    kilitlidir.
+    Keeps a fixed-capacity deque plus a per-recipient index. Appends and
+    trims are O(1), lookups are O(limit); guarded by a lock for concurrent
+    writers.
+    """
+    
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self._entries = deque()
+        self._by_recipient = {}
+        self._lock = threading.Lock()
+    
+    def append(self, entry):
+        """Kayıt ekle - Append an entry, evicting the oldest when full"""
+        with self._lock:
+            if len(self._entries) >= self.capacity:
+                oldest = self._entries.popleft()
+                # The oldest entry overall is also the oldest of its recipient
+                recipient_entries = self._by_recipient[oldest['recipient']]
+                recipient_entries.popleft()
+                if not recipient_entries:
+                    del self._by_recipient[oldest['recipient']]
+            
+            self._entries.append(entry)
+            recipient_entries = self._by_recipient.get(entry['recipient'])
+            if recipient_entries is None:
+                recipient_entries = self._by_recipient[entry['recipient']] = deque()
+            recipient_entries.append(entry)
+    
+    def latest(self, recipient=None, limit=50):
+        """Son kayıtlar (eskiden yeniye) - Latest entries, oldest first"""
+        with self._lock:
+            entries = self._by_recipient.get(recipient, ()) if recipient else self._entries
+            if not limit:
+                return list(entries)
+            result = list(islice(reversed(entries), limit))
+        result.reverse()
+        return result
+    
+    def clear(self):
+        """Geçmişi temizle - Clear history"""
+        with self._lock:
+            self._entries.clear()
+            self._by_recipient.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def __iter__(self):
+        return iter(self.latest(limit=None))
+
+
 class NotificationService:
     """Bildirim servisi sınıfı - Notification service class"""
     
@@ -18,9 +82,10 @@ class NotificationService:
             'smtp_server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
             'smtp_port': int(os.getenv('SMTP_PORT', '587')),
             'email': os.getenv('EMAIL_ADDRESS'),
-            'password': os.getenv('EMAIL_PASSWORD')
+            'password': os.getenv('EMAIL_PASSWORD'),
+            'use_tls': os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
         }
-        self.notification_history = []
+        self.notification_history = NotificationHistory(capacity=1000)
         
     def send_notification(self, recipient, message, notification_type='email', subject=None):
         """Bildirim gönder - Send notification"""
@@ -58,14 +123,8 @@ class NotificationService:
             # Add message body
             msg.attach(MIMEText(message, 'plain', 'utf-8'))
             
-            # Connect to server and send email
-            server = smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port'])
-            server.starttls()
-            server.login(self.email_config['email'], self.email_config['password'])
-            
-            text = msg.as_string()
-            server.sendmail(self.email_config['email'], recipient, text)
-            server.quit()
+            # Send over a pooled, already authenticated connection
+            self._smtp_pool().send_message(msg, self.email_config['email'], [recipient])
             
             self._log_notification(recipient, message, 'email', True)
             return True
@@ -75,6 +134,22 @@ class NotificationService:
             self._log_notification(recipient, message, 'email', False)
             return False
     
+    def _smtp_pool(self):
+        """SMTP bağlantı havuzu - Shared SMTP connection pool"""
+        return get_smtp_pool(
+            self.email_config['smtp_server'],
+            self.email_config['smtp_port'],
+            self.email_config['email'],
+            self.email_config['password'],
+            use_tls=self.email_config['use_tls']
+        )
+    
+    def get_smtp_stats(self):
+        """SMTP bağlantı istatistikleri - SMTP connection statistics"""
+        if not self.email_config['email'] or not self.email_config['password']:
+            return {}
+        return self._smtp_pool().get_stats()
+    
     def _send_sms(self, recipient, message):
         """SMS gönder - Send SMS"""
         # Mock SMS service (in real implementation, integrate with SMS provider)
@@ -97,101 +172,34 @@ class NotificationService:
     
     def send_price_alert(self, user_email, flight_details, target_price, current_price):
         """Fiyat uyarısı gönder - Send price alert"""
-        subject = "🎯 Fiyat Uyarısı - Hedef Fiyat Düştü!"
-        
-        message = f"""
-Merhaba,
-
-Takip ettiğiniz uçuş için fiyat düşüşü tespit edildi!
-
-Uçuş Detayları:
-• Güzergah: {flight_details.get('departure', 'N/A')} → {flight_details.get('destination', 'N/A')}
-• Tarih: {flight_details.get('date', 'N/A')}
-• Havayolu: {flight_details.get('airline', 'N/A')}
-
-Fiyat Bilgileri:
-• Hedef Fiyat: {target_price} TL
-• Mevcut Fiyat: {current_price} TL
-• Tasarruf: {target_price - current_price} TL
-
-Hemen rezervasyon yapmak için linke tıklayın:
-{flight_details.get('booking_url', '#')}
-
-En Uygun Uçak Bileti Ekibi
-"""
-        
+        subject, message, _ = PRICE_ALERT.render(
+            flight_details, target_price=target_price, current_price=current_price
+        )
         return self.send_notification(user_email, message, 'email', subject)
     
     def send_booking_confirmation(self, user_email, booking_details):
         """Rezervasyon onayı gönder - Send booking confirmation"""
-        subject = "✅ Rezervasyon Onayı"
-        
-        message = f"""
-Rezervasyonunuz başarıyla alındı!
-
-Rezervasyon Detayları:
-• Rezervasyon Kodu: {booking_details.get('confirmation_code', 'N/A')}
-• Güzergah: {booking_details.get('departure', 'N/A')} → {booking_details.get('destination', 'N/A')}
-• Tarih: {booking_details.get('date', 'N/A')}
-• Saat: {booking_details.get('time', 'N/A')}
-• Yolcu: {booking_details.get('passenger_name', 'N/A')}
-• Toplam Tutar: {booking_details.get('total_price', 'N/A')} TL
-
-Check-in işlemi için havayolu web sitesini ziyaret edin.
-
-İyi yolculuklar!
-En Uygun Uçak Bileti Ekibi
-"""
-        
+        subject, message, _ = BOOKING_CONFIRMATION.render(booking_details)
         return self.send_notification(user_email, message, 'email', subject)
     
     def send_flight_reminder(self, user_email, flight_details, hours_before=24):
         """Uçuş hatırlatması gönder - Send flight reminder"""
-        subject = f"✈️ Uçuş Hatırlatması - {hours_before} Saat Kaldı"
-        
-        message = f"""
-Uçuşunuza {hours_before} saat kaldı!
-
-Uçuş Detayları:
-• Güzergah: {flight_details.get('departure', 'N/A')} → {flight_details.get('destination', 'N/A')}
-• Tarih: {flight_details.get('date', 'N/A')}
-• Kalkış Saati: {flight_details.get('departure_time', 'N/A')}
-• Havayolu: {flight_details.get('airline', 'N/A')}
-• Uçuş No: {flight_details.get('flight_number', 'N/A')}
-
-Hatırlatmalar:
-• Havalimanına en az 2 saat önce gelin
-• Check-in işlemini unutmayın
-• Kimlik belgilerinizi yanınıza alın
-• Bagaj limitlerini kontrol edin
-
-İyi yolculuklar!
-En Uygun Uçak Bileti Ekibi
-"""
-        
+        subject, message, _ = TRIP_REMINDER.render(flight_details, hours_before=hours_before)
         return self.send_notification(user_email, message, 'email', subject)
     
     def send_deal_alert(self, user_email, deal_details):
         """Fırsat uyarısı gönder - Send deal alert"""
-        subject = "🔥 Süper Fırsat - Sınırlı Süreli İndirim!"
-        
-        message = f"""
-Kaçırılmayacak fırsat!
-
-Fırsat Detayları:
-• Güzergah: {deal_details.get('departure', 'N/A')} → {deal_details.get('destination', 'N/A')}
-• Normal Fiyat: {deal_details.get('normal_price', 'N/A')} TL
-• İndirimli Fiyat: {deal_details.get('discounted_price', 'N/A')} TL
-• İndirim Oranı: %{deal_details.get('discount_percentage', 'N/A')}
-• Geçerlilik: {deal_details.get('valid_until', 'N/A')}
-
-Bu fırsatı kaçırmayın! Hemen rezervasyon yapın.
-
-En Uygun Uçak Bileti Ekibi
-"""
-        
+        subject, message, _ = DEAL_ALERT.render(deal_details)
         return self.send_notification(user_email, message, 'email', subject)
     
+    def send_deal_alerts(self, user_emails, deal_details):
+        """Toplu fırsat uyarısı - Send one deal alert to many users
+        
+        Mesaj bir kez oluşturulur - The message is rendered once for the batch.
+        """
+        subject, message, _ = DEAL_ALERT.render(deal_details)
+        return [self.send_notification(email, message, 'email', subject) for email in user_emails]
+    
     def _log_notification(self, recipient, message, notification_type, success):
         """Bildirim geçmişini kaydet - Log notification history"""
         log_entry = {
@@ -203,19 +211,10 @@ En Uygun Uçak Bileti Ekibi
         }
         
         self.notification_history.append(log_entry)
-        
-        # Keep only last 1000 notifications
-        if len(self.notification_history) > 1000:
-            self.notification_history = self.notification_history[-1000:]
     
     def get_notification_history(self, recipient=None, limit=50):
         """Bildirim geçmişini getir - Get notification history"""
-        history = self.notification_history
-        
-        if recipient:
-            history = [n for n in history if n['recipient'] == recipient]
-        
-        return history[-limit:] if limit else history
+        return self.notification_history.latest(recipient, limit)
     
     def create_price_watch(self, user_email, flight_criteria, target_price):
         """Fiyat takibi oluştur - Create price watch"""
@@ -232,17 +231,11 @@ En Uygun Uçak Bileti Ekibi
         }
         
         # Mock confirmation
-        confirmation_message = f"""
-Fiyat takibi başarıyla oluşturuldu!
-
-Takip ID: {watch_id}
-Güzergah: {flight_criteria.get('departure')} → {flight_criteria.get('destination')}
-Hedef Fiyat: {target_price} TL
-
-Fiyat hedefi altına düştüğünde bildirim alacaksınız.
-"""
+        subject, confirmation_message, _ = PRICE_WATCH_CONFIRMATION.render(
+            flight_criteria, watch_id=watch_id, target_price=target_price
+        )
         
-        self.send_notification(user_email, confirmation_message, 'email', 'Fiyat Takibi Onayı')
+        self.send_notification(user_email, confirmation_message, 'email', subject)
         
         return watch_id
     
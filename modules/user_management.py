@@ -4,7 +4,12 @@ Kullanıcı yönetimi modülü
 """
 
 import re
+import hmac
 import hashlib
+import threading
+from itertools import count
+
+from utils.passwords import password_hasher
 
 class UserMixin:
     """User mixin for basic user functionality"""
@@ -25,12 +30,15 @@ class User(UserMixin):
     pass
 
 def generate_password_hash(password):
-    """Generate password hash"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Tuzlu şifre özeti üret - Generate a salted password hash (PASSWORD_HASH_METHOD)"""
+    return password_hasher.hash(password)
 
 def check_password_hash(hash_value, password):
-    """Check password hash"""
-    return hash_value == hashlib.sha256(password.encode()).hexdigest()
+    """Şifre özetini doğrula - Check password hash (also accepts legacy unsalted SHA-256)"""
+    if hash_value and '$' not in hash_value:
+        # Eski bellek içi kayıtların tuzsuz özeti - Unsalted digest of legacy in-memory records
+        return hmac.compare_digest(hash_value, hashlib.sha256(password.encode()).hexdigest())
+    return password_hasher.verify(hash_value, password)
 
 def login_user(user):
     """Mock login user function"""
@@ -41,11 +49,20 @@ def logout_user():
     print("User logged out")
 
 class UserManager:
-    """Kullanıcı yönetimi sınıfı - User management class"""
+    """Kullanıcı yönetimi sınıfı - User management class
+
+    Kullanıcılar e-posta ve kimlik indekslerinde tutulur; tüm değişiklikler
+    kilit altında yapılır - Users are kept in email and id indexes and every
+    change happens under a lock, so request threads can share one manager.
+    """
     
     def __init__(self, db):
         self.db = db
-        self.users = {}  # Simple in-memory storage for demo
+        self.users = {}  # email -> User (simple in-memory storage for demo)
+        self.users_by_id = {}  # str(id) -> User
+        # Kimlikler asla yeniden kullanılmaz - Ids are never reused, even after deletes
+        self._ids = count(1)
+        self._lock = threading.RLock()
         
     def create_user(self, email, password, name):
         """Yeni kullanıcı oluştur - Create new user"""
@@ -53,30 +70,34 @@ class UserManager:
         if not self._validate_email(email):
             return False, "Geçersiz email formatı"
         
-        # Check if user already exists
-        if email in self.users:
-            return False, "Bu email adresi zaten kullanımda"
-        
         # Validate password strength
         if not self._validate_password(password):
             return False, "Şifre en az 6 karakter olmalı"
         
-        # Create user
-        user_id = len(self.users) + 1
         password_hash = generate_password_hash(password)
         
-        user = User(user_id, email, name, password_hash)
-        self.users[email] = user
+        with self._lock:
+            # Check if user already exists
+            if email in self.users:
+                return False, "Bu email adresi zaten kullanımda"
+            
+            # Create user
+            user = User(next(self._ids), email, name, password_hash)
+            self.users[email] = user
+            self.users_by_id[user.get_id()] = user
         
         return True, "Kullanıcı başarıyla oluşturuldu"
     
     def authenticate_user(self, email, password):
         """Kullanıcı doğrula - Authenticate user"""
-        if email not in self.users:
+        user = self.users.get(email)
+        if user is None:
             return False, None
         
-        user = self.users[email]
         if check_password_hash(user.password_hash, password):
+            if password_hasher.needs_rehash(user.password_hash):
+                # Eski veya tuzsuz özet yenilenir - Upgrade legacy or outdated hashes on login
+                user.password_hash = generate_password_hash(password)
             login_user(user)
             return True, user
         
@@ -84,33 +105,43 @@ class UserManager:
     
     def get_user_by_id(self, user_id):
         """ID ile kullanıcı getir - Get user by ID"""
-        for user in self.users.values():
-            if str(user.id) == str(user_id):
-                return user
-        return None
+        return self.users_by_id.get(str(user_id))
     
     def get_user_by_email(self, email):
         """Email ile kullanıcı getir - Get user by email"""
         return self.users.get(email)
     
-    def update_user(self, email, **kwargs):
+    def update_user(self, email, /, **kwargs):
         """Kullanıcı bilgilerini güncelle - Update user information"""
-        if email not in self.users:
-            return False, "Kullanıcı bulunamadı"
-        
-        user = self.users[email]
-        for key, value in kwargs.items():
-            if hasattr(user, key):
-                setattr(user, key, value)
+        with self._lock:
+            if email not in self.users:
+                return False, "Kullanıcı bulunamadı"
+            
+            user = self.users[email]
+            new_email = kwargs.get('email', email)
+            if new_email != email:
+                # Email indeksin anahtarıdır - The email keys the index, so it moves with the user
+                if not self._validate_email(new_email):
+                    return False, "Geçersiz email formatı"
+                if new_email in self.users:
+                    return False, "Bu email adresi zaten kullanımda"
+                self.users[new_email] = self.users.pop(email)
+            
+            for key, value in kwargs.items():
+                # Kimlik indeksin anahtarıdır - The id keys the index and stays fixed
+                if key != 'id' and hasattr(user, key):
+                    setattr(user, key, value)
         
         return True, "Kullanıcı bilgileri güncellendi"
     
     def delete_user(self, email):
         """Kullanıcıyı sil - Delete user"""
-        if email in self.users:
-            del self.users[email]
-            return True, "Kullanıcı silindi"
-        return False, "Kullanıcı bulunamadı"
+        with self._lock:
+            user = self.users.pop(email, None)
+            if user is None:
+                return False, "Kullanıcı bulunamadı"
+            self.users_by_id.pop(user.get_id(), None)
+        return True, "Kullanıcı silindi"
     
     def _validate_email(self, email):
         """Email formatını doğrula - Validate email format"""
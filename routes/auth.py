@@ -9,8 +9,13 @@ from werkzeug.security import check_password_hash
 from datetime import datetime
 import re
 
+from utils.passwords import PasswordHasherBusy
+
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+# Shown when the password hashing pool is saturated; nothing was wrong with the input
+BUSY_MESSAGE = 'Sistem şu anda yoğun. Lütfen birkaç saniye sonra tekrar deneyin.'
+
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
 def register():
@@ -47,6 +52,10 @@ def register():
                 flash('Kayıt başarıyla tamamlandı. Şimdi giriş yapabilirsiniz.', 'success')
                 return redirect(url_for('auth.login'))
                 
+            except PasswordHasherBusy:
+                db.session.rollback()
+                flash(BUSY_MESSAGE, 'error')
+                return render_template('auth/register.html', form=form), 503
             except Exception as e:
                 db.session.rollback()
                 flash('Kayıt sırasında bir hata oluştu. Lütfen tekrar deneyin.', 'error')
@@ -78,7 +87,13 @@ def login():
         if form.validate():
             user = User.query.filter_by(email=form.data['email'].lower()).first()
             
-            if user and user.check_password(form.data['password']):
+            try:
+                valid = user is not None and user.check_password(form.data['password'])
+            except PasswordHasherBusy:
+                flash(BUSY_MESSAGE, 'error')
+                return render_template('auth/login.html', form=form), 503
+            
+            if valid:
                 if not user.is_active:
                     flash('Hesabınız devre dışı bırakılmış.', 'error')
                     return render_template('auth/login.html', form=form)
@@ -3,19 +3,31 @@ Flight-related routes for search, listing and booking.
 Implements MYK Level 5 flight management standards.
 """
 
-from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, abort
 from flask_login import login_required, current_user
 from datetime import datetime, date
 import json
 
 from app import db
 from models.models import FlightSearch, Flight, Notification
+from modules.api_integration import APIManager
+from modules.flight_search import FlightSearchEngine
 from utils.forms import FlightSearchForm
+from utils.pagination import page_args, paginate_keyset
 from utils.flight_api import FlightAPIClient
+from utils.flight_inventory import flight_inventory
+from utils.price_history import price_history
+from utils.price_index import PriceThresholdIndex
 from utils.validators import validate_airport_code, validate_date_range
 
 flights_bp = Blueprint('flights', __name__, url_prefix='/flights')
 
+# Shared across requests so the pooled provider connections are reused;
+# every upstream fetch is recorded in the price history and the flight inventory
+api_client = FlightAPIClient(history_store=price_history, inventory=flight_inventory)
+# The fare calendar fans out to every provider API within one deadline
+flight_search = FlightSearchEngine(api_manager=APIManager())
+
 
 @flights_bp.route('/search', methods=['GET', 'POST'])
 @login_required
@@ -40,6 +52,7 @@ def search():
                 )
                 
                 db.session.add(search_record)
+                PriceThresholdIndex.mark_changed(search_record)
                 db.session.commit()
                 
                 # Redirect to results page
@@ -70,7 +83,6 @@ def results(search_id):
     ).first_or_404()
     
     # Fetch flights from API
-    api_client = FlightAPIClient()
     flights_data = api_client.search_flights(
         origin=search.origin,
         destination=search.destination,
@@ -80,35 +92,49 @@ def results(search_id):
     )
     
     # Filter flights based on user preferences
-    filtered_flights = []
-    for flight_data in flights_data:
-        # Apply price filter
-        if search.max_price and flight_data.get('price', 0) > search.max_price:
-            continue
-            
-        # Apply airline filter
-        if search.airline_preference and search.airline_preference.lower() not in flight_data.get('airline', '').lower():
-            continue
-            
-        filtered_flights.append(flight_data)
+    mask = [True] * len(flights_data)
+    
+    # Apply price filter
+    if search.max_price:
+        mask = [keep and (price or 0) <= search.max_price
+                for keep, price in zip(mask, flights_data.column('price'))]
+    
+    # Apply airline filter
+    if search.airline_preference:
+        preference = search.airline_preference.lower()
+        mask = [keep and preference in (airline or '').lower()
+                for keep, airline in zip(mask, flights_data.column('airline'))]
     
     # Sort by price
-    filtered_flights.sort(key=lambda x: x.get('price', float('inf')))
+    filtered_flights = flights_data.where(mask).sort_by('price')
     
     return render_template('flights/results.html', 
-                         flights=filtered_flights,
+                         flights=filtered_flights.to_dicts(),
                          search=search)
 
 
 @flights_bp.route('/my-searches')
 @login_required
 def my_searches():
-    """Display user's saved searches."""
-    searches = FlightSearch.query.filter_by(
-        user_id=current_user.id
-    ).order_by(FlightSearch.created_at.desc()).all()
-    
-    return render_template('flights/my_searches.html', searches=searches)
+    """Display user's saved searches, one keyset page at a time."""
+    page = _searches_page()
+    return render_template('flights/my_searches.html', searches=page.items, next_cursor=page.next_cursor)
+
+
+@flights_bp.route('/api/my-searches')
+@login_required
+def api_my_searches():
+    """API endpoint for paging through the user's saved searches."""
+    page = _searches_page()
+    return jsonify({'items': [search.to_dict() for search in page.items], 'next_cursor': page.next_cursor})
+
+
+def _searches_page():
+    cursor, limit = page_args()
+    try:
+        return paginate_keyset(FlightSearch.query.filter_by(user_id=current_user.id), FlightSearch, cursor, limit)
+    except ValueError:
+        abort(400)
 
 
 @flights_bp.route('/toggle-search/<search_id>')
@@ -121,6 +147,7 @@ def toggle_search(search_id):
     ).first_or_404()
     
     search.is_active = not search.is_active
+    PriceThresholdIndex.mark_changed(search)
     db.session.commit()
     
     status = 'aktif' if search.is_active else 'pasif'
@@ -139,12 +166,40 @@ def delete_search(search_id):
     ).first_or_404()
     
     db.session.delete(search)
+    PriceThresholdIndex.mark_changed(search)
     db.session.commit()
     
     flash('Arama silindi.', 'success')
     return redirect(url_for('flights.my_searches'))
 
 
+@flights_bp.route('/api/calendar')
+def api_calendar():
+    """API endpoint for the flexible-date fare calendar."""
+    departure = request.args.get('departure')
+    destination = request.args.get('destination')
+    start = request.args.get('start')
+    end = request.args.get('end')
+    min_stay = request.args.get('min_stay', type=int)
+    max_stay = request.args.get('max_stay', type=int)
+    
+    if not all([departure, destination, start, end]):
+        return jsonify({'error': 'Missing required parameters'}), 400
+    
+    return_window = None
+    if 'min_stay' in request.args or 'max_stay' in request.args:
+        if min_stay is None or max_stay is None:
+            return jsonify({'error': 'min_stay and max_stay must both be given as whole days'}), 400
+        return_window = (min_stay, max_stay)
+    
+    try:
+        calendar = flight_search.search_date_range(departure, destination, start, end, return_window)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(calendar)
+
+
 @flights_bp.route('/api/airports')
 def api_airports():
     """API endpoint for airport autocomplete."""
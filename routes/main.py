@@ -2,11 +2,20 @@
 Main application routes.
 """
 
-from flask import Blueprint, render_template, redirect, url_for
-from flask_login import current_user
+from flask import Blueprint, render_template, redirect, url_for, jsonify, abort, request
+from flask_login import login_required, current_user
+
+from modules.notification_service import NotificationService as ChannelNotificationService
+from utils.notifications import NotificationService
+from utils.outbox import notification_outbox
+from utils.pagination import page_args
+from utils.unread_counter import unread_counter
 
 main_bp = Blueprint('main', __name__)
 
+# Sends the SMS and push notifications requested through /api/notify
+channel_notifications = ChannelNotificationService()
+
 
 @main_bp.route('/')
 def index():
@@ -37,4 +46,80 @@ def dashboard():
     
     return render_template('dashboard.html', 
                          recent_searches=recent_searches,
-                         notifications=unread_notifications)
\ No newline at end of file
+                         notifications=unread_notifications,
+                         unread_count=unread_counter.get(current_user.id))
+
+
+@main_bp.app_context_processor
+def inject_unread_count():
+    """Unread notification count for the navigation badge."""
+    if current_user.is_authenticated:
+        return {'unread_notification_count': unread_counter.get(current_user.id)}
+    return {}
+
+
+@main_bp.route('/notifications')
+@login_required
+def notifications():
+    """All notifications of the current user, one keyset page at a time."""
+    page = _notifications_page()
+    return render_template('notifications.html', notifications=page.items, next_cursor=page.next_cursor)
+
+
+@main_bp.route('/api/notifications')
+@login_required
+def api_notifications():
+    """Page through the current user's notifications."""
+    page = _notifications_page()
+    return jsonify({'items': [notification.to_dict() for notification in page.items],
+                    'next_cursor': page.next_cursor})
+
+
+def _notifications_page():
+    cursor, limit = page_args()
+    try:
+        return NotificationService().get_notifications_page(current_user.id, cursor, limit)
+    except ValueError:
+        abort(400)
+
+
+@main_bp.route('/api/notifications/unread-count')
+@login_required
+def unread_count():
+    """Unread notification count for the current user."""
+    return jsonify({'unread': unread_counter.get(current_user.id)})
+
+
+@main_bp.route('/api/notifications/<notification_id>/read', methods=['POST'])
+@login_required
+def mark_notification_read(notification_id):
+    """Mark one notification as read."""
+    success = NotificationService().mark_notification_read(notification_id, current_user.id)
+    return jsonify({'success': success, 'unread': unread_counter.get(current_user.id)})
+
+
+@main_bp.route('/api/notifications/read-all', methods=['POST'])
+@login_required
+def mark_all_notifications_read():
+    """Mark all notifications of the current user as read."""
+    success = NotificationService().mark_all_read(current_user.id)
+    return jsonify({'success': success, 'unread': unread_counter.get(current_user.id)})
+
+
+@main_bp.route('/api/notify', methods=['POST'])
+@login_required
+def send_notification():
+    """Send a notification to the current user; emails are queued in the outbox."""
+    data = request.get_json(silent=True) or {}
+    message = data.get('message')
+    notification_type = data.get('type', 'email')
+    if not message:
+        return jsonify({'error': 'message is required'}), 400
+    
+    if notification_type == 'email':
+        # The notification workers deliver it
+        message_id = notification_outbox.enqueue(current_user.email, message, 'En Uygun Uçak Bileti Bildirimi')
+        return jsonify({'success': True, 'queued': message_id}), 202
+    
+    success = channel_notifications.send_notification(current_user.email, message, notification_type)
+    return jsonify({'success': success})
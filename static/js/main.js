@@ -144,6 +144,7 @@ function markNotificationAsRead(notificationId) {
             if (notificationElement) {
                 notificationElement.classList.add('notification-read');
             }
+            updateUnreadBadge(data.unread);
         }
     })
     .catch(error => {
@@ -151,6 +152,18 @@ function markNotificationAsRead(notificationId) {
     });
 }
 
+function updateUnreadBadge(count) {
+    var badge = document.getElementById('unreadNotificationBadge');
+    if (!badge || count === undefined) {
+        return;
+    }
+    if (count > 0) {
+        badge.textContent = count;
+    } else {
+        badge.remove();
+    }
+}
+
 function getCsrfToken() {
     var csrfToken = document.querySelector('meta[name="csrf-token"]');
     return csrfToken ? csrfToken.getAttribute('content') : '';
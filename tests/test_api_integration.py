@@ -0,0 +1,88 @@
+"""
+Tests for the aggregated provider search.
+"""
+
+import threading
+import time
+
+from modules.api_integration import APIManager
+from modules.data_analysis import DataAnalyzer
+from modules.flight_search import FlightSearchEngine
+from utils.http_pool import HTTPSessionPool
+from utils.search_cache import SearchCache
+
+
+class HangingPegasusManager(APIManager):
+    """Provider manager whose Pegasus calls hang until released."""
+
+    def __init__(self):
+        super().__init__()
+        self.api_keys = dict.fromkeys(self.api_keys)
+        self.provider_timeouts['pegasus'] = 0.05
+        self.release = threading.Event()
+
+    def search_pegasus_flights(self, origin, destination, departure_date, budget=None):
+        self.release.wait(5)
+        return []
+
+
+def test_slow_provider_does_not_starve_the_others():
+    """Test that hung calls of one provider only hold that provider's workers."""
+    manager = HangingPegasusManager()
+    try:
+        # More hung calls than the old shared pool had workers
+        for _ in range(3 * len(manager.api_keys)):
+            result = manager.search_all('IST', 'ESB', '2030-06-01', deadline=1)
+            assert result['status']['pegasus']['status'] == 'timeout'
+            for name in ('amadeus', 'skyscanner', 'thy'):
+                assert result['status'][name]['status'] == 'ok'
+            assert result['flights']
+            assert result['elapsed'] < 0.5
+    finally:
+        manager.release.set()
+
+
+def test_retries_fit_in_the_provider_budget():
+    """Test that every attempt and backoff of a call fit into its budget."""
+    pool = HTTPSessionPool(max_retries=2, backoff_factor=0.3)
+
+    # Three attempts plus one 0.6s backoff sleep
+    assert abs(3 * pool.attempt_timeout(8) + 0.6 - 8) < 1e-9
+    assert HTTPSessionPool(max_retries=0).attempt_timeout(8) == 8
+
+
+def test_search_engine_uses_provider_search():
+    """Test that the search engine fans out through APIManager.search_all."""
+    manager = HangingPegasusManager()
+    engine = FlightSearchEngine(cache=SearchCache(ttl=60), api_manager=manager)
+    try:
+        flights = engine.search_flights('İstanbul', 'Ankara', '2030-06-01')
+    finally:
+        manager.release.set()
+
+    assert len(flights)
+    assert set(flights.column('airline')) <= {'AMADEUS', 'SKYSCANNER', 'THY'}
+    assert set(flights.column('departure_airport')) == {'IST'}
+    assert len(DataAnalyzer().analyze_flights(flights)) == len(flights)
+
+
+def test_partial_results_are_cached_briefly():
+    """Test that a search missing a timed-out provider gets the short ttl."""
+    manager = HangingPegasusManager()
+    manager.provider_workers = 2
+    cache = SearchCache(ttl=60, stale_ttl=600)
+    cache.partial_ttl = 0.05
+    engine = FlightSearchEngine(cache=cache, api_manager=manager)
+    try:
+        engine.search_flights('İstanbul', 'Ankara', '2030-06-01')
+        engine.search_flights('İstanbul', 'Ankara', '2030-06-01')
+        time.sleep(0.1)
+        engine.search_flights('İstanbul', 'Ankara', '2030-06-01')
+    finally:
+        manager.release.set()
+
+    # Expired partial results are fetched again instead of served stale
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['stale_hits'], stats['misses']) == (1, 0, 2)
+    # The calendar never runs more dates than a provider pool has workers
+    assert engine._get_executor()._max_workers == 2
@@ -0,0 +1,63 @@
+"""
+Tests for the single-pass flight analysis.
+"""
+
+from modules.data_analysis import DataAnalyzer
+
+
+def _flights():
+    # (price, departure, airline, seats, baggage, refundable)
+    rows = [
+        (249.9, '08:15', 'THY', 40, True, True),
+        (1200, '23:10', 'AJet', 3, False, False),
+        (480, '05:40', 'Pegasus', 12, False, False),
+        (950, '22:45', 'SunExpress', 9, False, False),
+        (299, '02:30', 'AJet', 5, False, False),
+        (820, '14:45', 'Turkish', 31, True, False),
+        (505, '12:00', 'AJet', 20, False, False),
+        (1450, '04:10', 'AJet', 2, False, True),
+        (310, '23:30', 'Corendon', 8, False, False),
+        (650, '16:20', 'Pegasus', 10, False, False),
+        (875, '00:50', 'Corendon', 1, False, False),
+        (275, '09:05', 'SunExpress', 45, True, True),
+    ]
+    return [{'flight_number': f'TK{i}', 'price': price, 'departure_time': departure, 'airline': airline,
+             'available_seats': seats, 'baggage_included': baggage, 'refundable': refundable}
+            for i, (price, departure, airline, seats, baggage, refundable) in enumerate(rows)]
+
+
+# Output of the per-flight implementation analyze_flights replaced, on _flights()
+EXPECTED = [
+    ('TK0', 100, 'ucuz', '🌟 Mükemmel fiyat! Hemen rezervasyon yapın.'),
+    ('TK2', 100, 'orta', '✅ Kaliteli seçenek, önerilen uçuş.'),
+    ('TK4', 100, 'ucuz', '🌟 Mükemmel fiyat! Hemen rezervasyon yapın.'),
+    ('TK5', 100, 'orta', '✅ Kaliteli seçenek, önerilen uçuş.'),
+    ('TK6', 100, 'orta', '✅ Kaliteli seçenek, önerilen uçuş.'),
+    ('TK9', 100, 'orta', '✅ Kaliteli seçenek, önerilen uçuş.'),
+    ('TK11', 100, 'ucuz', '🌟 Mükemmel fiyat! Hemen rezervasyon yapın.'),
+    ('TK8', 95, 'ucuz', '🌟 Mükemmel fiyat! Hemen rezervasyon yapın.'),
+    ('TK3', 80, 'orta', '✅ Kaliteli seçenek, önerilen uçuş.'),
+    ('TK7', 70, 'pahalı', '👍 Makul seçenek.'),
+    ('TK1', 65, 'orta', '👍 Makul seçenek.'),
+    ('TK10', 65, 'orta', '👍 Makul seçenek.'),
+]
+
+
+def test_single_pass_matches_previous_output():
+    """Test scores, categories, recommendations and order against the old implementation."""
+    flights = _flights()
+    analyzed = DataAnalyzer().analyze_flights(flights)
+
+    assert [(f['flight_number'], f['score'], f['price_category'], f['recommendation'])
+            for f in analyzed] == EXPECTED
+    # Input flights are copied, not annotated in place
+    assert 'score' not in flights[0]
+
+
+def test_per_flight_helpers_agree_with_single_pass():
+    """Test the standalone helpers still give the same category and recommendation."""
+    analyzer = DataAnalyzer()
+    flights = _flights()
+    for flight in analyzer.analyze_flights(flights):
+        assert analyzer._categorize_price(flight['price'], flights) == flight['price_category']
+        assert analyzer._get_recommendation(flight, flights) == flight['recommendation']
@@ -0,0 +1,63 @@
+"""
+Tests for the concurrent SQLite database profile.
+"""
+
+import threading
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from app import db
+from models.models import FlightSearch, Notification, NotificationCounter, User
+from utils.notifications import NotificationService
+
+
+def test_pooled_connections_use_concurrent_pragmas(app):
+    """Test WAL and the busy timeout on every pooled connection."""
+    connections = [db.engine.connect() for _ in range(3)]
+    try:
+        for connection in connections:
+            assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert connection.execute(text('PRAGMA busy_timeout')).scalar() == 30000
+            assert connection.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+    finally:
+        for connection in connections:
+            connection.close()
+    assert db.engine.pool.size() == 10
+
+
+def test_many_threads_write_searches_and_notifications(app, test_user):
+    """Test concurrent writers wait for the lock instead of failing."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    threads, writes = 8, 25
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def writer(n):
+        with app.app_context():
+            service = NotificationService()
+            barrier.wait()
+            for i in range(writes):
+                try:
+                    db.session.add(FlightSearch(user_id=user_id, origin='IST', destination='ESB',
+                                                departure_date=date(2030, 6, 1), max_price=500 + i))
+                    db.session.commit()
+                    if not service.create_notification(user_id, f'Bildirim {n}-{i}', 'Mesaj'):
+                        errors.append(f'notification {n}-{i}')
+                    User.query.filter_by(id=user_id).update({'last_login': datetime.utcnow()})
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(str(e))
+            db.session.remove()
+
+    workers = [threading.Thread(target=writer, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    assert FlightSearch.query.filter_by(user_id=user_id).count() == threads * writes
+    assert Notification.query.filter_by(user_id=user_id).count() == threads * writes
+    assert db.session.get(NotificationCounter, user_id).unread == threads * writes
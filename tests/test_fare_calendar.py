@@ -0,0 +1,105 @@
+"""
+Tests for the flexible-date fare calendar.
+"""
+
+from datetime import date
+
+import pytest
+from modules.flight_search import FlightSearchEngine
+from utils.flight_batch import FlightBatch
+
+
+class FixedFareEngine(FlightSearchEngine):
+    """Search engine returning one known fare per route and date."""
+
+    def __init__(self, fares):
+        super().__init__()
+        self.fares = fares
+        self.searched = []
+
+    def search_flights(self, departure, destination, date, return_date=None):
+        self.searched.append((departure, destination, date))
+        price = self.fares.get((departure, date))
+        return FlightBatch.from_dicts([{'price': price}] if price is not None else [])
+
+
+FARES = {
+    ('IST', '2030-06-01'): 300, ('IST', '2030-06-02'): 200, ('IST', '2030-06-03'): 400,
+    ('ESB', '2030-06-03'): 150, ('ESB', '2030-06-04'): 100, ('ESB', '2030-06-05'): 250,
+}
+
+
+def test_date_range_validation():
+    """Test rejected date ranges and return windows."""
+    engine = FixedFareEngine(FARES)
+    engine.max_range_days = 3
+
+    with pytest.raises(ValueError):
+        engine.search_date_range('IST', 'ESB', '2030-06-03', '2030-06-01')
+    with pytest.raises(ValueError):
+        engine.search_date_range('IST', 'ESB', '2030-06-01', '2030-06-04')
+    with pytest.raises(ValueError):
+        engine.search_date_range('IST', 'ESB', '2030-06-01', '2030-06-02', (3, 1))
+    with pytest.raises(ValueError):
+        engine.search_date_range('IST', 'ESB', '2030-06-01', '2030-06-02', (-1, 2))
+    # The return window is as bounded as the departure range
+    with pytest.raises(ValueError):
+        engine.search_date_range('IST', 'ESB', '2030-06-01', '2030-06-02', (1, 4))
+    with pytest.raises(ValueError):
+        engine.search_date_range('IST', 'ESB', '2030-06-01', '2030-06-02', (10 ** 7, 10 ** 7))
+    assert engine.searched == []
+
+
+def test_one_way_fares():
+    """Test the flat fare list and the cheapest departure."""
+    engine = FixedFareEngine(FARES)
+
+    calendar = engine.search_date_range('IST', 'ESB', date(2030, 6, 1), date(2030, 6, 4))
+
+    assert calendar['departure_dates'] == ['2030-06-01', '2030-06-02', '2030-06-03', '2030-06-04']
+    assert calendar['return_dates'] == []
+    assert calendar['fares'] == [300, 200, 400, None]
+    assert calendar['cheapest'] == {'price': 200, 'departure_date': '2030-06-02', 'return_date': None}
+
+
+def test_round_trip_matrix():
+    """Test the departure x return matrix with impossible combinations as None."""
+    engine = FixedFareEngine(FARES)
+
+    calendar = engine.search_date_range('IST', 'ESB', '2030-06-01', '2030-06-02', (2, 3))
+
+    assert calendar['return_dates'] == ['2030-06-03', '2030-06-04', '2030-06-05']
+    assert calendar['fares'] == [
+        [450, 400, None],   # 06-01: stays of 2 and 3 days only
+        [None, 300, 450],   # 06-02: a 1-day stay is too short
+    ]
+    assert calendar['cheapest'] == {'price': 300, 'departure_date': '2030-06-02',
+                                    'return_date': '2030-06-04'}
+    # Each date is searched once per direction
+    assert len(engine.searched) == len(set(engine.searched)) == 5
+
+
+def test_calendar_route(client):
+    """Test the calendar endpoint of the flights blueprint."""
+    response = client.get('/flights/api/calendar?departure=İstanbul&destination=Ankara')
+    assert response.status_code == 400
+
+    response = client.get('/flights/api/calendar?departure=İstanbul&destination=Ankara'
+                          '&start=2030-06-03&end=2030-06-01')
+    assert response.status_code == 400
+
+    response = client.get('/flights/api/calendar?departure=İstanbul&destination=Ankara'
+                          '&start=2030-06-01&end=2030-06-02&min_stay=1&max_stay=2')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['departure_dates'] == ['2030-06-01', '2030-06-02']
+    assert len(data['fares']) == 2 and len(data['fares'][0]) == 3
+    assert data['cheapest']['price'] > 0
+
+    for stay in ('min_stay=1', 'max_stay=2', 'min_stay=1&max_stay=iki'):
+        response = client.get('/flights/api/calendar?departure=İstanbul&destination=Ankara'
+                              f'&start=2030-06-01&end=2030-06-02&{stay}')
+        assert response.status_code == 400
+    response = client.get('/flights/api/calendar?departure=İstanbul&destination=Ankara'
+                          '&start=2030-06-01&end=2030-06-02&min_stay=0&max_stay=100000000')
+    assert response.status_code == 400
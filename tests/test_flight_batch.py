@@ -0,0 +1,50 @@
+"""
+Tests for the columnar flight batch and batch-based analysis.
+"""
+
+from modules.data_analysis import DataAnalyzer
+from utils.flight_batch import FlightBatch
+
+
+FLIGHTS = [
+    {'flight_number': 'TK101', 'airline': 'THY', 'departure_time': '09:00', 'price': 450,
+     'available_seats': 40, 'baggage_included': True, 'refundable': False},
+    {'flight_number': 'PC202', 'airline': 'PEGASUS', 'departure_time': '23:30', 'price': 250,
+     'available_seats': 5, 'baggage_included': False, 'refundable': None},
+    {'flight_number': 'XQ303', 'airline': 'SUNEXPRESS', 'departure_time': '15:00', 'price': 950.5,
+     'available_seats': None, 'baggage_included': True, 'refundable': True},
+]
+
+
+def test_round_trip_preserves_values():
+    """Test that dicts survive encoding into columns."""
+    batch = FlightBatch.from_dicts(FLIGHTS)
+
+    assert len(batch) == 3
+    assert batch.to_dicts() == FLIGHTS
+    assert batch[1] == FLIGHTS[1]
+    assert isinstance(FlightBatch.from_dicts(FLIGHTS[:2])[0]['price'], int)
+
+
+def test_filter_and_sort_return_new_batches():
+    """Test where/sort_by without modifying the source batch."""
+    batch = FlightBatch.from_dicts(FLIGHTS)
+
+    cheap = batch.where(price <= 500 for price in batch.column('price')).sort_by('price')
+
+    assert [f['flight_number'] for f in cheap] == ['PC202', 'TK101']
+    assert batch.column('flight_number') == ['TK101', 'PC202', 'XQ303']
+    assert batch[:2].column('airline') == ['THY', 'PEGASUS']
+
+
+def test_analyze_batch_matches_dict_analysis():
+    """Test that batch analysis gives the same result as dict analysis."""
+    flights = [dict(f, available_seats=f['available_seats'] or 20) for f in FLIGHTS]
+    analyzer = DataAnalyzer()
+
+    from_dicts = analyzer.analyze_flights(flights)
+    from_batch = analyzer.analyze_flights(FlightBatch.from_dicts(flights))
+
+    assert isinstance(from_batch, FlightBatch)
+    assert from_batch.to_dicts() == from_dicts
+    assert analyzer.get_price_statistics(from_batch) == analyzer.get_price_statistics(from_dicts)
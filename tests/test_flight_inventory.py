@@ -0,0 +1,74 @@
+"""
+Tests for the fetched flight inventory upserts.
+"""
+
+from datetime import date, datetime
+
+from models.models import Flight
+from utils.flight_api import FlightAPIClient
+from utils.flight_batch import FlightBatch
+from utils.flight_inventory import FlightInventory
+from utils.search_cache import SearchCache
+
+
+def _flight(number, price, seats, hour=9):
+    return {'flight_number': number, 'airline': 'Pegasus Airlines', 'origin': 'ist', 'destination': 'ESB',
+            'departure_time': f'2030-06-01 {hour:02d}:00', 'arrival_time': f'2030-06-01 {hour + 1:02d}:10',
+            'price': price, 'currency': 'TRY', 'available_seats': seats}
+
+
+def test_upsert_inserts_then_only_touches_changed_flights(app):
+    """Test the change set and that unchanged rows keep their last_updated."""
+    inventory = FlightInventory(batch_size=2)
+
+    changes = inventory.upsert_flights(FlightBatch.from_dicts(
+        [_flight('PC100', 500, 20), _flight('PC200', 650, 8), _flight('PC300', 700, 3)]
+    ))
+    assert len(changes['inserted']) == 3
+    assert changes['updated'] == [] and changes['unchanged'] == 0
+    assert Flight.query.count() == 3
+    first_seen = {f.flight_number: f.last_updated for f in Flight.query.all()}
+
+    changes = inventory.upsert_flights([
+        _flight('PC100', 450, 20),              # price drop
+        _flight('PC200', 650, 6),               # seats sold
+        _flight('PC300', 700, 3),               # unchanged
+        _flight('PC300', 700, 3, hour=18),      # same number, later departure
+        {'flight_number': 'PC400', 'price': 1}  # incomplete
+    ])
+
+    assert [c['flight_number'] for c in changes['inserted']] == ['PC300']
+    updated = {c['flight_number']: c for c in changes['updated']}
+    assert updated['PC100']['old_price'] == 500 and updated['PC100']['price'] == 450
+    assert updated['PC200']['old_seats'] == 8 and updated['PC200']['available_seats'] == 6
+    assert changes['unchanged'] == 1
+    assert changes['skipped'] == 1
+
+    assert Flight.query.count() == 4
+    unchanged = Flight.query.filter_by(flight_number='PC300', departure_time=datetime(2030, 6, 1, 9)).one()
+    assert unchanged.last_updated == first_seen['PC300']
+    assert unchanged.origin == 'IST'
+    assert Flight.query.filter_by(flight_number='PC100').one().last_updated > first_seen['PC100']
+
+
+def test_multi_passenger_searches_store_per_seat_fares():
+    """Test that history and inventory get one seat's fare, not the party total."""
+    class Recorder:
+        def __init__(self):
+            self.prices = None
+
+        def record_flights(self, flights, departure_date=None):
+            self.prices = flights.column('price')
+
+        def upsert_flights(self, flights):
+            self.prices = flights.column('price')
+            return {'inserted': [], 'updated': [], 'unchanged': 0, 'skipped': 0}
+
+    history, inventory = Recorder(), Recorder()
+    client = FlightAPIClient(cache=SearchCache(ttl=60), history_store=history, inventory=inventory)
+
+    flights = client.search_flights('IST', 'ESB', date(2030, 6, 1), passengers=3)
+
+    per_seat = [round(price / 3, 2) for price in flights.column('price')]
+    assert history.prices == per_seat
+    assert inventory.prices == per_seat
@@ -0,0 +1,91 @@
+"""
+Tests for the in-memory notification history ring buffer.
+"""
+
+import random
+import threading
+
+from modules.notification_service import NotificationHistory
+
+
+def _entry(recipient, n):
+    return {'recipient': recipient, 'message': f'{recipient}-{n}'}
+
+
+class _ListHistory:
+    """The list-based history NotificationHistory replaced, as the reference."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = []
+
+    def append(self, entry):
+        self.entries.append(entry)
+        if len(self.entries) > self.capacity:
+            self.entries = self.entries[-self.capacity:]
+
+    def latest(self, recipient=None, limit=50):
+        history = self.entries
+        if recipient:
+            history = [n for n in history if n['recipient'] == recipient]
+        return history[-limit:] if limit else history
+
+
+def test_eviction_at_capacity_updates_the_recipient_index():
+    """Test that the oldest entry leaves both the buffer and its recipient's index."""
+    history = NotificationHistory(capacity=3)
+    for entry in [_entry('a', 0), _entry('b', 0), _entry('a', 1)]:
+        history.append(entry)
+
+    history.append(_entry('c', 0))
+    assert len(history) == 3
+    assert [e['message'] for e in history] == ['b-0', 'a-1', 'c-0']
+    assert [e['message'] for e in history.latest('a')] == ['a-1']
+
+    history.append(_entry('c', 1))
+    # b's only entry was evicted, so b drops out of the index entirely
+    assert history.latest('b') == []
+    assert 'b' not in history._by_recipient
+    assert len(history._by_recipient) == 2
+
+
+def test_latest_matches_the_list_semantics():
+    """Test recipient filters and limits against the old list implementation."""
+    rng = random.Random(15)
+    history = NotificationHistory(capacity=25)
+    reference = _ListHistory(capacity=25)
+
+    for n in range(200):
+        entry = _entry(rng.choice('abcd'), n)
+        history.append(entry)
+        reference.append(entry)
+        for recipient in (None, 'a', 'b', 'c', 'd', 'e'):
+            for limit in (None, 0, 1, 3, 50):
+                assert history.latest(recipient, limit) == reference.latest(recipient, limit)
+
+
+def test_concurrent_appends_keep_buffer_and_index_consistent():
+    """Test that parallel writers neither lose entries nor corrupt the index."""
+    history = NotificationHistory(capacity=500)
+    barrier = threading.Barrier(8)
+
+    def writer(recipient):
+        barrier.wait()
+        for n in range(200):
+            history.append(_entry(recipient, n))
+
+    threads = [threading.Thread(target=writer, args=(f'user{i}',)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    entries = history.latest(limit=None)
+    assert len(history) == len(entries) == 500
+    assert sum(len(history.latest(r, limit=None)) for r in history._by_recipient) == 500
+    for recipient in history._by_recipient:
+        messages = [e['message'] for e in history.latest(recipient, limit=None)]
+        assert messages == [e['message'] for e in entries if e['recipient'] == recipient]
+        # Each writer's surviving entries are its newest ones, in order
+        numbers = [int(m.rsplit('-', 1)[1]) for m in messages]
+        assert numbers == list(range(200 - len(numbers), 200))
@@ -0,0 +1,53 @@
+"""
+Tests for the shared notification templates.
+"""
+
+import pytest
+
+from utils.notification_templates import (DEAL_ALERT, PRICE_DROP, MessageTemplate, build_email_message,
+                                          price_drop_context)
+
+
+def test_template_defaults_and_derived_values():
+    """Test dict.get style defaults and derived fields."""
+    flight = {'origin': 'IST', 'destination': 'ESB', 'flight_number': 'TK1', 'airline': 'THY'}
+    message = PRICE_DROP.render(price_drop_context(flight, 500.0, 450.0))
+
+    assert 'İndirim: 50.00 TL (10.0%)' in message.text
+    assert message.text.endswith('Hemen rezervasyon yapmak için: N/A')
+    assert '<a href="#"' in message.html
+    deal = DEAL_ALERT.render({'valid_until': None}).text
+    assert '• Normal Fiyat: N/A TL' in deal
+    assert '• Geçerlilik: None' in deal
+
+    template = MessageTemplate('literal', subject="{{x}} {name!r}", text="{price:>8.1f}")
+    assert template.render(name='a', price=3).subject == "{x} 'a'"
+    assert template.render(name='a', price=3).text == '     3.0'
+    with pytest.raises(KeyError):
+        template.render(name='a')
+
+
+def test_render_many_formats_each_distinct_context_once():
+    """Test batch rendering reuses identical messages."""
+    flights = [{'origin': 'IST', 'destination': 'ESB', 'flight_number': f'TK{i % 3}', 'airline': 'THY'}
+               for i in range(9)]
+    contexts = [dict(price_drop_context(f, 500.0, 450.0), email=f'u{i}@example.com')
+                for i, f in enumerate(flights)]
+
+    rendered = PRICE_DROP.render_many(contexts)
+
+    assert len(rendered) == 9
+    assert len({id(message) for message in rendered}) == 3
+    assert rendered[4] == PRICE_DROP.render(contexts[4])
+
+
+def test_email_messages_do_not_share_body_parts():
+    """Test that each message gets its own MIME parts."""
+    first = build_email_message('a@example.com', 'u1@example.com', 's', 'body', '<p>body</p>')
+    second = build_email_message('a@example.com', 'u2@example.com', 's', 'body', '<p>body</p>')
+
+    first.get_payload(0)['X-Tracking'] = 'u1'
+
+    assert first.get_payload(0) is not second.get_payload(0)
+    assert second.get_payload(0)['X-Tracking'] is None
+    assert second.get_payload(1).get_payload(decode=True).decode('utf-8') == '<p>body</p>'
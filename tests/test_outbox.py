@@ -0,0 +1,262 @@
+"""
+Tests for the notification outbox, digests and pooled SMTP delivery.
+"""
+
+import smtplib
+from datetime import datetime
+
+import pytest
+
+from models.models import Notification, OutboxMessage, User
+from utils.local_smtp import LocalSMTPServer
+from utils.notification_digest import NotificationDigest
+from utils.notifications import NotificationService, build_email_message
+from utils.outbox import NotificationOutbox
+from utils.smtp_pool import SMTPConnectionPool, get_smtp_pool
+
+
+def _smtp_service(server):
+    service = NotificationService()
+    service.smtp_server, service.smtp_port = server.host, server.port
+    service.smtp_username, service.smtp_password = 'alerts@example.com', 'secret'
+    service.smtp_use_tls = False
+    return service
+
+
+def test_outbox_delivers_queued_email_over_pooled_connections(app):
+    """Test enqueue returning before delivery and the drain over SMTP."""
+    with LocalSMTPServer() as server:
+        outbox = NotificationOutbox(transport=_smtp_service(server).deliver, max_workers=2)
+        service = NotificationService(outbox=outbox)
+
+        for i in range(6):
+            assert service.queue_email_notification(f'user{i}@example.com', 'Fiyat', 'Yeni fiyat')
+        assert server.messages == []
+        assert outbox.get_stats()['queue_depth'] == 6
+
+        result = outbox.drain()
+
+        assert result['sent'] == 6
+        assert len(server.messages) == 6
+        assert server.connections <= 2
+        stats = outbox.get_stats()
+        assert stats['queue_depth'] == 0
+        assert stats['sent'] == 6
+        assert OutboxMessage.query.filter_by(status='sent').count() == 6
+
+
+def test_outbox_retries_then_dead_letters(app):
+    """Test exponential backoff scheduling and dead-lettering."""
+    attempts = []
+
+    def failing_transport(channel, recipient, subject, body, html_body):
+        attempts.append(recipient)
+        raise ConnectionError('smtp down')
+
+    outbox = NotificationOutbox(transport=failing_transport, max_attempts=3, base_delay=0)
+    message_id = outbox.enqueue('user@example.com', 'body', 'subject')
+
+    assert outbox.drain()['retried'] == 1
+    assert outbox.drain()['retried'] == 1
+    assert outbox.drain()['dead_lettered'] == 1
+    assert outbox.drain()['claimed'] == 0
+
+    message = OutboxMessage.query.get(message_id)
+    assert message.status == 'dead'
+    assert message.attempts == 3
+    assert message.last_error == 'smtp down'
+    assert len(attempts) == 3
+    assert outbox.get_stats()['dead'] == 1
+
+    outbox._transport = lambda *args: None
+    assert outbox.requeue_dead() == 1
+    assert outbox.drain()['sent'] == 1
+
+
+def test_smtp_pool_reconnects_after_server_drop():
+    """Test session reuse and reconnect after a dropped connection."""
+    with LocalSMTPServer() as server:
+        pool = SMTPConnectionPool(server.host, server.port, use_tls=False, size=1)
+        for i in range(3):
+            pool.send_message(build_email_message('a@example.com', f'u{i}@example.com', 's', 'm'))
+
+        connection = pool._idle.get()
+        connection.server.sock.shutdown(2)
+        pool._idle.put(connection)
+        pool.send_message(build_email_message('a@example.com', 'u@example.com', 's', 'm'))
+
+        stats = pool.get_stats()
+        assert stats['messages_sent'] == 4
+        assert stats['reconnects'] == 1
+        assert stats['connections_opened'] == 2
+        assert len(server.messages) == 4
+        pool.close()
+
+
+def test_expired_leases_count_as_attempts(app):
+    """Test that a message whose worker keeps dying is dead-lettered."""
+    outbox = NotificationOutbox(transport=lambda *args: None, max_attempts=3, lease=0)
+    message_id = outbox.enqueue('user@example.com', 'body', 'subject')
+
+    # Each claim is abandoned, as if the worker crashed mid-send
+    assert [row[-1] for row in outbox._claim(10, datetime.utcnow())] == [0]
+    assert [row[-1] for row in outbox._claim(10, datetime.utcnow())] == [1]
+    assert [row[-1] for row in outbox._claim(10, datetime.utcnow())] == [2]
+    assert outbox._claim(10, datetime.utcnow()) == []
+
+    message = OutboxMessage.query.get(message_id)
+    assert message.status == 'dead'
+    assert message.attempts == 3
+    assert outbox.get_stats()['dead_lettered'] == 1
+
+
+def test_claims_fit_in_one_lease():
+    """Test that a batch is never larger than the workers can send before the lease expires."""
+    assert NotificationOutbox(max_workers=4, batch_size=100, lease=300, send_timeout=30).claim_size == 20
+    assert NotificationOutbox(max_workers=4, batch_size=10, lease=300, send_timeout=30).claim_size == 10
+    assert NotificationOutbox(max_workers=2, batch_size=100, lease=30, send_timeout=30).claim_size == 1
+
+
+def test_price_drops_are_coalesced_into_one_digest(app, test_user):
+    """Test one notification row and one email per user and window."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    outbox = NotificationOutbox(transport=lambda *args: None)
+    digest = NotificationDigest(window=3600, emit=NotificationService(outbox=outbox).send_price_drop_digests)
+    service = NotificationService(outbox=outbox, digest=digest)
+
+    for i, (old_price, new_price) in enumerate([(500, 450), (900, 600), (700, 690)]):
+        flight = {'flight_number': f'TK{i}', 'airline': 'Turkish Airlines', 'origin': 'IST',
+                  'destination': 'ESB', 'booking_url': None}
+        assert service.notify_price_drop(user_id, flight, old_price, new_price)
+
+    assert digest.pending() == 3
+    assert Notification.query.count() == 0
+
+    assert digest.flush() == 1
+
+    notification = Notification.query.one()
+    assert notification.title == '3 Uçuşta Fiyat Düşüşü!'
+    assert notification.message.index('TK1') < notification.message.index('TK0') < notification.message.index('TK2')
+    assert OutboxMessage.query.count() == 1
+    assert digest.get_stats()['coalesced'] == 2
+
+
+def test_digest_notifications_roll_back_with_their_emails(app, test_user, monkeypatch):
+    """Test that a digest whose email cannot be queued leaves no in-app notification behind."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    outbox = NotificationOutbox(transport=lambda *args: None)
+    monkeypatch.setattr(outbox, 'enqueue_many', lambda *args, **kwargs: 1 / 0)
+    drop = {'flight_info': {'flight_number': 'TK9', 'airline': 'Turkish Airlines', 'origin': 'IST',
+                            'destination': 'AYT'}, 'old_price': 600, 'new_price': 400}
+
+    with pytest.raises(ZeroDivisionError):
+        NotificationService(outbox=outbox).send_price_drop_digests([(user_id, [drop])])
+
+    assert Notification.query.count() == 0
+    assert OutboxMessage.query.count() == 0
+
+
+def test_buffered_digest_survives_a_restart(app, test_user):
+    """Test that a digest buffered by one process is delivered by the next one."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    flight = {'flight_number': 'PC1', 'airline': 'Pegasus', 'origin': 'SAW', 'destination': 'ADB'}
+    NotificationDigest(window=3600, emit=lambda batches: None).add(
+        user_id, {'flight_info': flight, 'old_price': 800, 'new_price': 650})
+
+    emitted = []
+    restarted = NotificationDigest(window=3600, emit=emitted.extend)
+    assert restarted.pending() == 1
+    assert restarted.flush(due_only=True) == 0
+
+    assert restarted.flush() == 1
+    assert emitted == [(user_id, [{'flight_info': flight, 'old_price': 800, 'new_price': 650}])]
+    assert restarted.pending() == 0
+
+
+def test_bulk_notifications_commit_per_chunk(app, test_user):
+    """Test executemany inserts in chunked transactions."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    service = NotificationService()
+
+    result = service.create_notifications_bulk(
+        ({'user_id': user_id, 'title': f'Bildirim {i}', 'message': 'Mesaj'} for i in range(5)),
+        chunk_size=2
+    )
+
+    assert result == {'created': 5, 'failed': 0, 'chunks': 3}
+    assert Notification.query.filter_by(user_id=user_id, type='info').count() == 5
+    assert len({n.id for n in Notification.query.all()}) == 5
+
+
+def test_flight_reminders_share_one_transaction(app, test_user):
+    """Test that reminders go through the bulk path with their queued emails."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    outbox = NotificationOutbox(transport=lambda *args: None)
+    service = NotificationService(outbox=outbox)
+    flight = {'flight_number': 'TK7', 'airline': 'Turkish Airlines', 'origin': 'IST', 'destination': 'ESB',
+              'departure_time': '09:00'}
+
+    result = service.send_flight_reminders([(user_id, flight), (user_id, dict(flight, flight_number='TK8')),
+                                            ('missing-user', flight)])
+
+    assert result == {'created': 2, 'queued': 2}
+    assert Notification.query.filter_by(user_id=user_id).count() == 2
+    assert service.get_unread_count(user_id) == 2
+    assert service.notify_flight_reminder('missing-user', flight) is False
+
+
+def test_smtp_pool_keeps_session_after_rejected_message():
+    """Test a 451 reply failing the message without a reconnect."""
+    with LocalSMTPServer(failure_rate=1.0) as server:
+        pool = SMTPConnectionPool(server.host, server.port, use_tls=False, size=1)
+        for i in range(2):
+            with pytest.raises(smtplib.SMTPDataError):
+                pool.send_message(build_email_message('a@example.com', f'u{i}@example.com', 's', 'm'))
+
+        stats = pool.get_stats()
+        assert stats['send_failures'] == 2
+        assert stats['reconnects'] == 0
+        assert server.connections == 1
+        assert server.messages == []
+        pool.close()
+
+
+def test_smtp_pool_keeps_session_after_refused_recipient():
+    """Test a refused recipient failing the message without a reconnect."""
+    with LocalSMTPServer(rejected_recipients=['gone@example.com']) as server:
+        pool = SMTPConnectionPool(server.host, server.port, use_tls=False, size=1)
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            pool.send_message(build_email_message('a@example.com', 'gone@example.com', 's', 'm'))
+        pool.send_message(build_email_message('a@example.com', 'u@example.com', 's', 'm'))
+
+        stats = pool.get_stats()
+        assert stats['send_failures'] == 1
+        assert stats['reconnects'] == 0
+        assert server.connections == 1
+        assert len(server.messages) == 1
+        pool.close()
+
+
+def test_replaced_smtp_pool_is_closed():
+    """Test that a password change closes the sessions of the old pool."""
+    with LocalSMTPServer() as server:
+        old = get_smtp_pool(server.host, server.port, None, 'old-secret', use_tls=False)
+        old.send_message(build_email_message('a@example.com', 'u@example.com', 's', 'm'))
+        new = get_smtp_pool(server.host, server.port, None, 'new-secret', use_tls=False)
+
+        assert new is not old
+        assert old.get_stats()['idle_connections'] == 0
+        assert old.get_stats()['connections_closed'] == 1
+        new.close()
+
+
+def test_notify_endpoint_queues_email(app, client, test_user):
+    """Test that /api/notify enqueues emails instead of sending them inline."""
+    client.post('/auth/login', data={'email': 'test@example.com', 'password': 'TestPassword123!'})
+
+    response = client.post('/api/notify', json={'message': 'Fiyat düştü'})
+
+    assert response.status_code == 202
+    message = OutboxMessage.query.get(response.get_json()['queued'])
+    assert (message.recipient, message.body, message.status) == ('test@example.com', 'Fiyat düştü', 'pending')
+    assert client.post('/api/notify', json={'type': 'email'}).status_code == 400
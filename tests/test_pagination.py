@@ -0,0 +1,65 @@
+"""
+Tests for keyset pagination of saved searches and notifications.
+"""
+
+from datetime import date, datetime, timedelta
+
+from app import db
+from models.models import FlightSearch, Notification, User
+from utils.notifications import NotificationService
+
+
+def _login(client):
+    client.post('/auth/login', data={'email': 'test@example.com', 'password': 'TestPassword123!'})
+
+
+def test_notification_pages_follow_cursor_without_gaps(app, client, test_user):
+    """Test JSON pages across rows sharing a created_at and inserts between pages."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    base = datetime(2020, 6, 1, 12)
+    # Two rows per timestamp, so the id decides their order
+    db.session.add_all([Notification(user_id=user_id, title=f'Bildirim {i}', message='Mesaj',
+                                     created_at=base + timedelta(minutes=i // 2)) for i in range(7)])
+    db.session.commit()
+    expected = [n.id for n in Notification.query.order_by(Notification.created_at.desc(),
+                                                          Notification.id.desc())]
+    _login(client)
+
+    seen, cursor = [], None
+    while True:
+        data = client.get('/api/notifications', query_string={'limit': 3, 'cursor': cursor or ''}).get_json()
+        seen.extend(item['id'] for item in data['items'])
+        cursor = data['next_cursor']
+        if len(seen) == 3:
+            # A new notification must not shift the following pages
+            NotificationService().create_notification(user_id, 'Yeni', 'Mesaj')
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert client.get('/api/notifications', query_string={'cursor': 'bozuk'}).status_code == 400
+
+    page = NotificationService().get_notifications_page(user_id, limit=5)
+    assert len(page.items) == 5 and page.has_more
+
+
+def test_my_searches_html_and_json_pages(app, client, test_user):
+    """Test the 'Daha Fazla' link and the JSON listing of saved searches."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    db.session.add_all([FlightSearch(user_id=user_id, origin='IST', destination=f'X{i:02d}',
+                                     departure_date=date(2030, 6, 1),
+                                     created_at=datetime(2030, 1, 1) + timedelta(hours=i)) for i in range(25)])
+    db.session.commit()
+    _login(client)
+
+    html = client.get('/flights/my-searches').get_data(as_text=True)
+    assert 'IST → X24' in html and 'IST → X05' in html and 'IST → X04' not in html
+    assert 'Daha Fazla' in html
+
+    first = client.get('/flights/api/my-searches', query_string={'limit': 20}).get_json()
+    second = client.get('/flights/api/my-searches', query_string={'cursor': first['next_cursor']}).get_json()
+    assert [s['destination'] for s in second['items']] == ['X04', 'X03', 'X02', 'X01', 'X00']
+    assert second['next_cursor'] is None
+
+    html = client.get('/flights/my-searches', query_string={'cursor': first['next_cursor']}).get_data(as_text=True)
+    assert 'IST → X04' in html and 'Daha Fazla' not in html
@@ -0,0 +1,92 @@
+"""
+Tests for pooled password hashing and rehash on login.
+"""
+
+import hashlib
+
+import pytest
+from app import db
+from models.models import User
+from modules.user_management import UserManager
+from utils.passwords import PasswordHasher, PasswordHasherBusy, password_hasher
+
+
+def test_process_pool_hashes_and_flags_outdated_parameters():
+    """Test hashing in worker processes and the rehash check."""
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=2, executor='process')
+    try:
+        password_hash = hasher.hash('Sifre123!')
+        assert password_hash.startswith('pbkdf2:sha256:1000$')
+        assert hasher.verify(password_hash, 'Sifre123!')
+        assert not hasher.verify(password_hash, 'yanlis')
+        assert not hasher.needs_rehash(password_hash)
+
+        stronger = PasswordHasher(method='pbkdf2:sha256:2000', executor='inline')
+        valid, new_hash = stronger.verify_and_update(password_hash, 'Sifre123!')
+        assert valid and new_hash.startswith('pbkdf2:sha256:2000$')
+        assert stronger.verify_and_update(new_hash, 'Sifre123!') == (True, None)
+    finally:
+        hasher.close()
+
+
+def test_login_rehashes_when_work_factor_changes(app, client, test_user, monkeypatch):
+    """Test the stored hash is upgraded transparently on the next login."""
+    old_hash = User.query.filter_by(email='test@example.com').first().password_hash
+    monkeypatch.setattr(password_hasher, 'method', 'pbkdf2:sha256:1000')
+    monkeypatch.setattr(password_hasher, '_method_prefix', None)
+
+    response = client.post('/auth/login', data={'email': 'test@example.com', 'password': 'TestPassword123!'})
+    assert response.status_code == 302
+
+    db.session.expire_all()
+    new_hash = User.query.filter_by(email='test@example.com').first().password_hash
+    assert new_hash != old_hash
+    assert new_hash.startswith('pbkdf2:sha256:1000$')
+
+
+def test_legacy_sha256_hashes_are_upgraded_on_login():
+    """Test unsalted SHA-256 hashes of the in-memory user store still log in once."""
+    manager = UserManager(None)
+    manager.create_user('eski@example.com', 'secret1', 'Eski Kullanıcı')
+    user = manager.get_user_by_email('eski@example.com')
+    assert '$' in user.password_hash
+
+    user.password_hash = hashlib.sha256(b'secret1').hexdigest()
+    assert manager.authenticate_user('eski@example.com', 'secret1')[0]
+    assert not password_hasher.needs_rehash(user.password_hash)
+    assert manager.authenticate_user('eski@example.com', 'secret1')[0]
+    assert not manager.authenticate_user('eski@example.com', 'yanlis')[0]
+
+
+def test_database_users_do_not_accept_unsalted_hashes(app, test_user):
+    """Test that the SHA-256 fallback is limited to the in-memory user store."""
+    user = User.query.filter_by(email='test@example.com').first()
+    user.password_hash = hashlib.sha256(b'TestPassword123!').hexdigest()
+
+    assert not user.check_password('TestPassword123!')
+
+
+def test_saturated_pool_fails_fast():
+    """Test the hash timeout and the bound on pending hashes."""
+    hasher = PasswordHasher(method='pbkdf2:sha256:4000000', workers=1, executor='thread',
+                            timeout=0.05, max_pending=1)
+    try:
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash('Sifre123!')
+        # The timed-out hash still holds the only slot
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash('Sifre123!')
+    finally:
+        hasher.close()
+
+
+def test_login_reports_busy_hasher_as_retryable(app, client, test_user, monkeypatch):
+    """Test a saturated hasher fails the login with a retry message instead of a 500."""
+    def busy(*args):
+        raise PasswordHasherBusy('test')
+    monkeypatch.setattr(password_hasher, 'verify_and_update', busy)
+
+    response = client.post('/auth/login', data={'email': 'test@example.com', 'password': 'TestPassword123!'})
+
+    assert response.status_code == 503
+    assert 'tekrar deneyin' in response.get_data(as_text=True)
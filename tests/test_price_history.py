@@ -0,0 +1,69 @@
+"""
+Tests for the persistent price history store.
+"""
+
+import time
+from datetime import date, datetime
+
+from app import db
+from models.models import PriceObservation, PriceRollup
+from utils.flight_batch import FlightBatch
+from utils.price_history import PriceHistoryStore
+
+
+def _flights(*prices):
+    return FlightBatch.from_dicts([
+        {'flight_number': f'TK{i}', 'airline': 'Turkish Airlines', 'origin': 'IST',
+         'destination': 'ESB', 'departure_time': '2030-06-01 09:00', 'price': price,
+         'currency': 'TRY'}
+        for i, price in enumerate(prices)
+    ])
+
+
+def test_observations_are_written_in_batches(app):
+    """Test buffering until the batch size is reached."""
+    store = PriceHistoryStore(batch_size=4, flush_interval=3600)
+
+    store.record_flights(_flights(500, 450))
+    assert store.pending() == 2
+    assert PriceObservation.query.count() == 0
+
+    store.record_flights(_flights(700, 300))
+    assert store.pending() == 0
+    assert PriceObservation.query.count() == 4
+
+
+def test_hourly_rollups_and_range_queries(app):
+    """Test hourly min/avg rollups across flushes."""
+    store = PriceHistoryStore(batch_size=100, flush_interval=3600)
+    departure = date(2030, 6, 1)
+
+    store.record_flights(_flights(500, 400), observed_at=datetime(2030, 5, 1, 10, 5))
+    store.flush()
+    store.record_flights(_flights(300), observed_at=datetime(2030, 5, 1, 10, 45))
+    store.record_flights(_flights(600), observed_at=datetime(2030, 5, 1, 11, 15))
+
+    series = store.get_price_series('ist', 'esb', departure)
+    assert [point['hour'] for point in series] == ['2030-05-01T10:00:00', '2030-05-01T11:00:00']
+    assert series[0]['min_price'] == 300
+    assert series[0]['avg_price'] == 400
+    assert series[0]['samples'] == 3
+    assert PriceRollup.query.count() == 2
+
+    observations = store.get_observations('IST', 'ESB', departure, start=datetime(2030, 5, 1, 10, 30))
+    assert [o.price for o in observations] == [300, 600]
+    assert store.get_lowest_price('IST', 'ESB', departure, since=datetime(2030, 5, 1, 11)) == 600
+
+
+def test_buffered_observations_are_flushed_in_the_background(app):
+    """Test that a partial batch is written after flush_interval without another call."""
+    store = PriceHistoryStore(app=app, batch_size=100, flush_interval=0.1)
+    store.record_flights(_flights(500, 450))
+
+    deadline = time.time() + 3
+    while PriceObservation.query.count() < 2 and time.time() < deadline:
+        # End the read transaction to see what the flusher committed
+        db.session.rollback()
+        time.sleep(0.02)
+    assert PriceObservation.query.count() == 2
+    assert store.pending() == 0
@@ -0,0 +1,145 @@
+"""
+Tests for the batched price watch engine.
+"""
+
+from datetime import date, timedelta
+
+from app import db
+from models.models import FlightSearch, User, WatchChange
+from utils.flight_batch import FlightBatch
+from utils.price_index import PriceThresholdIndex, watch_key
+from utils.price_watch import PriceWatchEngine
+
+
+class StubAPIClient:
+    """Returns fixed flights and counts provider fetches."""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+
+    def search_flights(self, origin, destination, departure_date, return_date=None, passengers=1):
+        self.calls.append((origin, destination, departure_date, passengers))
+        return FlightBatch.from_dicts([
+            {'flight_number': f'XX{i}', 'airline': airline, 'origin': origin, 'destination': destination,
+             'price': price, 'booking_url': None}
+            for i, (airline, price) in enumerate(self.prices)
+        ])
+
+
+class StubNotificationService:
+    def __init__(self):
+        self.sent = []
+
+    def notify_price_drop(self, user_id, flight_info, old_price, new_price):
+        self.sent.append((user_id, flight_info['flight_number'], old_price, new_price))
+
+
+def _watch(**kwargs):
+    # The fixture user is detached from the test session, so look it up again
+    user = User.query.filter_by(email='test@example.com').first()
+    values = dict(user_id=user.id, origin='IST', destination='ESB',
+                  departure_date=date.today() + timedelta(days=10), passenger_count=1)
+    values.update(kwargs)
+    return FlightSearch(**values)
+
+
+def test_watches_share_one_fetch_per_search_key(app, test_user):
+    """Test grouping and threshold/airline matching."""
+    db.session.add_all([
+        _watch(max_price=500),
+        _watch(max_price=300),
+        _watch(max_price=900, airline_preference='pegasus'),
+        _watch(max_price=900, is_active=False),
+        _watch(destination='AYT', max_price=900),
+    ])
+    db.session.commit()
+
+    api_client = StubAPIClient([('Turkish Airlines', 450), ('Pegasus Airlines', 600)])
+    notifications = StubNotificationService()
+    engine = PriceWatchEngine(api_client=api_client, notification_service=notifications,
+                              index=PriceThresholdIndex())
+
+    stats = engine.run_cycle()
+
+    assert stats['watches'] == 4
+    assert stats['groups'] == 2
+    assert len(api_client.calls) == 2
+    assert sorted(n[1:] for n in notifications.sent) == [('XX0', 500, 450), ('XX0', 900, 450), ('XX1', 900, 600)]
+
+
+def test_watch_only_renotifies_on_further_drop(app, test_user):
+    """Test that an unchanged price does not notify twice."""
+    db.session.add(_watch(max_price=500))
+    db.session.commit()
+
+    api_client = StubAPIClient([('Turkish Airlines', 450)])
+    notifications = StubNotificationService()
+    engine = PriceWatchEngine(api_client=api_client, notification_service=notifications,
+                              index=PriceThresholdIndex())
+
+    engine.run_cycle()
+    engine.run_cycle()
+    api_client.prices = [('Turkish Airlines', 400)]
+    engine.run_cycle()
+
+    assert [n[2:] for n in notifications.sent] == [(500, 450), (450, 400)]
+
+
+def test_threshold_index_matches_and_updates_incrementally(app, test_user):
+    """Test bisect matching and incremental upsert/remove."""
+    searches = [_watch(max_price=price) for price in (300, 500, 700)] + [_watch()]
+    db.session.add_all(searches)
+    db.session.commit()
+
+    index = PriceThresholdIndex()
+    index.load()
+    key = watch_key('ist', 'esb', searches[0].departure_date)
+
+    assert [w.max_price for w in index.match(key, 450)] == [500, 700, None]
+    assert [w.max_price for w in index.match(key, 800)] == [None]
+
+    searches[2].is_active = False
+    searches[0].max_price = 600
+    db.session.commit()
+    index.upsert(searches[2])
+    index.upsert(searches[0])
+    index.remove(searches[3].id)
+
+    assert [w.max_price for w in index.match(key, 450)] == [500, 600]
+    assert index.match(watch_key('IST', 'AYT', searches[0].departure_date), 100) == []
+    assert len(index) == 2
+
+
+def test_engine_applies_changes_from_the_web_process(app, client, test_user):
+    """Test that blueprint changes reach the engine's index without a full reload."""
+    search = _watch(max_price=500)
+    db.session.add(search)
+    db.session.commit()
+    search_id = search.id
+
+    engine = PriceWatchEngine(api_client=StubAPIClient([('Turkish Airlines', 450)]),
+                              notification_service=StubNotificationService(),
+                              index=PriceThresholdIndex(), reload_interval=3600)
+    assert engine.run_cycle()['watches'] == 1
+    loaded_at = engine.index.loaded_at
+
+    client.post('/auth/login', data={'email': 'test@example.com', 'password': 'TestPassword123!'})
+    client.get(f'/flights/toggle-search/{search_id}')
+    assert engine.run_cycle()['watches'] == 0
+
+    client.get(f'/flights/toggle-search/{search_id}')
+    assert engine.run_cycle()['watches'] == 1
+    client.get(f'/flights/delete-search/{search_id}')
+    assert engine.run_cycle()['watches'] == 0
+    assert engine.index.loaded_at == loaded_at
+
+
+def test_only_notification_enabled_searches_are_logged(app, test_user):
+    """Test that ad-hoc searches without notifications do not touch the change log."""
+    watched, ad_hoc = _watch(max_price=500), _watch(notification_enabled=False)
+    db.session.add_all([watched, ad_hoc])
+    PriceThresholdIndex.mark_changed(watched, ad_hoc)
+    db.session.commit()
+
+    assert [change.search_id for change in WatchChange.query.all()] == [watched.id]
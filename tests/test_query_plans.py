@@ -0,0 +1,112 @@
+"""
+Query plan checks for the hot dashboard, search and notification queries.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import Index, inspect, text, tuple_
+
+from app import db
+from models.models import Flight, FlightSearch, Notification, ensure_indexes
+from utils.pagination import decode_cursor, encode_cursor
+
+
+def _plan(query):
+    """EXPLAIN QUERY PLAN details of an ORM query on SQLite."""
+    statement = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {statement}')).all()
+    return ' | '.join(row[-1] for row in rows)
+
+
+def test_hot_queries_use_composite_indexes(app):
+    """Test the dashboard, my_searches, notification and route queries avoid table scans."""
+    user_id = 'user-1'
+    plans = {
+        'ix_flight_searches_user_active_created': [
+            FlightSearch.query.filter_by(user_id=user_id, is_active=True)
+                              .order_by(FlightSearch.created_at.desc()).limit(5),
+        ],
+        'ix_flight_searches_user_created_id': [
+            FlightSearch.query.filter_by(user_id=user_id).order_by(FlightSearch.created_at.desc()),
+        ],
+        'ix_notifications_user_read_created': [
+            Notification.query.filter_by(user_id=user_id, is_read=False)
+                              .order_by(Notification.created_at.desc()).limit(10),
+        ],
+        'ix_notifications_user_created_id': [
+            Notification.query.filter_by(user_id=user_id).order_by(Notification.created_at.desc()).limit(10),
+        ],
+        'ix_flights_route_departure': [
+            Flight.query.filter(Flight.origin == 'IST', Flight.destination == 'ESB',
+                                Flight.departure_time >= datetime(2030, 6, 1),
+                                Flight.departure_time < datetime(2030, 6, 1) + timedelta(days=1)),
+        ],
+    }
+
+    for index_name, queries in plans.items():
+        for query in queries:
+            plan = _plan(query)
+            assert f'USING INDEX {index_name}' in plan, plan
+
+    # Both the filter and the ORDER BY are served by the index on the dashboard
+    dashboard = _plan(FlightSearch.query.filter_by(user_id=user_id, is_active=True)
+                                        .order_by(FlightSearch.created_at.desc()).limit(5))
+    assert 'TEMP B-TREE' not in dashboard, dashboard
+
+
+def test_keyset_pages_are_index_range_scans(app):
+    """Test a deep page seeks into the index instead of sorting or skipping rows."""
+    cursor = encode_cursor(datetime(2030, 6, 1), 'b6f1c3a0-0000-0000-0000-000000000000')
+    for model, index_name in [(FlightSearch, 'ix_flight_searches_user_created_id'),
+                              (Notification, 'ix_notifications_user_created_id')]:
+        query = model.query.filter_by(user_id='user-1').filter(
+            tuple_(model.created_at, model.id) < tuple_(*decode_cursor(cursor))
+        ).order_by(model.created_at.desc(), model.id.desc()).limit(21)
+        plan = _plan(query)
+        assert f'USING INDEX {index_name} (user_id=? AND (created_at,id)<(?,?))' in plan, plan
+        assert 'TEMP B-TREE' not in plan, plan
+
+
+def test_ensure_indexes_adds_missing_indexes_to_existing_tables(app):
+    """Test databases created before the indexes existed are migrated."""
+    db.session.execute(text('DROP INDEX ix_notifications_user_read_created'))
+    db.session.commit()
+
+    assert ensure_indexes() == ['ix_notifications_user_read_created']
+    assert ensure_indexes() == []
+    plan = _plan(Notification.query.filter_by(user_id='user-1', is_read=False))
+    assert 'USING INDEX ix_notifications_user_read_created' in plan, plan
+
+
+def test_ensure_indexes_tolerates_a_concurrent_worker(app, monkeypatch):
+    """Test that an index another worker creates first does not fail startup."""
+    db.session.execute(text('DROP INDEX ix_notifications_user_read_created'))
+    db.session.commit()
+    create = Index.create
+
+    def racing_create(index, bind, checkfirst=False):
+        # The other worker wins between the existence check and CREATE INDEX
+        create(index, bind)
+        create(index, bind)
+    monkeypatch.setattr(Index, 'create', racing_create)
+
+    assert ensure_indexes() == []
+    assert 'ix_notifications_user_read_created' in {
+        index['name'] for index in inspect(db.engine).get_indexes('notifications')}
+
+
+def test_ensure_indexes_removes_duplicate_flights(app):
+    """Test that older databases with repeated flights still get the unique index."""
+    db.session.execute(text('DROP INDEX uq_flights_number_departure'))
+    departure = datetime(2030, 6, 1, 9, 0)
+    flights = [Flight(flight_number='TK2120', airline='Turkish Airlines', origin='IST', destination='ESB',
+                      departure_time=departure, arrival_time=departure + timedelta(hours=1),
+                      price=price, last_updated=datetime(2030, 5, day))
+               for day, price in ((1, 500), (3, 450), (2, 480))]
+    flights.append(Flight(flight_number='PC2010', airline='Pegasus Airlines', origin='SAW', destination='ESB',
+                          departure_time=departure, arrival_time=departure + timedelta(hours=1), price=300))
+    db.session.add_all(flights)
+    db.session.commit()
+
+    assert ensure_indexes() == ['uq_flights_number_departure']
+    assert sorted(flight.price for flight in Flight.query.all()) == [300, 450]
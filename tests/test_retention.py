@@ -0,0 +1,78 @@
+"""
+Tests for the chunked retention and archival job.
+"""
+
+import gzip
+import json
+import os
+from datetime import date, datetime, timedelta
+
+from app import db
+from models.models import Flight, FlightSearch, Notification, User, WatchChange
+from utils.price_index import PriceThresholdIndex
+from utils.retention import RetentionJob
+from utils.unread_counter import unread_counter
+
+
+def test_retention_deletes_in_chunks_and_fixes_unread_counters(app, test_user, tmp_path):
+    """Test the per-table policies, archiving and the unread counter."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    now = datetime(2030, 6, 1, 12)
+    old, recent = now - timedelta(days=400), now - timedelta(days=1)
+
+    for i, departure in enumerate([now - timedelta(days=40)] * 3 + [now + timedelta(days=5)]):
+        db.session.add(Flight(flight_number=f'TK{i}', airline='Turkish Airlines', origin='IST', destination='ESB',
+                              departure_time=departure, arrival_time=departure + timedelta(hours=1), price=500))
+    for departure_date in [date(2030, 1, 1), date(2030, 7, 1)]:
+        db.session.add(FlightSearch(user_id=user_id, origin='IST', destination='ESB', departure_date=departure_date))
+    for created_at, is_read in [(old, True), (old, False), (old, False), (now - timedelta(days=100), True),
+                                (recent, True), (recent, False)]:
+        db.session.add(Notification(user_id=user_id, title='Bildirim', message='Mesaj',
+                                    is_read=is_read, created_at=created_at))
+    db.session.commit()
+    assert unread_counter.rebuild(user_id) == 3
+
+    job = RetentionJob(chunk_size=2, archive_dir=str(tmp_path))
+    assert job.run(now=now, dry_run=True) == {'flights': {'due': 3}, 'flight_searches': {'due': 1},
+                                              'notifications': {'due': 4}}
+
+    report = job.run(now=now)
+
+    assert report['flights']['processed'] == 3
+    assert report['flights']['chunks'] == 2
+    assert report['flight_searches']['processed'] == 1
+    assert report['notifications']['processed'] == 4
+    assert report['notifications']['archived'] == 4
+    assert report['notifications']['per_second'] > 0
+
+    assert Flight.query.count() == 1
+    assert FlightSearch.query.one().departure_date == date(2030, 7, 1)
+    assert Notification.query.count() == 2
+    assert unread_counter.get(user_id) == 1
+
+    archive = next(name for name in os.listdir(tmp_path) if name.startswith('notifications-'))
+    with gzip.open(tmp_path / archive, 'rt', encoding='utf-8') as archive_file:
+        rows = [json.loads(line) for line in archive_file]
+    assert len(rows) == 4
+    assert {row['user_id'] for row in rows} == {user_id}
+
+    assert all(result['processed'] == 0 for result in job.run(now=now).values())
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_purged_searches_leave_the_price_watch_index(app, test_user):
+    """Test that searches removed by retention are logged for the watch indexes."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    for notification_enabled in (True, True, False):
+        db.session.add(FlightSearch(user_id=user_id, origin='IST', destination='ESB', max_price=500,
+                                    departure_date=date(2030, 1, 1), notification_enabled=notification_enabled))
+    db.session.commit()
+    index = PriceThresholdIndex()
+    index.load()
+    assert len(index) == 2
+
+    RetentionJob(chunk_size=1).run(tables=['flight_searches'], now=datetime(2030, 6, 1))
+
+    assert WatchChange.query.count() == 2
+    assert index.apply_changes() == 2
+    assert len(index) == 0
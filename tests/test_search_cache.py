@@ -0,0 +1,136 @@
+"""
+Tests for the search result cache and request coalescing.
+"""
+
+import threading
+import time
+from datetime import date
+
+import pytest
+from utils.search_cache import SearchCache, make_search_key
+from utils.single_flight import SingleFlight
+
+
+def test_search_key_normalization():
+    """Test that equivalent searches map to the same key."""
+    assert make_search_key(' ist', 'esb ', date(2030, 5, 1)) == \
+        make_search_key('IST', 'ESB', '2030-05-01', None, 1)
+    assert make_search_key('IST', 'ESB', '2030-05-01', passengers=2) != \
+        make_search_key('IST', 'ESB', '2030-05-01')
+
+
+def test_cache_hit_and_lru_eviction():
+    """Test fresh hits and least recently used eviction."""
+    cache = SearchCache(ttl=60, stale_ttl=0, max_size=2)
+    calls = []
+
+    def fetch(value):
+        calls.append(value)
+        return value
+
+    assert cache.get_or_fetch('a', lambda: fetch('A')) == 'A'
+    assert cache.get_or_fetch('a', lambda: fetch('A2')) == 'A'
+    cache.get_or_fetch('b', lambda: fetch('B'))
+    cache.get_or_fetch('a', lambda: fetch('A3'))  # 'a' becomes most recent
+    cache.get_or_fetch('c', lambda: fetch('C'))   # evicts 'b'
+
+    assert calls == ['A', 'B', 'C']
+    assert cache.get('b') is None
+    stats = cache.get_stats()
+    assert stats['hits'] == 2
+    assert stats['evictions'] == 1
+
+
+def test_stale_entry_is_served_while_refreshing():
+    """Test stale-while-revalidate behaviour."""
+    cache = SearchCache(ttl=0.05, stale_ttl=60, max_size=10)
+    cache.get_or_fetch('route', lambda: 'old')
+    time.sleep(0.1)
+
+    assert cache.get_or_fetch('route', lambda: 'new') == 'old'
+
+    deadline = time.time() + 2
+    while cache.get_stats()['refreshes'] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    assert cache.get_or_fetch('route', lambda: 'newer') == 'new'
+
+
+def test_concurrent_misses_share_one_fetch():
+    """Test that identical concurrent searches trigger one upstream call."""
+    cache = SearchCache(ttl=60)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return ['flight']
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch('k', fetch)))
+               for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [['flight']] * 10
+
+
+def test_single_flight_propagates_errors_and_timeouts():
+    """Test error propagation and waiter timeouts."""
+    group = SingleFlight()
+    started = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError('provider down')
+
+    def call():
+        try:
+            group.do('key', failing)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2
+
+    started.clear()
+    release = threading.Event()
+    slow = threading.Thread(target=lambda: group.do('slow', lambda: started.set() or release.wait(5)))
+    slow.start()
+    started.wait()
+    try:
+        with pytest.raises(TimeoutError):
+            group.do('slow', lambda: None, timeout=0.05)
+    finally:
+        release.set()
+        slow.join()
+
+
+def test_search_clients_keep_separate_entries():
+    """Test that the engine and the API client do not serve each other's results."""
+    from modules.data_analysis import DataAnalyzer
+    from modules.flight_search import FlightSearchEngine
+    from utils.flight_api import FlightAPIClient
+
+    cache = SearchCache(ttl=60)
+    engine = FlightSearchEngine(cache=cache)
+    client = FlightAPIClient(cache=cache)
+
+    api_flights = client.search_flights('IST', 'ESB', date(2030, 6, 1))
+    engine_flights = engine.search_flights('İstanbul', 'Ankara', '2030-06-01')
+
+    assert len(api_flights) and len(engine_flights)
+    assert engine_flights is not api_flights
+    assert all(len(value) == 5 for value in engine_flights.column('departure_time'))
+    assert len(DataAnalyzer().analyze_flights(engine_flights)) == len(engine_flights)
+    assert client.search_flights('IST', 'ESB', date(2030, 6, 1)) is api_flights
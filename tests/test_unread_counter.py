@@ -0,0 +1,50 @@
+"""
+Tests for the materialized unread notification counters.
+"""
+
+from app import db
+from models.models import Notification, NotificationCounter, User
+from utils.notifications import NotificationService
+from utils.unread_counter import UnreadCounterCache, unread_counter
+
+
+def test_counter_follows_create_read_and_read_all(app, test_user):
+    """Test counter maintenance on every write path."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    service = NotificationService()
+
+    service.create_notification(user_id, 'Tek', 'Mesaj')
+    service.create_notifications_bulk({'user_id': user_id, 'title': f'B{i}', 'message': 'M'} for i in range(4))
+    assert service.get_unread_count(user_id) == 5
+    assert db.session.get(NotificationCounter, user_id).unread == 5
+
+    notification = Notification.query.filter_by(user_id=user_id).first()
+    assert service.mark_notification_read(notification.id, user_id)
+    assert service.mark_notification_read(notification.id, user_id)
+    assert service.get_unread_count(user_id) == 4
+
+    assert service.mark_all_read(user_id)
+    assert service.get_unread_count(user_id) == 0
+    unread_counter.invalidate()
+
+
+def test_counter_is_seeded_from_existing_rows_and_cached(app, test_user):
+    """Test read-only counts for users without a counter row, seeding on write and TTL caching."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    db.session.add_all([Notification(user_id=user_id, title=f'Eski {i}', message='M') for i in range(3)])
+    db.session.commit()
+
+    cache = UnreadCounterCache(ttl=60)
+    assert cache.get(user_id) == 3
+    # Reading never writes, so a page render does not commit the request session
+    assert db.session.get(NotificationCounter, user_id) is None
+    assert not db.session.new and not db.session.dirty
+
+    db.session.add_all([Notification(user_id=user_id, title=f'Yeni {i}', message='M') for i in range(2)])
+    NotificationCounter.adjust(user_id, 2)
+    db.session.commit()
+    assert db.session.get(NotificationCounter, user_id).unread == 5
+    assert cache.get(user_id) == 3
+    cache.invalidate(user_id)
+    assert cache.get(user_id) == 5
+    assert cache.get_stats()['hits'] == 1
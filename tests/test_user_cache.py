@@ -0,0 +1,49 @@
+"""
+Tests for the cached user loader.
+"""
+
+from app import db
+from models.models import User
+from utils.user_cache import UserCache, user_cache
+
+
+def test_cached_user_is_attached_per_request_and_invalidated_on_change(app, test_user):
+    """Test hits without a query, fresh instances per context and commit invalidation."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    cache = UserCache(ttl=60)
+    db.session.remove()
+
+    assert cache.get(user_id).first_name == 'Test'
+    db.session.remove()
+
+    with app.app_context():
+        user = cache.get(user_id)
+        assert cache.get_stats()['hits'] == 1
+        assert user in db.session
+        assert user.get_full_name() == 'Test User'
+        # A cached user can be modified and committed like a loaded one
+        user.first_name = 'Yeni'
+        db.session.commit()
+        db.session.remove()
+
+    assert cache.get_stats()['size'] == 1
+    assert user_cache.get(user_id).first_name == 'Yeni'
+
+
+def test_user_loader_uses_cache_and_sees_deactivation(app, test_user):
+    """Test the login manager loader and activation changes."""
+    user_id = User.query.filter_by(email='test@example.com').first().id
+    load_user = app.login_manager._user_callback
+    user_cache.invalidate()
+    hits = user_cache.get_stats()['hits']
+
+    for _ in range(3):
+        assert load_user(user_id).email == 'test@example.com'
+    assert user_cache.get_stats()['hits'] == hits + 2
+    assert load_user('missing') is None
+
+    user = User.query.get(user_id)
+    user.is_active = False
+    db.session.commit()
+    assert user_id not in user_cache._entries
+    assert load_user(user_id).is_active is False
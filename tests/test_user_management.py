@@ -0,0 +1,24 @@
+"""
+Tests for the in-memory user store.
+"""
+
+from modules.user_management import UserManager
+
+
+def test_email_change_moves_the_user_in_the_index():
+    """Test that update_user re-keys the email index and rejects taken addresses."""
+    manager = UserManager(None)
+    manager.create_user('eski@example.com', 'secret1', 'Ayşe')
+    manager.create_user('diger@example.com', 'secret1', 'Mehmet')
+    user = manager.get_user_by_email('eski@example.com')
+
+    assert manager.update_user('eski@example.com', email='diger@example.com')[0] is False
+    assert manager.update_user('eski@example.com', email='gecersiz')[0] is False
+    assert manager.get_user_by_email('eski@example.com') is user
+
+    assert manager.update_user('eski@example.com', email='yeni@example.com', name='Ayşe Y.')[0]
+    assert manager.get_user_by_email('eski@example.com') is None
+    assert manager.get_user_by_email('yeni@example.com') is user
+    assert user.email == 'yeni@example.com' and user.name == 'Ayşe Y.'
+    assert manager.get_user_by_id(user.get_id()) is user
+    assert manager.authenticate_user('yeni@example.com', 'secret1')[0]
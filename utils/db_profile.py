@@ -0,0 +1,83 @@
+"""
+Database connection profiles for concurrent request and worker threads.
+Implements MYK Level 5 data storage standards.
+"""
+
+import os
+import logging
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+
+# Per-connection SQLite pragmas. 'concurrent' lets readers run alongside the
+# single writer (WAL), makes writers wait for the lock instead of failing
+# with "database is locked", and trades fsyncs per commit for fsyncs per
+# checkpoint, which WAL keeps crash safe.
+SQLITE_PROFILES = {
+    'concurrent': {
+        'journal_mode': 'WAL',
+        'busy_timeout': 30000,
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,   # KiB, i.e. 64 MiB per connection
+        'mmap_size': 268435456,
+        'temp_store': 'MEMORY'
+    },
+    'stock': {}
+}
+
+logger = logging.getLogger(__name__)
+
+
+def configure_database(app) -> Dict:
+    """Set engine options and SQLite pragmas for the DATABASE_PROFILE; call before db.init_app.
+
+    Every pragma can be overridden with SQLITE_<PRAGMA> (e.g. SQLITE_BUSY_TIMEOUT=5000)
+    and pool sizing with DB_POOL_SIZE, DB_MAX_OVERFLOW and DB_POOL_TIMEOUT.
+    """
+    profile = os.getenv('DATABASE_PROFILE', 'concurrent')
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown DATABASE_PROFILE: {profile}")
+
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    pragmas = {}
+
+    in_memory = url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+    if profile != 'stock' and not in_memory:
+        # In-memory SQLite uses a single static connection, so there is no pool to size
+        options.setdefault('pool_size', int(os.getenv('DB_POOL_SIZE', '10')))
+        options.setdefault('max_overflow', int(os.getenv('DB_MAX_OVERFLOW', '20')))
+        options.setdefault('pool_timeout', float(os.getenv('DB_POOL_TIMEOUT', '30')))
+
+    if url.get_backend_name() == 'sqlite':
+        for name, value in SQLITE_PROFILES[profile].items():
+            pragmas[name] = os.getenv(f'SQLITE_{name.upper()}', value)
+        if in_memory:
+            pragmas.pop('journal_mode', None)
+            pragmas.pop('mmap_size', None)
+        if 'busy_timeout' in pragmas:
+            # The driver waits as well, so lock waits also cover BEGIN and COMMIT
+            connect_args = options.setdefault('connect_args', {})
+            connect_args.setdefault('timeout', int(pragmas['busy_timeout']) / 1000)
+
+    app.config['SQLITE_PRAGMAS'] = pragmas
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Dict):
+    """Run the pragmas on every new pooled connection of engine."""
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    logger.debug(f"SQLite pragmas for {engine.url}: {pragmas}")
@@ -9,44 +9,103 @@ from datetime import datetime, date
 import logging
 from typing import List, Dict, Optional
 
+from utils.flight_batch import FlightBatch
+from utils.http_pool import get_session
+from utils.search_cache import search_cache, make_search_key
+
 
 class FlightAPIClient:
     """Client for fetching flight data from external APIs."""
     
-    def __init__(self):
+    def __init__(self, cache=None, history_store=None, inventory=None):
         self.api_key = os.getenv('FLIGHT_API_KEY')
         self.base_url = os.getenv('FLIGHT_API_URL', 'https://api.aviationstack.com/v1')
         self.timeout = 30
+        self.session = get_session(self.base_url)
+        self.cache = cache if cache is not None else search_cache
+        self.history_store = history_store
+        self.inventory = inventory
         self.logger = logging.getLogger(__name__)
     
     def search_flights(self, origin: str, destination: str, departure_date: date, 
-                      return_date: Optional[date] = None, passengers: int = 1) -> List[Dict]:
+                      return_date: Optional[date] = None, passengers: int = 1) -> FlightBatch:
         """Search for flights based on criteria."""
         try:
-            # For demo purposes, return mock data since we don't have a real API key
-            return self._get_mock_flight_data(origin, destination, departure_date, return_date, passengers)
-            
-            # Real API implementation would be:
-            # params = {
-            #     'access_key': self.api_key,
-            #     'dep_iata': origin,
-            #     'arr_iata': destination,
-            #     'flight_date': departure_date.strftime('%Y-%m-%d'),
-            #     'limit': 100
-            # }
-            # 
-            # response = requests.get(f"{self.base_url}/flights", params=params, timeout=self.timeout)
-            # response.raise_for_status()
-            # 
-            # data = response.json()
-            # return self._parse_flight_data(data.get('data', []))
+            key = make_search_key(origin, destination, departure_date, return_date, passengers,
+                                  source='api')
+            return self.cache.get_or_fetch(
+                key,
+                lambda: self._fetch_flights(origin, destination, departure_date, return_date, passengers)
+            )
             
         except requests.RequestException as e:
             self.logger.error(f"API request failed: {e}")
-            return []
+            return FlightBatch()
         except Exception as e:
             self.logger.error(f"Flight search error: {e}")
-            return []
+            return FlightBatch()
+    
+    def _fetch_flights(self, origin: str, destination: str, departure_date: date,
+                       return_date: Optional[date] = None, passengers: int = 1) -> FlightBatch:
+        """Fetch flights from the provider, bypassing the cache."""
+        # For demo purposes, return mock data since we don't have a real API key
+        flights = FlightBatch.from_dicts(
+            self._get_mock_flight_data(origin, destination, departure_date, return_date, passengers)
+        )
+        # History and inventory hold per-seat fares whatever the party size
+        per_seat = self._per_seat(flights, passengers)
+        self._record_prices(per_seat, departure_date)
+        self._store_inventory(per_seat)
+        return flights
+        
+        # Real API implementation would be:
+        # params = {
+        #     'access_key': self.api_key,
+        #     'dep_iata': origin,
+        #     'arr_iata': destination,
+        #     'flight_date': departure_date.strftime('%Y-%m-%d'),
+        #     'limit': 100
+        # }
+        # 
+        # response = self.session.get(f"{self.base_url}/flights", params=params, timeout=self.timeout)
+        # response.raise_for_status()
+        # 
+        # data = response.json()
+        # flights = FlightBatch.from_dicts(self._parse_flight_data(data.get('data', [])))
+        # per_seat = self._per_seat(flights, passengers)
+        # self._record_prices(per_seat, departure_date)
+        # self._store_inventory(per_seat)
+        # return flights
+    
+    @staticmethod
+    def _per_seat(flights: FlightBatch, passengers: int) -> FlightBatch:
+        """Flights priced for one seat; search prices cover every passenger."""
+        if not passengers or passengers <= 1 or not len(flights) or 'price' not in flights.columns:
+            return flights
+        return flights.with_columns(price=[
+            round(price / passengers, 2) if price is not None else None
+            for price in flights.column('price')
+        ])
+    
+    def _record_prices(self, flights: FlightBatch, departure_date: date):
+        """Record freshly fetched prices; cache hits are not observations."""
+        if self.history_store is None:
+            return
+        try:
+            self.history_store.record_flights(flights, departure_date=departure_date)
+        except Exception as e:
+            self.logger.warning(f"Failed to record price history: {e}")
+    
+    def _store_inventory(self, flights: FlightBatch):
+        """Upsert freshly fetched flights into the local inventory."""
+        if self.inventory is None:
+            return
+        try:
+            changes = self.inventory.upsert_flights(flights)
+            self.logger.debug(f"Inventory: {len(changes['inserted'])} inserted, "
+                              f"{len(changes['updated'])} updated, {changes['unchanged']} unchanged")
+        except Exception as e:
+            self.logger.warning(f"Failed to update flight inventory: {e}")
     
     def _get_mock_flight_data(self, origin: str, destination: str, departure_date: date, 
                              return_date: Optional[date], passengers: int) -> List[Dict]:
@@ -0,0 +1,232 @@
+"""
+Columnar container for flight search results.
+Implements MYK Level 5 data modeling standards.
+"""
+
+import math
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+
+# Column kinds: 'number' -> array('d'), 'bool' -> array('b'),
+# 'code' -> array('I') of indexes into a table of interned values,
+# anything else -> plain list.
+FLIGHT_SCHEMA = {
+    'price': 'number',
+    'score': 'number',
+    'available_seats': 'number',
+    'baggage_included': 'bool',
+    'refundable': 'bool',
+    'airline': 'code',
+    'origin': 'code',
+    'destination': 'code',
+    'departure_airport': 'code',
+    'destination_airport': 'code',
+    'departure_time': 'code',
+    'arrival_time': 'code',
+    'duration': 'code',
+    'currency': 'code',
+    'aircraft_type': 'code',
+    'source': 'code',
+    'price_category': 'code',
+    'recommendation': 'code'
+}
+
+
+class _Column:
+    """A single encoded column. Treated as immutable once built."""
+
+    __slots__ = ('kind', 'data', 'table', 'integral')
+
+    def __init__(self, kind: str, data, table: Optional[List] = None, integral: bool = False):
+        self.kind = kind
+        self.data = data
+        self.table = table
+        self.integral = integral
+
+    @classmethod
+    def encode(cls, kind: str, values: Iterable) -> '_Column':
+        if kind == 'number':
+            data = array('d')
+            integral = True
+            for value in values:
+                if value is None:
+                    data.append(math.nan)
+                    continue
+                if integral and not isinstance(value, int):
+                    integral = False
+                data.append(value)
+            return cls(kind, data, integral=integral)
+
+        if kind == 'bool':
+            return cls(kind, array('b', (-1 if v is None else int(bool(v)) for v in values)))
+
+        if kind == 'code':
+            table = []
+            index = {}
+            data = array('I')
+            for value in values:
+                code = index.get(value)
+                if code is None:
+                    code = len(table)
+                    index[value] = code
+                    table.append(sys.intern(value) if isinstance(value, str) else value)
+                data.append(code)
+            return cls(kind, data, table=table)
+
+        return cls(kind, list(values))
+
+    def get(self, i: int) -> Any:
+        value = self.data[i]
+        if self.kind == 'number':
+            if value != value:  # NaN marks a missing value
+                return None
+            return int(value) if self.integral else value
+        if self.kind == 'bool':
+            return None if value < 0 else bool(value)
+        if self.kind == 'code':
+            return self.table[value]
+        return value
+
+    def values(self) -> List:
+        if self.kind == 'code':
+            table = self.table
+            return [table[code] for code in self.data]
+        if self.kind == 'object':
+            return list(self.data)
+        return [self.get(i) for i in range(len(self.data))]
+
+    def take(self, indices: Sequence[int]) -> '_Column':
+        data = self.data
+        if isinstance(data, array):
+            taken = array(data.typecode, [data[i] for i in indices])
+        else:
+            taken = [data[i] for i in indices]
+        return _Column(self.kind, taken, table=self.table, integral=self.integral)
+
+
+class FlightBatch:
+    """Compact columnar result set of flights.
+
+    Numeric and boolean fields live in typed arrays and repeated strings such
+    as airline and airport codes are stored once per batch. Batches are never
+    modified in place: filtering, sorting and adding columns return new
+    batches that share unchanged columns. Iterating or indexing yields plain
+    dicts, so templates and JSON responses can consume a batch directly or via
+    ``to_dicts()``. Keys missing from an input row come back as None.
+    """
+
+    __slots__ = ('_columns', '_length')
+
+    def __init__(self, columns: Optional[Dict[str, _Column]] = None, length: int = 0):
+        self._columns = columns or {}
+        self._length = length
+
+    @classmethod
+    def from_dicts(cls, rows: Iterable[Dict], schema: Optional[Dict[str, str]] = None) -> 'FlightBatch':
+        """Build a batch from per-flight dicts."""
+        schema = FLIGHT_SCHEMA if schema is None else schema
+        rows = rows if isinstance(rows, list) else list(rows)
+
+        names = {}
+        for row in rows:
+            for name in row:
+                names.setdefault(name, None)
+
+        columns = {
+            name: _Column.encode(schema.get(name, 'object'), (row.get(name) for row in rows))
+            for name in names
+        }
+        return cls(columns, len(rows))
+
+    @classmethod
+    def concat(cls, batches: Iterable['FlightBatch']) -> 'FlightBatch':
+        """Join several batches into one."""
+        rows = []
+        for batch in batches:
+            rows.extend(batch)
+        return cls.from_dicts(rows)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, name: str) -> List:
+        """Decoded values of a column; None for every row if absent."""
+        column = self._columns.get(name)
+        if column is None:
+            return [None] * self._length
+        return column.values()
+
+    def row(self, i: int) -> Dict:
+        """Materialize a single flight as a dict."""
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError('FlightBatch index out of range')
+        return {name: column.get(i) for name, column in self._columns.items()}
+
+    def to_dicts(self) -> List[Dict]:
+        """Materialize every flight as a dict (JSON/template boundary)."""
+        names = list(self._columns)
+        value_lists = [self._columns[name].values() for name in names]
+        return [dict(zip(names, values)) for values in zip(*value_lists)] if names else \
+            [{} for _ in range(self._length)]
+
+    def take(self, indices: Sequence[int]) -> 'FlightBatch':
+        """New batch with the rows at the given positions, in that order."""
+        indices = list(indices)
+        return FlightBatch({name: column.take(indices) for name, column in self._columns.items()},
+                           len(indices))
+
+    def where(self, mask: Iterable[bool]) -> 'FlightBatch':
+        """New batch with the rows whose mask value is true."""
+        return self.take([i for i, keep in enumerate(mask) if keep])
+
+    def sort_by(self, name: str, reverse: bool = False) -> 'FlightBatch':
+        """New batch sorted by a column; missing values sort last."""
+        column = self._columns.get(name)
+        if column is None:
+            return self
+        if column.kind == 'number':
+            data = column.data
+            missing = -math.inf if reverse else math.inf
+            keys = [missing if v != v else v for v in data]
+        else:
+            keys = column.values()
+        order = sorted(range(self._length), key=keys.__getitem__, reverse=reverse)
+        return self.take(order)
+
+    def with_columns(self, schema: Optional[Dict[str, str]] = None, **values: Sequence) -> 'FlightBatch':
+        """New batch with added or replaced columns; other columns are shared."""
+        schema = FLIGHT_SCHEMA if schema is None else schema
+        columns = dict(self._columns)
+        for name, column_values in values.items():
+            if len(column_values) != self._length:
+                raise ValueError(f"Column {name} has {len(column_values)} values, expected {self._length}")
+            columns[name] = _Column.encode(schema.get(name, 'object'), column_values)
+        return FlightBatch(columns, self._length)
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the column buffers."""
+        total = 0
+        for column in self._columns.values():
+            data = column.data
+            total += data.itemsize * len(data) if isinstance(data, array) else sys.getsizeof(data)
+        return total
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self._length):
+            yield self.row(i)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.take(range(*key.indices(self._length)))
+        return self.row(key)
+
+    def __repr__(self):
+        return f'<FlightBatch {self._length} flights, {len(self._columns)} columns>'
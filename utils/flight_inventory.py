@@ -0,0 +1,175 @@
+"""
+Local flight inventory kept in sync with fetched search results.
+Implements MYK Level 5 data storage standards.
+"""
+
+import os
+import logging
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from models.models import Flight
+
+
+class FlightInventory:
+    """Bulk upserts fetched flights into the Flight table.
+
+    Flights are keyed on (flight_number, departure_time). Each batch looks up
+    the existing rows with one query, inserts the new flights with one
+    executemany INSERT and updates only the rows whose price or seat count
+    changed; unchanged rows are not written at all. The returned change set
+    lists what was inserted and updated, old and new values included.
+    """
+
+    # Keys per IN query, well below SQLite's bound parameter limit
+    LOOKUP_CHUNK = 200
+
+    REQUIRED_FIELDS = ('flight_number', 'airline', 'origin', 'destination',
+                       'departure_time', 'arrival_time', 'price')
+
+    def __init__(self, app=None, batch_size: Optional[int] = None):
+        self.app = app
+        self.batch_size = batch_size or int(os.getenv('FLIGHT_INVENTORY_BATCH_SIZE', '500'))
+        self.logger = logging.getLogger(__name__)
+
+    def init_app(self, app):
+        """Bind the inventory to an application so background refreshes can write."""
+        self.app = app
+
+    def upsert_flights(self, flights: Iterable[Dict]) -> Dict:
+        """Insert new flights and update changed ones; return the change set.
+
+        Accepts a FlightBatch or any iterable of flight dicts. Rows missing
+        a required field or with an unparseable time are skipped.
+        """
+        rows = {}
+        skipped = 0
+        for flight in flights:
+            row = self._to_row(flight)
+            if row is None:
+                skipped += 1
+                continue
+            # The last occurrence of a flight in the input wins
+            rows[(row['flight_number'], row['departure_time'])] = row
+
+        changes = {'inserted': [], 'updated': [], 'unchanged': 0, 'skipped': skipped}
+        keys = list(rows)
+        with self._app_context():
+            for i in range(0, len(keys), self.batch_size):
+                batch = {key: rows[key] for key in keys[i:i + self.batch_size]}
+                for name, value in self._write(batch).items():
+                    changes[name] += value
+        return changes
+
+    def _write(self, batch: Dict[tuple, Dict]) -> Dict:
+        for attempt in range(2):
+            try:
+                changes = self._apply(batch)
+                db.session.commit()
+                return changes
+            except IntegrityError:
+                # Another writer inserted one of these flights first; retry once
+                db.session.rollback()
+                if attempt:
+                    raise
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def _apply(self, batch: Dict[tuple, Dict]) -> Dict:
+        existing = self._lookup(list(batch))
+        now = datetime.utcnow()
+        inserts, updates = [], []
+        changes = {'inserted': [], 'updated': [], 'unchanged': 0}
+
+        for key, row in batch.items():
+            current = existing.get(key)
+            if current is None:
+                inserts.append(dict(row, last_updated=now))
+                changes['inserted'].append(self._change(row))
+                continue
+
+            flight_id, old_price, old_seats = current
+            if old_price == row['price'] and old_seats == row['available_seats']:
+                changes['unchanged'] += 1
+                continue
+
+            updates.append({'id': flight_id, 'price': row['price'],
+                            'available_seats': row['available_seats'], 'last_updated': now})
+            change = self._change(row)
+            change.update(old_price=old_price, old_seats=old_seats)
+            changes['updated'].append(change)
+
+        if inserts:
+            db.session.execute(insert(Flight), inserts)
+        if updates:
+            # Bulk UPDATE by primary key, one executemany statement
+            db.session.execute(update(Flight), updates)
+        return changes
+
+    def _lookup(self, keys: List[tuple]) -> Dict[tuple, tuple]:
+        """(flight_number, departure_time) -> (id, price, available_seats) of stored flights."""
+        columns = tuple_(Flight.flight_number, Flight.departure_time)
+        existing = {}
+        for i in range(0, len(keys), self.LOOKUP_CHUNK):
+            chunk = keys[i:i + self.LOOKUP_CHUNK]
+            for flight_id, flight_number, departure_time, price, seats in db.session.query(
+                    Flight.id, Flight.flight_number, Flight.departure_time, Flight.price,
+                    Flight.available_seats).filter(columns.in_(chunk)):
+                existing[(flight_number, departure_time)] = (flight_id, price, seats)
+        return existing
+
+    def _to_row(self, flight: Dict) -> Optional[Dict]:
+        if any(flight.get(name) in (None, '') for name in self.REQUIRED_FIELDS):
+            return None
+        departure_time = self._to_datetime(flight['departure_time'])
+        arrival_time = self._to_datetime(flight['arrival_time'])
+        if departure_time is None or arrival_time is None:
+            return None
+
+        seats = flight.get('available_seats')
+        currency = flight.get('currency')
+        return {
+            'flight_number': flight['flight_number'],
+            'airline': flight['airline'],
+            'origin': flight['origin'].upper(),
+            'destination': flight['destination'].upper(),
+            'departure_time': departure_time,
+            'arrival_time': arrival_time,
+            'price': float(flight['price']),
+            'currency': 'TRY' if currency in (None, 'TL') else currency,
+            'available_seats': int(seats) if seats is not None else None,
+            'booking_url': flight.get('booking_url')
+        }
+
+    @staticmethod
+    def _change(row: Dict) -> Dict:
+        return {
+            'flight_number': row['flight_number'],
+            'departure_time': row['departure_time'],
+            'origin': row['origin'],
+            'destination': row['destination'],
+            'price': row['price'],
+            'available_seats': row['available_seats']
+        }
+
+    @staticmethod
+    def _to_datetime(value) -> Optional[datetime]:
+        if isinstance(value, datetime):
+            return value
+        try:
+            return datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+
+    def _app_context(self):
+        return self.app.app_context() if self.app is not None else nullcontext()
+
+
+# Shared by the request handlers in the process
+flight_inventory = FlightInventory()
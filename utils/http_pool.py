@@ -0,0 +1,121 @@
+"""
+Shared HTTP connection pool for outbound flight API calls.
+Implements MYK Level 5 API integration standards.
+"""
+
+import os
+import threading
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class HTTPSessionPool:
+    """Process-wide registry of keep-alive sessions, one per provider host."""
+
+    def __init__(self, pool_size: Optional[int] = None, max_retries: Optional[int] = None,
+                 backoff_factor: float = 0.3):
+        self.pool_size = pool_size or int(os.getenv('HTTP_POOL_SIZE', '10'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('HTTP_MAX_RETRIES', '2'))
+        self.backoff_factor = backoff_factor
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def get_session(self, url: str) -> requests.Session:
+        """Return the shared session for the host of the given URL."""
+        host = self._host_key(url)
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._create_session()
+                self._sessions[host] = session
+                self.logger.debug(f"Created HTTP session for {host}")
+            return session
+
+    def _create_session(self) -> requests.Session:
+        """Create a session with a tuned, retrying connection pool."""
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+            # A provider's Retry-After could outlast the caller's budget
+            respect_retry_after_header=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+            pool_block=False
+        )
+
+        session = requests.Session()
+        session.headers.update({'Connection': 'keep-alive'})
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def attempt_timeout(self, budget: float) -> float:
+        """Per-attempt timeout that fits every retry and its backoff into budget seconds."""
+        backoff = sum(min(self.backoff_factor * 2 ** (errors - 1), Retry.DEFAULT_BACKOFF_MAX)
+                      for errors in range(2, self.max_retries + 1))
+        return max(0.1, (budget - backoff) / (self.max_retries + 1))
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Get per-host request and connection reuse counters."""
+        with self._lock:
+            sessions = dict(self._sessions)
+
+        stats = {}
+        for host, session in sessions.items():
+            requests_sent = 0
+            connections_opened = 0
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+                    requests_sent += pool.num_requests
+                    connections_opened += pool.num_connections
+
+            stats[host] = {
+                'requests': requests_sent,
+                'connections': connections_opened,
+                'reused': max(0, requests_sent - connections_opened),
+                'reuse_ratio': round(1 - connections_opened / requests_sent, 3) if requests_sent else 0.0
+            }
+
+        return stats
+
+    def close(self):
+        """Close all pooled sessions."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+
+        for session in sessions:
+            session.close()
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}" if parts.netloc else url
+
+
+# Shared by every API client in the process
+http_pool = HTTPSessionPool()
+
+
+def get_session(url: str) -> requests.Session:
+    """Return the process-wide pooled session for a provider URL."""
+    return http_pool.get_session(url)
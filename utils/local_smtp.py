@@ -0,0 +1,142 @@
+"""
+In-process SMTP server used as a stand-in for tests and benchmarks.
+Implements MYK Level 5 notification standards.
+"""
+
+import random
+import socketserver
+import threading
+import time
+from typing import Iterable, List, Optional
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough SMTP for smtplib: HELO/EHLO, AUTH, MAIL, RCPT, DATA, RSET, NOOP, QUIT."""
+
+    def handle(self):
+        server: LocalSMTPServer = self.server.owner
+        server._connection_opened()
+        self._reply('220 localhost LocalSMTPServer ready')
+        sender, recipients = None, []
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+
+            if verb == 'EHLO':
+                self._reply('250-localhost', '250-8BITMIME', '250 AUTH PLAIN')
+            elif verb == 'HELO':
+                self._reply('250 localhost')
+            elif verb == 'AUTH':
+                # Any credentials are accepted
+                self._reply('235 Authentication successful')
+            elif verb == 'MAIL':
+                sender, recipients = command.split(':', 1)[1].strip(), []
+                self._reply('250 OK')
+            elif verb == 'RCPT':
+                recipient = command.split(':', 1)[1].strip().strip('<>')
+                if recipient in server.rejected_recipients:
+                    self._reply('550 No such user')
+                else:
+                    recipients.append(recipient)
+                    self._reply('250 OK')
+            elif verb == 'DATA':
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                data = self._read_data()
+                if server.latency:
+                    time.sleep(server.latency)
+                if server._should_fail():
+                    self._reply('451 Temporary local failure')
+                else:
+                    server._store(sender, recipients, data)
+                    self._reply('250 OK')
+                sender, recipients = None, []
+            elif verb == 'RSET':
+                sender, recipients = None, []
+                self._reply('250 OK')
+            elif verb == 'NOOP':
+                self._reply('250 OK')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('502 Command not implemented')
+
+    def _read_data(self) -> bytes:
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b'.\r\n', b'.\n'):
+                break
+            lines.append(line[1:] if line.startswith(b'..') else line)
+        return b''.join(lines)
+
+    def _reply(self, *lines: str):
+        self.wfile.write(''.join(f'{line}\r\n' for line in lines).encode('utf-8'))
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalSMTPServer:
+    """Threaded SMTP sink on localhost with optional latency and failures.
+
+    ``latency`` seconds are added to every DATA command and ``failure_rate``
+    of the messages are answered with a temporary 451 error. RCPT commands
+    for ``rejected_recipients`` get a permanent 550. Accepted messages are
+    kept in ``messages`` as (sender, recipients, data).
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 failure_rate: float = 0.0, seed: Optional[int] = None,
+                 rejected_recipients: Iterable[str] = ()):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rejected_recipients = set(rejected_recipients)
+        self.messages: List[tuple] = []
+        self.connections = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _ThreadingTCPServer((host, port), _SMTPHandler)
+        self._server.owner = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def host(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> 'LocalSMTPServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='local-smtp', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _connection_opened(self):
+        with self._lock:
+            self.connections += 1
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self.failure_rate > 0 and self._random.random() < self.failure_rate
+
+    def _store(self, sender, recipients, data):
+        with self._lock:
+            self.messages.append((sender, recipients, data))
@@ -0,0 +1,180 @@
+"""
+Per-user coalescing of price drop notifications into digests.
+Implements MYK Level 5 notification standards.
+"""
+
+import os
+import json
+import threading
+import logging
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from app import db
+from models.models import DigestItem
+
+
+class NotificationDigest:
+    """Buffers notifications per user and emits them as one digest.
+
+    The first item for a user opens a window of ``window`` seconds; every
+    item added before it closes joins the same digest. Buffered items are
+    rows in ``notification_digest_items``, so a crash or deploy delays a
+    digest instead of losing it: whichever process flushes next (the
+    background thread here or ``flask notification-worker``) delivers it.
+    All closed windows are handed to ``emit([(user_id, items), ...])`` in
+    one call, so a fare sale touching many watched routes produces one email
+    and one in-app notification per user, written in bulk. A window of 0
+    emits every item at once.
+    """
+
+    def __init__(self, app=None, window: Optional[float] = None, emit: Optional[Callable] = None,
+                 max_items: int = 50):
+        self.app = app
+        self.window = window if window is not None else float(os.getenv('NOTIFICATION_DIGEST_WINDOW', '300'))
+        self.max_items = max_items
+        self.retry_delay = min(self.window, 30)
+        self._emit = emit
+        # Earliest window this process knows to close, for the flusher to wake up at
+        self._next_due: Optional[datetime] = None
+        self._condition = threading.Condition()
+        self._flusher: Optional[threading.Thread] = None
+        self._stats = {'items': 0, 'digests': 0, 'emit_errors': 0}
+        self.logger = logging.getLogger(__name__)
+
+    def init_app(self, app):
+        """Bind the digest to an application."""
+        self.app = app
+
+    @property
+    def emit(self) -> Callable:
+        if self._emit is None:
+            from utils.notifications import NotificationService
+            self._emit = NotificationService(digest=self).send_price_drop_digests
+        return self._emit
+
+    def add(self, user_id: str, item: dict):
+        """Buffer an item for user_id until its window closes."""
+        with self._condition:
+            self._stats['items'] += 1
+        if self.window <= 0:
+            with self._app_context():
+                self._deliver([(user_id, [item])])
+            return
+
+        with self._app_context():
+            try:
+                deliver_after = (db.session.query(func.min(DigestItem.deliver_after))
+                                 .filter(DigestItem.user_id == user_id).scalar()
+                                 or datetime.utcnow() + timedelta(seconds=self.window))
+                db.session.add(DigestItem(user_id=user_id, payload=json.dumps(item, default=str),
+                                          deliver_after=deliver_after))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+            full = DigestItem.query.filter_by(user_id=user_id).count() >= self.max_items
+
+        self._schedule(deliver_after)
+        if full:
+            self.flush(user_id)
+
+    def flush(self, user_id: Optional[str] = None, due_only: bool = False) -> int:
+        """Emit buffered digests (one user, all users, or only closed windows)."""
+        with self._app_context():
+            query = DigestItem.query
+            if user_id is not None:
+                query = query.filter(DigestItem.user_id == user_id)
+            if due_only:
+                query = query.filter(DigestItem.deliver_after <= datetime.utcnow())
+            rows = query.order_by(DigestItem.user_id, DigestItem.id).all()
+            if not rows:
+                return 0
+
+            # Removed in the transaction that writes the digests, so an item is
+            # either still buffered or delivered; a short count means another
+            # process claimed some of these rows first
+            ids = [row.id for row in rows]
+            deleted = DigestItem.query.filter(DigestItem.id.in_(ids)).delete(synchronize_session=False)
+            if deleted != len(ids):
+                db.session.rollback()
+                return 0
+
+            batches = [(u, [json.loads(row.payload) for row in group])
+                       for u, group in groupby(rows, key=lambda row: row.user_id)]
+            if not self._deliver(batches):
+                return 0
+        return len(batches)
+
+    def pending(self) -> int:
+        """Number of buffered items."""
+        with self._app_context():
+            return DigestItem.query.count()
+
+    def get_stats(self) -> Dict:
+        """Get buffered item and digest counters."""
+        with self._condition:
+            stats = dict(self._stats)
+        with self._app_context():
+            stats['pending_users'] = db.session.query(func.count(func.distinct(DigestItem.user_id))).scalar()
+            stats['pending_items'] = DigestItem.query.count()
+        # Emails avoided compared to one email per item
+        stats['coalesced'] = max(0, stats['items'] - stats['digests'] - stats['pending_items'])
+        return stats
+
+    def _deliver(self, batches: List[Tuple[str, List[dict]]]) -> bool:
+        # Called inside the app context whose session holds the claimed rows
+        try:
+            self.emit(batches)
+            db.session.commit()
+            with self._condition:
+                self._stats['digests'] += len(batches)
+            return True
+        except Exception as e:
+            # Buffered rows are restored and retried on the next flush
+            db.session.rollback()
+            with self._condition:
+                self._stats['emit_errors'] += 1
+            self.logger.error(f"Failed to emit {len(batches)} digests: {e}")
+            return False
+
+    def _schedule(self, deliver_after: datetime):
+        with self._condition:
+            if self._next_due is None or deliver_after < self._next_due:
+                self._next_due = deliver_after
+                self._condition.notify()
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._run, name='notification-digest', daemon=True)
+                self._flusher.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._next_due is None:
+                    self._condition.wait()
+                delay = (self._next_due - datetime.utcnow()).total_seconds()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                self._next_due = None
+            try:
+                self.flush(due_only=True)
+                with self._app_context():
+                    next_due = db.session.query(func.min(DigestItem.deliver_after)).scalar()
+            except Exception as e:
+                self.logger.error(f"Digest flush failed: {e}")
+                next_due = datetime.utcnow()
+            if next_due is not None:
+                # Never wake sooner than retry_delay, so windows a failed flush left due do not spin
+                self._schedule(max(next_due, datetime.utcnow() + timedelta(seconds=self.retry_delay)))
+
+    def _app_context(self):
+        return self.app.app_context() if self.app is not None else nullcontext()
+
+
+# Shared digest for price drop notifications
+price_drop_digest = NotificationDigest()
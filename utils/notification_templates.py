@@ -0,0 +1,389 @@
+"""
+Shared notification message templates with batch rendering.
+Implements MYK Level 5 notification standards.
+"""
+
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from operator import itemgetter
+from string import Formatter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+_MISSING = object()
+
+
+class RenderedMessage(NamedTuple):
+    """Subject, plain text and optional HTML body of one message."""
+    subject: str
+    text: str
+    html: Optional[str]
+
+
+_CONVERSIONS = {None: None, 's': str, 'r': repr, 'a': ascii}
+
+
+class _CompiledText:
+    """A str.format template parsed once into literal text and field slots.
+
+    ``parts`` alternates literals and placeholders; rendering copies it and
+    fills every placeholder with one slice assignment before joining, so no
+    format string is parsed per message.
+    """
+
+    __slots__ = ('parts', 'slots', '_values')
+
+    def __init__(self, parts: List[str], slots: Tuple[int, ...]):
+        self.parts = parts
+        self.slots = slots
+        self._values = itemgetter(*slots) if len(slots) > 1 else None
+
+    def render(self, values: List[str]) -> str:
+        if not self.slots:
+            return self.parts[0]
+        parts = self.parts.copy()
+        parts[1::2] = self._values(values) if self._values is not None else (values[self.slots[0]],)
+        return ''.join(parts)
+
+
+def _compile(source: str, fields: Dict[tuple, int]) -> _CompiledText:
+    """Parse source once, registering each distinct (name, conversion, spec) in fields.
+
+    Only named fields are allowed, so the names are exactly the context
+    keys that decide the rendered text.
+    """
+    parts, slots = [''], []
+    for literal, field, spec, conversion in Formatter().parse(source):
+        parts[-1] += literal
+        if field is None:
+            continue
+        if not field.isidentifier() or '{' in (spec or '') or conversion not in _CONVERSIONS:
+            raise ValueError(f"Unsupported template field {field!r} in {source[:40]!r}")
+        slots.append(fields.setdefault((field, conversion, spec or ''), len(fields)))
+        parts.extend((None, ''))
+    return _CompiledText(parts, tuple(slots))
+
+
+class MessageTemplate:
+    """A subject/text/HTML template compiled once and safe to share across threads.
+
+    Templates use ``str.format`` syntax and are parsed into literal/field
+    segments when the template is built; a field used by several parts (the
+    text and the HTML body, say) is formatted once per message. ``defaults``
+    fill in missing values (like ``dict.get(key, default)``) and ``derive``
+    computes extra values such as savings from the context; the context keys
+    it reads are listed in ``inputs``. ``render_many`` renders identical
+    contexts only once, so a price drop sent to every watcher of a flight is
+    formatted a single time per batch.
+    """
+
+    __slots__ = ('name', 'subject', 'text', 'html', 'defaults', 'derive', 'key_fields', '_fields', '_parts')
+
+    def __init__(self, name: str, subject: str, text: str, html: Optional[str] = None,
+                 defaults: Optional[Dict] = None, derive: Optional[Callable[[Dict], Dict]] = None,
+                 inputs: Tuple[str, ...] = ()):
+        self.name = name
+        self.subject = subject
+        self.text = text
+        self.html = html
+        self.defaults = dict(defaults or {})
+        self.derive = derive
+
+        fields: Dict[tuple, int] = {}
+        self._parts = (_compile(subject, fields), _compile(text, fields),
+                       _compile(html, fields) if html is not None else None)
+        # (name, spec) in slot order, or (name, conversion function, spec) if any field converts
+        if any(conversion for _, conversion, _ in fields):
+            self._fields = tuple((field, _CONVERSIONS[conversion], spec) for field, conversion, spec in fields)
+        else:
+            self._fields = tuple((field, spec) for field, _, spec in fields)
+        self.key_fields = tuple(sorted({field for field, _, _ in fields} | set(inputs)))
+
+    def render(self, values: Optional[Dict] = None, **extra) -> RenderedMessage:
+        """Render one message from a values dict and/or keyword values."""
+        context = {**self.defaults, **(values or {}), **extra}
+        if self.derive is not None:
+            context.update(self.derive(context))
+        if self._fields and len(self._fields[0]) == 2:
+            formatted = [format(context[field], spec) for field, spec in self._fields]
+        else:
+            formatted = [format(context[field] if convert is None else convert(context[field]), spec)
+                         for field, convert, spec in self._fields]
+        subject, text, html = self._parts
+        return RenderedMessage(
+            subject.render(formatted),
+            text.render(formatted),
+            html.render(formatted) if html is not None else None
+        )
+
+    def render_many(self, contexts: Iterable[Dict]) -> List[RenderedMessage]:
+        """Render a batch of contexts, formatting each distinct one once."""
+        rendered = []
+        memo = {}
+        for values in contexts:
+            key = self._key(values)
+            try:
+                message = memo.get(key, _MISSING)
+            except TypeError:
+                # Unhashable values cannot be memoized
+                rendered.append(self.render(values))
+                continue
+            if message is _MISSING:
+                message = memo[key] = self.render(values)
+            rendered.append(message)
+        return rendered
+
+    def _key(self, values: Dict) -> tuple:
+        defaults = self.defaults
+        return tuple(values.get(name, defaults.get(name, _MISSING)) for name in self.key_fields)
+
+    def __repr__(self):
+        return f'<MessageTemplate {self.name}>'
+
+
+def build_email_message(sender: str, recipient: str, subject: str, message: str,
+                        html_content: str = None) -> MIMEMultipart:
+    """Build a plain text email with an optional HTML alternative."""
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = recipient
+
+    # Text content
+    msg.attach(MIMEText(message, 'plain', 'utf-8'))
+
+    # HTML content if provided
+    if html_content:
+        msg.attach(MIMEText(html_content, 'html', 'utf-8'))
+
+    return msg
+
+
+def price_drop_context(flight_info: Dict, old_price: float, new_price: float) -> Dict:
+    """Template values for a price drop of flight_info."""
+    context = {
+        'origin': flight_info['origin'],
+        'destination': flight_info['destination'],
+        'flight_number': flight_info['flight_number'],
+        'airline': flight_info['airline'],
+        'old_price': old_price,
+        'new_price': new_price
+    }
+    if 'booking_url' in flight_info:
+        context['booking_url'] = context['booking_link'] = flight_info['booking_url']
+    return context
+
+
+def _price_drop_values(context: Dict) -> Dict:
+    old_price, new_price = context['old_price'], context['new_price']
+    return {
+        'discount': old_price - new_price,
+        'discount_percentage': (old_price - new_price) / old_price * 100
+    }
+
+
+PRICE_DROP = MessageTemplate(
+    'price_drop',
+    subject="Uçuş Fiyatında Düşüş!",
+    text=(
+        "Takip ettiğiniz {origin}-{destination} "
+        "seferinde fiyat düşüşü var!\n\n"
+        "Uçuş: {flight_number}\n"
+        "Havayolu: {airline}\n"
+        "Eski Fiyat: {old_price:.2f} TL\n"
+        "Yeni Fiyat: {new_price:.2f} TL\n"
+        "İndirim: {discount:.2f} TL ({discount_percentage:.1f}%)\n\n"
+        "Hemen rezervasyon yapmak için: {booking_url}"
+    ),
+    html="""
+        <html>
+        <body>
+            <h2 style="color: #28a745;">🎉 Uçuş Fiyatında Düşüş!</h2>
+            <p>Takip ettiğiniz <strong>{origin}-{destination}</strong> seferinde fiyat düşüşü var!</p>
+
+            <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #28a745; margin: 15px 0;">
+                <p><strong>Uçuş:</strong> {flight_number}</p>
+                <p><strong>Havayolu:</strong> {airline}</p>
+                <p><strong>Eski Fiyat:</strong> <span style="text-decoration: line-through;">{old_price:.2f} TL</span></p>
+                <p><strong>Yeni Fiyat:</strong> <span style="color: #28a745; font-size: 1.2em;">{new_price:.2f} TL</span></p>
+                <p><strong>İndirim:</strong> {discount:.2f} TL ({discount_percentage:.1f}%)</p>
+            </div>
+
+            <p>
+                <a href="{booking_link}"
+                   style="background-color: #007bff; color: white; padding: 10px 20px;
+                          text-decoration: none; border-radius: 5px; display: inline-block;">
+                    Hemen Rezervasyon Yap
+                </a>
+            </p>
+        </body>
+        </html>
+        """,
+    defaults={'booking_url': 'N/A', 'booking_link': '#'},
+    derive=_price_drop_values,
+    inputs=('old_price', 'new_price')
+)
+
+# One line/row per drop inside a digest
+PRICE_DROP_DIGEST_ITEM = MessageTemplate(
+    'price_drop_digest_item',
+    subject="{origin}-{destination}",
+    text=(
+        "• {origin}-{destination} {flight_number} ({airline}): "
+        "{old_price:.2f} TL → {new_price:.2f} TL "
+        "(-{discount_percentage:.1f}%) {booking_url}"
+    ),
+    html=(
+        "<tr><td>{origin}-{destination}</td><td>{flight_number}</td><td>{airline}</td>"
+        "<td style=\"text-decoration: line-through;\">{old_price:.2f} TL</td>"
+        "<td style=\"color: #28a745;\">{new_price:.2f} TL</td>"
+        "<td><a href=\"{booking_link}\">Rezervasyon</a></td></tr>"
+    ),
+    defaults={'booking_url': 'N/A', 'booking_link': '#'},
+    derive=_price_drop_values,
+    inputs=('old_price', 'new_price')
+)
+
+PRICE_DROP_DIGEST = MessageTemplate(
+    'price_drop_digest',
+    subject="{count} Uçuşta Fiyat Düşüşü!",
+    text="Takip ettiğiniz seferlerde fiyat düşüşü var!\n\n{lines}",
+    html="""
+        <html>
+        <body>
+            <h2 style="color: #28a745;">🎉 {count} Uçuşta Fiyat Düşüşü!</h2>
+            <p>Takip ettiğiniz seferlerde fiyat düşüşü var!</p>
+            <table cellpadding="6" style="border-collapse: collapse;">
+                <tr><th>Güzergah</th><th>Uçuş</th><th>Havayolu</th><th>Eski Fiyat</th><th>Yeni Fiyat</th><th></th></tr>
+                {rows}
+            </table>
+        </body>
+        </html>
+        """
+)
+
+FLIGHT_REMINDER = MessageTemplate(
+    'flight_reminder',
+    subject="Uçuş Hatırlatması",
+    text=(
+        "Yarın uçuşunuz var!\n\n"
+        "Uçuş: {flight_number}\n"
+        "Havayolu: {airline}\n"
+        "Kalkış: {departure_time}\n"
+        "Güvenlik kontrolünden en az 2 saat önce havalimanında bulunmayı unutmayın."
+    )
+)
+
+# Legacy NotificationService (modules/) messages; missing details read as N/A
+
+PRICE_ALERT = MessageTemplate(
+    'price_alert',
+    subject="🎯 Fiyat Uyarısı - Hedef Fiyat Düştü!",
+    text="""
+Merhaba,
+
+Takip ettiğiniz uçuş için fiyat düşüşü tespit edildi!
+
+Uçuş Detayları:
+• Güzergah: {departure} → {destination}
+• Tarih: {date}
+• Havayolu: {airline}
+
+Fiyat Bilgileri:
+• Hedef Fiyat: {target_price} TL
+• Mevcut Fiyat: {current_price} TL
+• Tasarruf: {savings} TL
+
+Hemen rezervasyon yapmak için linke tıklayın:
+{booking_url}
+
+En Uygun Uçak Bileti Ekibi
+""",
+    defaults={'departure': 'N/A', 'destination': 'N/A', 'date': 'N/A', 'airline': 'N/A', 'booking_url': '#'},
+    derive=lambda context: {'savings': context['target_price'] - context['current_price']},
+    inputs=('target_price', 'current_price')
+)
+
+BOOKING_CONFIRMATION = MessageTemplate(
+    'booking_confirmation',
+    subject="✅ Rezervasyon Onayı",
+    text="""
+Rezervasyonunuz başarıyla alındı!
+
+Rezervasyon Detayları:
+• Rezervasyon Kodu: {confirmation_code}
+• Güzergah: {departure} → {destination}
+• Tarih: {date}
+• Saat: {time}
+• Yolcu: {passenger_name}
+• Toplam Tutar: {total_price} TL
+
+Check-in işlemi için havayolu web sitesini ziyaret edin.
+
+İyi yolculuklar!
+En Uygun Uçak Bileti Ekibi
+""",
+    defaults={name: 'N/A' for name in ('confirmation_code', 'departure', 'destination', 'date', 'time',
+                                       'passenger_name', 'total_price')}
+)
+
+TRIP_REMINDER = MessageTemplate(
+    'trip_reminder',
+    subject="✈️ Uçuş Hatırlatması - {hours_before} Saat Kaldı",
+    text="""
+Uçuşunuza {hours_before} saat kaldı!
+
+Uçuş Detayları:
+• Güzergah: {departure} → {destination}
+• Tarih: {date}
+• Kalkış Saati: {departure_time}
+• Havayolu: {airline}
+• Uçuş No: {flight_number}
+
+Hatırlatmalar:
+• Havalimanına en az 2 saat önce gelin
+• Check-in işlemini unutmayın
+• Kimlik belgilerinizi yanınıza alın
+• Bagaj limitlerini kontrol edin
+
+İyi yolculuklar!
+En Uygun Uçak Bileti Ekibi
+""",
+    defaults={name: 'N/A' for name in ('departure', 'destination', 'date', 'departure_time', 'airline',
+                                       'flight_number')}
+)
+
+DEAL_ALERT = MessageTemplate(
+    'deal_alert',
+    subject="🔥 Süper Fırsat - Sınırlı Süreli İndirim!",
+    text="""
+Kaçırılmayacak fırsat!
+
+Fırsat Detayları:
+• Güzergah: {departure} → {destination}
+• Normal Fiyat: {normal_price} TL
+• İndirimli Fiyat: {discounted_price} TL
+• İndirim Oranı: %{discount_percentage}
+• Geçerlilik: {valid_until}
+
+Bu fırsatı kaçırmayın! Hemen rezervasyon yapın.
+
+En Uygun Uçak Bileti Ekibi
+""",
+    defaults={name: 'N/A' for name in ('departure', 'destination', 'normal_price', 'discounted_price',
+                                       'discount_percentage', 'valid_until')}
+)
+
+PRICE_WATCH_CONFIRMATION = MessageTemplate(
+    'price_watch_confirmation',
+    subject="Fiyat Takibi Onayı",
+    text="""
+Fiyat takibi başarıyla oluşturuldu!
+
+Takip ID: {watch_id}
+Güzergah: {departure} → {destination}
+Hedef Fiyat: {target_price} TL
+
+Fiyat hedefi altına düştüğünde bildirim alacaksınız.
+""",
+    defaults={'departure': None, 'destination': None}
+)
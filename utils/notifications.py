@@ -3,26 +3,35 @@ Notification system for sending alerts to users.
 Implements MYK Level 5 notification standards.
 """
 
-import smtplib
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 import logging
-from typing import List
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import insert
 
 from app import db
-from models.models import Notification, User
+from models.models import Notification, NotificationCounter, User
+from utils.notification_templates import (FLIGHT_REMINDER, PRICE_DROP, PRICE_DROP_DIGEST,
+                                          PRICE_DROP_DIGEST_ITEM, build_email_message, price_drop_context)
+from utils.pagination import KeysetPage, paginate_keyset
+from utils.smtp_pool import SMTPConnectionPool, get_smtp_pool
+from utils.unread_counter import unread_counter
 
 
 class NotificationService:
     """Service for managing user notifications."""
     
-    def __init__(self):
+    def __init__(self, outbox=None, digest=None):
         self.smtp_server = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
         self.smtp_port = int(os.getenv('SMTP_PORT', '587'))
         self.smtp_username = os.getenv('SMTP_USERNAME')
         self.smtp_password = os.getenv('SMTP_PASSWORD')
+        self.smtp_use_tls = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+        self._outbox = outbox
+        self._digest = digest
+        self.bulk_chunk_size = int(os.getenv('NOTIFICATION_BULK_CHUNK_SIZE', '500'))
         self.logger = logging.getLogger(__name__)
     
     def create_notification(self, user_id: str, title: str, message: str, 
@@ -37,7 +46,9 @@ class NotificationService:
             )
             
             db.session.add(notification)
+            NotificationCounter.adjust(user_id, 1)
             db.session.commit()
+            unread_counter.invalidate(user_id)
             
             self.logger.info(f"Notification created for user {user_id}: {title}")
             return True
@@ -47,6 +58,64 @@ class NotificationService:
             self.logger.error(f"Failed to create notification: {e}")
             return False
     
+    def create_notifications_bulk(self, notifications: Iterable[dict],
+                                  chunk_size: int = None, commit: bool = True) -> Dict[str, int]:
+        """Create many notifications with one executemany INSERT per chunk.
+        
+        Each item needs user_id, title and message and may set type. Every
+        chunk is its own transaction, so a failing chunk does not undo the
+        ones already committed. With commit=False all chunks join the
+        caller's transaction instead, errors are raised, and the caller
+        invalidates the users' unread counts after committing.
+        """
+        chunk_size = chunk_size or self.bulk_chunk_size
+        result = {'created': 0, 'failed': 0, 'chunks': 0}
+        insert_chunk = self._insert_notification_chunk if commit else self._add_notification_chunk
+        
+        chunk = []
+        for item in notifications:
+            chunk.append({
+                'user_id': item['user_id'],
+                'title': item['title'],
+                'message': item['message'],
+                'type': item.get('type', 'info')
+            })
+            if len(chunk) >= chunk_size:
+                insert_chunk(chunk, result)
+                chunk = []
+        if chunk:
+            insert_chunk(chunk, result)
+        
+        self.logger.info(f"Bulk notifications: {result}")
+        return result
+    
+    def _add_notification_chunk(self, rows: List[dict], result: Dict[str, int]):
+        result['chunks'] += 1
+        self._add_notifications(rows)
+        result['created'] += len(rows)
+    
+    def _insert_notification_chunk(self, rows: List[dict], result: Dict[str, int]):
+        result['chunks'] += 1
+        try:
+            per_user = self._add_notifications(rows)
+            db.session.commit()
+            result['created'] += len(rows)
+            for user_id in per_user:
+                unread_counter.invalidate(user_id)
+            
+        except Exception as e:
+            db.session.rollback()
+            result['failed'] += len(rows)
+            self.logger.error(f"Failed to create {len(rows)} notifications: {e}")
+    
+    def _add_notifications(self, rows: List[dict]) -> Counter:
+        """Insert notification rows and their unread counts without committing."""
+        db.session.execute(insert(Notification), rows)
+        per_user = Counter(row['user_id'] for row in rows)
+        for user_id, count in per_user.items():
+            NotificationCounter.adjust(user_id, count)
+        return per_user
+    
     def send_email_notification(self, user_email: str, subject: str, 
                                message: str, html_content: str = None) -> bool:
         """Send email notification to user."""
@@ -55,106 +124,181 @@ class NotificationService:
                 self.logger.warning("SMTP credentials not configured")
                 return False
             
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = self.smtp_username
-            msg['To'] = user_email
-            
-            # Text content
-            text_part = MIMEText(message, 'plain', 'utf-8')
-            msg.attach(text_part)
-            
-            # HTML content if provided
-            if html_content:
-                html_part = MIMEText(html_content, 'html', 'utf-8')
-                msg.attach(html_part)
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_username, self.smtp_password)
-                server.send_message(msg)
-            
-            self.logger.info(f"Email sent to {user_email}: {subject}")
+            self.deliver('email', user_email, subject, message, html_content)
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to send email to {user_email}: {e}")
             return False
     
+    def queue_email_notification(self, user_email: str, subject: str,
+                                 message: str, html_content: str = None) -> bool:
+        """Queue an email in the outbox instead of sending it inline."""
+        try:
+            self.outbox.enqueue(user_email, message, subject, html_content)
+            return True
+            
+        except Exception as e:
+            db.session.rollback()
+            self.logger.error(f"Failed to queue email to {user_email}: {e}")
+            return False
+    
+    def deliver(self, channel: str, recipient: str, subject: str, message: str,
+                html_content: str = None):
+        """Deliver one message right away; raises on failure (outbox transport)."""
+        if channel != 'email':
+            raise ValueError(f"Unsupported notification channel: {channel}")
+        if not self.smtp_username or not self.smtp_password:
+            raise RuntimeError("SMTP credentials not configured")
+        
+        # Send email over a pooled, already authenticated connection
+        self.smtp_pool.send_message(build_email_message(self.smtp_username, recipient, subject,
+                                                        message, html_content))
+        self.logger.info(f"Email sent to {recipient}: {subject}")
+    
+    @property
+    def outbox(self):
+        """Outbox that queued emails are written to."""
+        if self._outbox is None:
+            from utils.outbox import notification_outbox
+            self._outbox = notification_outbox
+        return self._outbox
+    
+    @property
+    def smtp_pool(self) -> SMTPConnectionPool:
+        """Shared connection pool for the configured SMTP account."""
+        return get_smtp_pool(self.smtp_server, self.smtp_port, self.smtp_username, self.smtp_password,
+                             use_tls=self.smtp_use_tls)
+    
+    def get_smtp_stats(self) -> dict:
+        """Get SMTP connection reuse metrics."""
+        if not self.smtp_username or not self.smtp_password:
+            return {}
+        return self.smtp_pool.get_stats()
+    
     def notify_price_drop(self, user_id: str, flight_info: dict, old_price: float, new_price: float):
-        """Notify user about flight price drop."""
-        user = User.query.get(user_id)
-        if not user:
+        """Notify user about flight price drop.
+        
+        Drops are coalesced per user by the price drop digest and delivered
+        as a single email and in-app notification when its window closes.
+        """
+        if not User.query.get(user_id):
             return False
         
-        title = "Uçuş Fiyatında Düşüş!"
-        message = (
-            f"Takip ettiğiniz {flight_info['origin']}-{flight_info['destination']} "
-            f"seferinde fiyat düşüşü var!\n\n"
-            f"Uçuş: {flight_info['flight_number']}\n"
-            f"Havayolu: {flight_info['airline']}\n"
-            f"Eski Fiyat: {old_price:.2f} TL\n"
-            f"Yeni Fiyat: {new_price:.2f} TL\n"
-            f"İndirim: {old_price - new_price:.2f} TL ({((old_price - new_price) / old_price * 100):.1f}%)\n\n"
-            f"Hemen rezervasyon yapmak için: {flight_info.get('booking_url', 'N/A')}"
-        )
+        self.digest.add(user_id, {
+            'flight_info': dict(flight_info),
+            'old_price': old_price,
+            'new_price': new_price
+        })
+        return True
+    
+    def send_price_drop_digest(self, user_id: str, drops: List[dict]) -> bool:
+        """Send one notification and email covering all buffered price drops."""
+        try:
+            return self.send_price_drop_digests([(user_id, drops)])['created'] == 1
+        except Exception as e:
+            self.logger.error(f"Failed to send price drop digest: {e}")
+            return False
+    
+    def send_price_drop_digests(self, batches: List[Tuple[str, List[dict]]]) -> Dict[str, int]:
+        """Send one notification and email per (user_id, drops) batch in bulk.
         
-        html_message = f"""
-        <html>
-        <body>
-            <h2 style="color: #28a745;">🎉 Uçuş Fiyatında Düşüş!</h2>
-            <p>Takip ettiğiniz <strong>{flight_info['origin']}-{flight_info['destination']}</strong> seferinde fiyat düşüşü var!</p>
-            
-            <div style="background-color: #f8f9fa; padding: 15px; border-left: 4px solid #28a745; margin: 15px 0;">
-                <p><strong>Uçuş:</strong> {flight_info['flight_number']}</p>
-                <p><strong>Havayolu:</strong> {flight_info['airline']}</p>
-                <p><strong>Eski Fiyat:</strong> <span style="text-decoration: line-through;">{old_price:.2f} TL</span></p>
-                <p><strong>Yeni Fiyat:</strong> <span style="color: #28a745; font-size: 1.2em;">{new_price:.2f} TL</span></p>
-                <p><strong>İndirim:</strong> {old_price - new_price:.2f} TL ({((old_price - new_price) / old_price * 100):.1f}%)</p>
-            </div>
-            
-            <p>
-                <a href="{flight_info.get('booking_url', '#')}" 
-                   style="background-color: #007bff; color: white; padding: 10px 20px; 
-                          text-decoration: none; border-radius: 5px; display: inline-block;">
-                    Hemen Rezervasyon Yap
-                </a>
-            </p>
-        </body>
-        </html>
+        The in-app notifications and the queued emails are written in one
+        transaction, together with anything the caller has pending in the
+        session, so a failure leaves neither behind; errors are raised.
+        """
+        user_ids = [user_id for user_id, drops in batches if drops]
+        emails = dict(db.session.query(User.id, User.email).filter(User.id.in_(user_ids)).all()) if user_ids else {}
+        
+        notifications = []
+        messages = []
+        for user_id, drops in batches:
+            if user_id not in emails or not drops:
+                continue
+            title, message, html_message = self._render_price_drops(drops)
+            notifications.append({'user_id': user_id, 'title': title, 'message': message, 'type': 'success'})
+            messages.append({'recipient': emails[user_id], 'subject': title, 'body': message,
+                             'html_body': html_message})
+        
+        return self._send_alerts(notifications, messages)
+    
+    def _send_alerts(self, notifications: List[dict], messages: List[dict]) -> Dict[str, int]:
+        """Write in-app notifications and queue their emails in one transaction.
+        
+        Anything the caller has pending in the session is committed with
+        them; on failure everything is rolled back and the error is raised.
         """
+        try:
+            created = self.create_notifications_bulk(notifications, commit=False)['created']
+            queued = self.outbox.enqueue_many(messages, commit=False)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self.logger.error(f"Failed to write {len(notifications)} alerts: {e}")
+            raise
         
-        # Create in-app notification
-        self.create_notification(user_id, title, message, 'success')
+        for user_id in {notification['user_id'] for notification in notifications}:
+            unread_counter.invalidate(user_id)
+        return {'created': created, 'queued': queued}
+    
+    def _render_price_drops(self, drops: List[dict]):
+        """Title, text and HTML for one or more price drops."""
+        contexts = [price_drop_context(**drop) for drop in drops]
+        if len(contexts) == 1:
+            return PRICE_DROP.render(contexts[0])
         
-        # Send email notification
-        self.send_email_notification(user.email, title, message, html_message)
+        # Largest saving first
+        contexts.sort(key=lambda c: c['old_price'] - c['new_price'], reverse=True)
+        items = PRICE_DROP_DIGEST_ITEM.render_many(contexts)
+        return PRICE_DROP_DIGEST.render(
+            count=len(items),
+            lines='\n'.join(item.text for item in items),
+            rows=''.join(item.html for item in items)
+        )
+    
+    @property
+    def digest(self):
+        """Digest that price drop notifications are coalesced in."""
+        if self._digest is None:
+            from utils.notification_digest import price_drop_digest
+            self._digest = price_drop_digest
+        return self._digest
     
     def notify_flight_reminder(self, user_id: str, flight_info: dict):
         """Notify user about upcoming flight."""
-        user = User.query.get(user_id)
-        if not user:
+        try:
+            return self.send_flight_reminders([(user_id, flight_info)])['created'] == 1
+        except Exception:
             return False
+    
+    def send_flight_reminders(self, reminders: List[Tuple[str, dict]]) -> Dict[str, int]:
+        """Send one notification and email per (user_id, flight_info) in bulk."""
+        user_ids = [user_id for user_id, _ in reminders]
+        emails = dict(db.session.query(User.id, User.email).filter(User.id.in_(user_ids)).all()) if user_ids else {}
         
-        title = "Uçuş Hatırlatması"
-        message = (
-            f"Yarın uçuşunuz var!\n\n"
-            f"Uçuş: {flight_info['flight_number']}\n"
-            f"Havayolu: {flight_info['airline']}\n"
-            f"Kalkış: {flight_info['departure_time']}\n"
-            f"Güvenlik kontrolünden en az 2 saat önce havalimanında bulunmayı unutmayın."
-        )
+        notifications = []
+        messages = []
+        for user_id, flight_info in reminders:
+            if user_id not in emails:
+                continue
+            title, message, _ = FLIGHT_REMINDER.render(flight_info)
+            notifications.append({'user_id': user_id, 'title': title, 'message': message, 'type': 'info'})
+            messages.append({'recipient': emails[user_id], 'subject': title, 'body': message})
         
-        self.create_notification(user_id, title, message, 'info')
-        self.send_email_notification(user.email, title, message)
+        return self._send_alerts(notifications, messages)
+    
+    def get_unread_count(self, user_id: str) -> int:
+        """Get user's unread notification count from the materialized counter."""
+        return unread_counter.get(user_id)
     
     def get_user_notifications(self, user_id: str, limit: int = 10) -> List[Notification]:
         """Get user's recent notifications."""
-        return Notification.query.filter_by(user_id=user_id)\
-                                .order_by(Notification.created_at.desc())\
-                                .limit(limit).all()
+        return self.get_notifications_page(user_id, limit=limit).items
+    
+    def get_notifications_page(self, user_id: str, cursor: Optional[str] = None,
+                               limit: int = 20) -> KeysetPage:
+        """Get one newest-first page of a user's notifications after cursor."""
+        return paginate_keyset(Notification.query.filter_by(user_id=user_id), Notification, cursor, limit)
     
     def mark_notification_read(self, notification_id: str, user_id: str) -> bool:
         """Mark notification as read."""
@@ -179,7 +323,9 @@ class NotificationService:
         try:
             Notification.query.filter_by(user_id=user_id, is_read=False)\
                              .update({'is_read': True})
+            NotificationCounter.reset(user_id, 0)
             db.session.commit()
+            unread_counter.invalidate(user_id)
             return True
             
         except Exception as e:
@@ -0,0 +1,342 @@
+"""
+Durable notification outbox drained by a bounded worker pool.
+Implements MYK Level 5 notification standards.
+"""
+
+import os
+import time
+import random
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, insert, or_, update
+
+from app import db
+from models.models import OutboxMessage
+
+
+class NotificationOutbox:
+    """Persists outgoing notifications and delivers them asynchronously.
+
+    Producers call ``enqueue`` and return as soon as the row is committed.
+    ``drain`` claims due messages, sends them on up to ``max_workers``
+    threads and records the outcome: failures are retried with exponential
+    backoff (``base_delay * 2 ** (attempts - 1)``, capped at ``max_delay``,
+    with jitter) and moved to the ``dead`` status after ``max_attempts``.
+    A claimed message carries a lease, so messages of a crashed or hung
+    worker are picked up again once the lease expires; an expired lease
+    counts as a failed attempt. At most as many messages are claimed at
+    once as the workers can send within one lease when every send takes
+    ``send_timeout`` twice (the pooled SMTP transport retries once after a
+    dropped connection), so a slow batch is not claimed and sent again by
+    another worker.
+    """
+
+    def __init__(self, app=None, transport: Optional[Callable] = None, max_workers: Optional[int] = None,
+                 max_attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, batch_size: Optional[int] = None,
+                 lease: Optional[float] = None, send_timeout: Optional[float] = None):
+        self.app = app
+        self._transport = transport
+        self.max_workers = max_workers or int(os.getenv('OUTBOX_WORKERS', '4'))
+        self.max_attempts = max_attempts or int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+        self.base_delay = base_delay if base_delay is not None else float(os.getenv('OUTBOX_BASE_DELAY', '30'))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv('OUTBOX_MAX_DELAY', '3600'))
+        self.batch_size = batch_size or int(os.getenv('OUTBOX_BATCH_SIZE', '100'))
+        self.lease = lease if lease is not None else float(os.getenv('OUTBOX_LEASE', '300'))
+        self.send_timeout = (send_timeout if send_timeout is not None
+                             else float(os.getenv('OUTBOX_SEND_TIMEOUT', '30')))
+        sends_per_lease = int(self.lease // (2 * self.send_timeout)) if self.send_timeout > 0 else self.batch_size
+        self.claim_size = max(1, min(self.batch_size, self.max_workers * sends_per_lease))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {'enqueued': 0, 'sent': 0, 'retried': 0, 'dead_lettered': 0, 'drain_cycles': 0}
+        # (finished_at, delivered) of recent cycles for the drain rate
+        self._recent = deque(maxlen=60)
+        self.logger = logging.getLogger(__name__)
+
+    def init_app(self, app):
+        """Bind the outbox to an application."""
+        self.app = app
+
+    @property
+    def transport(self) -> Callable:
+        """Callable (channel, recipient, subject, body, html_body) that raises on failure."""
+        if self._transport is None:
+            from utils.notifications import NotificationService
+            self._transport = NotificationService().deliver
+        return self._transport
+
+    def enqueue(self, recipient: str, body: str, subject: Optional[str] = None,
+                html_body: Optional[str] = None, channel: str = 'email', commit: bool = True) -> int:
+        """Persist a message for delivery and return its id."""
+        message = OutboxMessage(channel=channel, recipient=recipient, subject=subject,
+                                body=body, html_body=html_body)
+        db.session.add(message)
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+        self._count('enqueued')
+        self._wakeup.set()
+        return message.id
+
+    def enqueue_many(self, messages: Iterable[Dict], commit: bool = True) -> int:
+        """Persist many messages with one executemany INSERT and return the count.
+
+        Each item needs recipient and body and may set subject, html_body
+        and channel. With commit=False the rows join the caller's transaction.
+        """
+        rows = [{
+            'channel': message.get('channel', 'email'),
+            'recipient': message['recipient'],
+            'subject': message.get('subject'),
+            'body': message['body'],
+            'html_body': message.get('html_body')
+        } for message in messages]
+        if not rows:
+            return 0
+
+        db.session.execute(insert(OutboxMessage), rows)
+        if commit:
+            db.session.commit()
+        with self._stats_lock:
+            self._stats['enqueued'] += len(rows)
+        self._wakeup.set()
+        return len(rows)
+
+    def drain(self, limit: Optional[int] = None) -> Dict:
+        """Deliver due messages until none are left or limit is reached."""
+        started = time.monotonic()
+        # Messages rescheduled during this drain wait for the next one
+        cutoff = datetime.utcnow()
+        result = {'claimed': 0, 'sent': 0, 'retried': 0, 'dead_lettered': 0}
+
+        with self._app_context():
+            while limit is None or result['claimed'] < limit:
+                size = self.claim_size if limit is None else min(self.claim_size, limit - result['claimed'])
+                batch = self._claim(size, cutoff)
+                if not batch:
+                    break
+                result['claimed'] += len(batch)
+                for key, value in self._deliver(batch).items():
+                    result[key] += value
+
+        result['elapsed'] = round(time.monotonic() - started, 3)
+        result['per_second'] = round(result['sent'] / result['elapsed'], 1) if result['elapsed'] else 0
+        with self._stats_lock:
+            self._stats['drain_cycles'] += 1
+            self._recent.append((time.monotonic(), result['sent']))
+        return result
+
+    def start(self, poll_interval: Optional[float] = None):
+        """Drain in a background thread, waking up on enqueue or every poll_interval seconds."""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        interval = poll_interval if poll_interval is not None else float(os.getenv('OUTBOX_POLL_INTERVAL', '5'))
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run, args=(interval,), name='notification-outbox',
+                                        daemon=True)
+        self._worker.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the background thread after its current cycle."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def get_dead_letters(self, limit: int = 50) -> List[OutboxMessage]:
+        """Messages that exhausted their attempts, newest first."""
+        return OutboxMessage.query.filter_by(status='dead')\
+                                  .order_by(OutboxMessage.id.desc())\
+                                  .limit(limit).all()
+
+    def requeue_dead(self, ids: Optional[List[int]] = None) -> int:
+        """Give dead-lettered messages a fresh set of attempts."""
+        query = update(OutboxMessage).where(OutboxMessage.status == 'dead')
+        if ids is not None:
+            query = query.where(OutboxMessage.id.in_(ids))
+        count = db.session.execute(query.values(
+            status='pending', attempts=0, next_attempt_at=datetime.utcnow()
+        )).rowcount
+        db.session.commit()
+        self._wakeup.set()
+        return count
+
+    def get_stats(self) -> Dict:
+        """Get queue depth per status and delivery counters."""
+        with self._app_context():
+            depth = dict(db.session.query(OutboxMessage.status, func.count(OutboxMessage.id))
+                                   .filter(OutboxMessage.status != 'sent')
+                                   .group_by(OutboxMessage.status).all())
+
+        with self._stats_lock:
+            stats = dict(self._stats)
+            recent = list(self._recent)
+
+        stats['queue_depth'] = depth.get('pending', 0) + depth.get('sending', 0)
+        stats['in_flight'] = depth.get('sending', 0)
+        stats['dead'] = depth.get('dead', 0)
+        # Messages delivered per second over the last minute of drain cycles
+        window = [sent for finished, sent in recent if time.monotonic() - finished <= 60]
+        stats['drain_rate'] = round(sum(window) / 60, 2)
+        return stats
+
+    def _claim(self, size: int, now: datetime) -> List[tuple]:
+        """Lease up to size messages due at now to this worker."""
+        due = or_(OutboxMessage.status == 'pending', OutboxMessage.status == 'sending')
+        rows = db.session.query(
+            OutboxMessage.id, OutboxMessage.channel, OutboxMessage.recipient, OutboxMessage.subject,
+            OutboxMessage.body, OutboxMessage.html_body, OutboxMessage.attempts, OutboxMessage.status
+        ).filter(due, OutboxMessage.next_attempt_at <= now)\
+         .order_by(OutboxMessage.next_attempt_at)\
+         .limit(size).all()
+        if not rows:
+            return []
+
+        # Only keep rows no other worker leased in the meantime
+        lease_until = datetime.utcnow() + timedelta(seconds=self.lease)
+        claimed = []
+        dead_lettered = 0
+        for row in rows:
+            attempts = row.attempts
+            values = {'status': 'sending', 'next_attempt_at': lease_until}
+            if row.status == 'sending':
+                # The previous worker crashed or hung past its lease
+                attempts += 1
+                values.update(attempts=attempts, last_error='Lease expired before delivery was recorded')
+                if attempts >= self.max_attempts:
+                    values['status'] = 'dead'
+            updated = db.session.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id == row.id, due, OutboxMessage.next_attempt_at <= now)
+                .values(**values)
+            ).rowcount
+            if not updated:
+                continue
+            if values['status'] == 'dead':
+                dead_lettered += 1
+                self.logger.error(f"Outbox message {row.id} dead-lettered after {attempts} expired leases")
+            else:
+                claimed.append(tuple(row[:6]) + (attempts,))
+        db.session.commit()
+
+        if dead_lettered:
+            with self._stats_lock:
+                self._stats['dead_lettered'] += dead_lettered
+        return claimed
+
+    def _deliver(self, batch: List[tuple]) -> Dict:
+        """Send a claimed batch concurrently and record the outcomes."""
+        def send(row):
+            message_id, channel, recipient, subject, body, html_body, attempts = row
+            try:
+                self.transport(channel, recipient, subject, body, html_body)
+                return message_id, attempts, None
+            except Exception as e:
+                return message_id, attempts, str(e) or e.__class__.__name__
+
+        outcome = {'sent': 0, 'retried': 0, 'dead_lettered': 0}
+        now = datetime.utcnow()
+        sent_ids = []
+        for message_id, attempts, error in self._get_executor().map(send, batch):
+            if error is None:
+                sent_ids.append(message_id)
+                continue
+
+            attempts += 1
+            if attempts >= self.max_attempts:
+                values = {'status': 'dead'}
+                outcome['dead_lettered'] += 1
+                self.logger.error(f"Outbox message {message_id} dead-lettered after {attempts} attempts: {error}")
+            else:
+                values = {'status': 'pending', 'next_attempt_at': now + timedelta(seconds=self._backoff(attempts))}
+                outcome['retried'] += 1
+            db.session.execute(update(OutboxMessage).where(OutboxMessage.id == message_id)
+                               .values(attempts=attempts, last_error=error[:500], **values))
+
+        if sent_ids:
+            db.session.execute(update(OutboxMessage).where(OutboxMessage.id.in_(sent_ids))
+                               .values(status='sent', sent_at=now, last_error=None))
+            outcome['sent'] = len(sent_ids)
+        db.session.commit()
+
+        with self._stats_lock:
+            for key, value in outcome.items():
+                self._stats[key] += value
+        return outcome
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.0)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='outbox-send')
+            return self._executor
+
+    def _run(self, interval: float):
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception as e:
+                self.logger.error(f"Outbox drain failed: {e}")
+            self._wakeup.wait(interval)
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _app_context(self):
+        return self.app.app_context() if self.app is not None else nullcontext()
+
+
+# Shared outbox used by the notification service and the worker command
+notification_outbox = NotificationOutbox()
+
+
+@click.command('notification-worker')
+@click.option('--interval', type=float, default=lambda: float(os.getenv('OUTBOX_POLL_INTERVAL', '5')),
+              help='Seconds between polls when the outbox is empty.')
+@click.option('--once', is_flag=True, help='Drain the outbox once and exit.')
+@with_appcontext
+def notification_worker_command(interval, once):
+    """Deliver queued notifications and closed digest windows from the outbox."""
+    from flask import current_app
+    from utils.notification_digest import price_drop_digest
+
+    notification_outbox.init_app(current_app._get_current_object())
+    if once:
+        price_drop_digest.flush(due_only=True)
+        click.echo(notification_outbox.drain())
+        return
+
+    while True:
+        cycle_started = time.monotonic()
+        try:
+            # Also picks up digests buffered by processes that exited before their window closed
+            price_drop_digest.flush(due_only=True)
+            result = notification_outbox.drain()
+            if result['claimed']:
+                click.echo(result)
+        except Exception as e:
+            # A database or transport outage must not stop the worker; the next cycle retries
+            notification_outbox.logger.error(f"Outbox drain failed: {e}")
+            click.echo(f"Outbox drain failed: {e}", err=True)
+        time.sleep(max(0.0, interval - (time.monotonic() - cycle_started)))
@@ -0,0 +1,63 @@
+"""
+Keyset (cursor) pagination for per-user listings.
+Implements MYK Level 5 data access standards.
+"""
+
+import base64
+import binascii
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from flask import request
+from sqlalchemy import tuple_
+
+
+class KeysetPage(NamedTuple):
+    """One page of a listing and the cursor of the next one (None on the last page)."""
+    items: List
+    next_cursor: Optional[str]
+
+    @property
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    """Opaque cursor for the position after (created_at, id)."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        created_at, row_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), row_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def paginate_keyset(query, model, cursor: Optional[str] = None, limit: int = 20) -> KeysetPage:
+    """Newest-first page of query ordered by (created_at, id).
+
+    The cursor is a position rather than an offset, so every page is one
+    index range scan on (..., created_at, id) no matter how deep it is, and
+    rows inserted meanwhile never shift or repeat entries.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+
+    # One extra row tells whether another page follows
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return KeysetPage(rows, None)
+    items = rows[:limit]
+    return KeysetPage(items, encode_cursor(items[-1].created_at, items[-1].id))
+
+
+def page_args(default_limit: int = 20, max_limit: int = 100) -> Tuple[Optional[str], int]:
+    """cursor and limit query parameters of the current request."""
+    limit = request.args.get('limit', default_limit, type=int)
+    return request.args.get('cursor') or None, max(1, min(limit, max_limit))
@@ -0,0 +1,127 @@
+"""
+Password hashing off the request threads with a tunable work factor.
+Implements MYK Level 5 security standards.
+"""
+
+import os
+import threading
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasherBusy(RuntimeError):
+    """The pool could not take or finish a hash in time; the user may retry shortly."""
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a bounded worker pool.
+
+    The key derivation runs in one of ``workers`` processes (or threads, or
+    inline on the caller), so a burst of logins queues up for the pool
+    instead of occupying every request thread and the interpreter at once.
+    ``method`` is a Werkzeug method string and carries the work factor,
+    e.g. ``scrypt:32768:8:1`` or ``pbkdf2:sha256:600000``. Stored hashes
+    made with other parameters still verify, and ``needs_rehash`` tells the
+    caller to store a fresh hash while it has the plain password at hand.
+
+    At most ``max_pending`` hashes are queued or running at once. Beyond
+    that, or when a hash takes longer than ``timeout``, PasswordHasherBusy
+    is raised so the request can fail fast with a retry message.
+    """
+
+    EXECUTORS = ('process', 'thread', 'inline')
+
+    def __init__(self, method: Optional[str] = None, workers: Optional[int] = None,
+                 executor: Optional[str] = None, timeout: Optional[float] = None,
+                 max_pending: Optional[int] = None):
+        self.method = method or os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+        self.workers = workers or int(os.getenv('PASSWORD_HASH_WORKERS', '0')) or os.cpu_count() or 1
+        self.executor_type = executor or os.getenv('PASSWORD_HASH_EXECUTOR', 'process')
+        if self.executor_type not in self.EXECUTORS:
+            raise ValueError(f"Unknown password hash executor: {self.executor_type}")
+        self.timeout = timeout if timeout is not None else float(os.getenv('PASSWORD_HASH_TIMEOUT', '30'))
+        self.max_pending = (max_pending or int(os.getenv('PASSWORD_HASH_QUEUE', '0'))
+                            or 4 * self.workers)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._method_prefix: Optional[str] = None
+        self.logger = logging.getLogger(__name__)
+
+    def hash(self, password: str) -> str:
+        """Salted hash of password with the configured method."""
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        """Check password against a stored hash of any supported method."""
+        if not password_hash or '$' not in password_hash:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether password_hash was made with other parameters than the configured ones."""
+        return password_hash.split('$', 1)[0] != self.method_prefix
+
+    def verify_and_update(self, password_hash: str, password: str) -> Tuple[bool, Optional[str]]:
+        """Verify password; on success also return a new hash if the stored one is outdated."""
+        if not self.verify(password_hash, password):
+            return False, None
+        if self.needs_rehash(password_hash):
+            return True, self.hash(password)
+        return True, None
+
+    @property
+    def method_prefix(self) -> str:
+        """Fully specified method as stored in hashes, e.g. 'scrypt:32768:8:1'."""
+        if self._method_prefix is None:
+            # Werkzeug fills in defaults for partial methods such as 'pbkdf2'
+            self._method_prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return self._method_prefix
+
+    def close(self):
+        """Shut the worker pool down."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _run(self, function, *args):
+        if self.executor_type == 'inline':
+            return function(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy(f"{self.max_pending} password hashes already pending")
+        try:
+            future = self._get_executor().submit(function, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy(f"Password hash took longer than {self.timeout}s") from None
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a new pool next time
+            self.logger.error("Password hash pool broke, hashing inline and restarting the pool")
+            with self._lock:
+                self._executor = None
+            return function(*args)
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.executor_type == 'process':
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix='password-hash')
+            return self._executor
+
+
+# Shared by the User model and the legacy user manager
+password_hasher = PasswordHasher()
@@ -0,0 +1,297 @@
+"""
+Persistent price history for observed flight fares.
+Implements MYK Level 5 data storage standards.
+"""
+
+import os
+import time
+import atexit
+import threading
+import logging
+from contextlib import nullcontext
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from models.models import PriceObservation, PriceRollup
+from utils.flight_batch import FlightBatch
+
+
+class PriceHistoryStore:
+    """Buffered writer and query API for the price observation time series.
+
+    Observations are buffered in memory and written in bulk once
+    ``batch_size`` rows are pending or, by a background thread,
+    ``flush_interval`` seconds after the first of them was buffered. What
+    is still buffered is written when the process exits. Every flush also
+    folds the new rows into hourly min/avg/max rollups per route and
+    departure date.
+    """
+
+    # Rollup keys per IN query, well below SQLite's bound parameter limit
+    ROLLUP_LOOKUP_CHUNK = 200
+
+    def __init__(self, app=None, batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.app = app
+        self.batch_size = batch_size or int(os.getenv('PRICE_HISTORY_BATCH_SIZE', '500'))
+        self.flush_interval = (flush_interval if flush_interval is not None
+                               else float(os.getenv('PRICE_HISTORY_FLUSH_INTERVAL', '60')))
+        self._buffer: List[Dict] = []
+        self._buffer_started = None
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._flusher: Optional[threading.Thread] = None
+        self._atexit_registered = False
+        self.logger = logging.getLogger(__name__)
+
+    def init_app(self, app):
+        """Bind the store to an application so flushes work outside requests."""
+        self.app = app
+
+    def record_flights(self, flights, departure_date=None, observed_at: Optional[datetime] = None) -> int:
+        """Buffer one observation per flight; flushes when a batch is due."""
+        rows = self._observation_rows(flights, departure_date, observed_at or datetime.utcnow())
+        if not rows:
+            return 0
+
+        with self._condition:
+            self._buffer.extend(rows)
+            if self._buffer_started is None:
+                self._buffer_started = time.monotonic()
+                self._condition.notify()
+            due = (len(self._buffer) >= self.batch_size or
+                   time.monotonic() - self._buffer_started >= self.flush_interval)
+            self._ensure_flusher()
+
+        if due:
+            self.flush()
+        return len(rows)
+
+    def flush(self) -> int:
+        """Write all buffered observations and update rollups."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._buffer_started = None
+
+        if not rows:
+            return 0
+
+        try:
+            with self._app_context():
+                self._write(rows)
+        except Exception as e:
+            self.logger.error(f"Failed to write {len(rows)} price observations: {e}")
+            with self._lock:
+                # Keep the rows for the next flush, but never grow without bound
+                if len(self._buffer) < 10 * self.batch_size:
+                    self._buffer[:0] = rows
+                    self._buffer_started = self._buffer_started or time.monotonic()
+            return 0
+
+        return len(rows)
+
+    def pending(self) -> int:
+        """Number of buffered, unwritten observations."""
+        with self._lock:
+            return len(self._buffer)
+
+    def get_observations(self, origin: str, destination: str, departure_date,
+                         start: Optional[datetime] = None, end: Optional[datetime] = None,
+                         limit: Optional[int] = None) -> List[PriceObservation]:
+        """Get raw observations for a route and departure date, oldest first."""
+        self.flush()
+        query = PriceObservation.query.filter_by(
+            origin=origin.upper(),
+            destination=destination.upper(),
+            departure_date=self._to_date(departure_date)
+        )
+        if start:
+            query = query.filter(PriceObservation.observed_at >= start)
+        if end:
+            query = query.filter(PriceObservation.observed_at < end)
+        query = query.order_by(PriceObservation.observed_at)
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+
+    def get_hourly_rollups(self, origin: str, destination: str, departure_date,
+                           start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[PriceRollup]:
+        """Get hourly rollups for a route and departure date, oldest first."""
+        self.flush()
+        query = PriceRollup.query.filter_by(
+            origin=origin.upper(),
+            destination=destination.upper(),
+            departure_date=self._to_date(departure_date)
+        )
+        if start:
+            query = query.filter(PriceRollup.bucket_start >= start)
+        if end:
+            query = query.filter(PriceRollup.bucket_start < end)
+        return query.order_by(PriceRollup.bucket_start).all()
+
+    def get_price_series(self, origin: str, destination: str, departure_date,
+                         start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[Dict]:
+        """Get the hourly price series as plain dicts."""
+        return [
+            {
+                'hour': rollup.bucket_start.isoformat(),
+                'min_price': rollup.min_price,
+                'avg_price': round(rollup.avg_price, 2),
+                'max_price': rollup.max_price,
+                'samples': rollup.sample_count
+            }
+            for rollup in self.get_hourly_rollups(origin, destination, departure_date, start, end)
+        ]
+
+    def get_lowest_price(self, origin: str, destination: str, departure_date,
+                         since: Optional[datetime] = None) -> Optional[float]:
+        """Get the lowest price seen for a route and departure date."""
+        rollups = self.get_hourly_rollups(origin, destination, departure_date, start=since)
+        return min((r.min_price for r in rollups), default=None)
+
+    def _write(self, rows: List[Dict]):
+        for attempt in range(2):
+            try:
+                db.session.execute(insert(PriceObservation), rows)
+                self._update_rollups(rows)
+                db.session.commit()
+                return
+            except IntegrityError:
+                # Another writer created the same rollup bucket first; retry once
+                db.session.rollback()
+                if attempt:
+                    raise
+            except Exception:
+                db.session.rollback()
+                raise
+
+    def _update_rollups(self, rows: List[Dict]):
+        buckets = {}
+        for row in rows:
+            key = (row['origin'], row['destination'], row['departure_date'],
+                   row['observed_at'].replace(minute=0, second=0, microsecond=0))
+            price = row['price']
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = [price, price, price, 1]
+            else:
+                bucket[0] = min(bucket[0], price)
+                bucket[1] = max(bucket[1], price)
+                bucket[2] += price
+                bucket[3] += 1
+
+        keys = list(buckets)
+        columns = tuple_(PriceRollup.origin, PriceRollup.destination,
+                         PriceRollup.departure_date, PriceRollup.bucket_start)
+        for i in range(0, len(keys), self.ROLLUP_LOOKUP_CHUNK):
+            chunk = keys[i:i + self.ROLLUP_LOOKUP_CHUNK]
+            for rollup in PriceRollup.query.filter(columns.in_(chunk)).all():
+                key = (rollup.origin, rollup.destination, rollup.departure_date, rollup.bucket_start)
+                low, high, total, count = buckets.pop(key)
+                rollup.min_price = min(rollup.min_price, low)
+                rollup.max_price = max(rollup.max_price, high)
+                rollup.price_sum += total
+                rollup.sample_count += count
+
+        if buckets:
+            db.session.execute(insert(PriceRollup), [
+                {
+                    'origin': origin,
+                    'destination': destination,
+                    'departure_date': departure_date,
+                    'bucket_start': bucket_start,
+                    'min_price': low,
+                    'max_price': high,
+                    'price_sum': total,
+                    'sample_count': count
+                }
+                for (origin, destination, departure_date, bucket_start), (low, high, total, count)
+                in buckets.items()
+            ])
+
+    def _observation_rows(self, flights, departure_date, observed_at: datetime) -> List[Dict]:
+        if not flights:
+            return []
+
+        fixed_date = self._to_date(departure_date) if departure_date else None
+        rows = []
+        for origin, destination, price, flight_date, departure_time, currency, airline, flight_number in zip(
+                self._field(flights, 'origin', 'departure_airport'),
+                self._field(flights, 'destination', 'destination_airport'),
+                self._field(flights, 'price'),
+                self._field(flights, 'departure_date'),
+                self._field(flights, 'departure_time'),
+                self._field(flights, 'currency'),
+                self._field(flights, 'airline'),
+                self._field(flights, 'flight_number')):
+            if not origin or not destination or price is None:
+                continue
+
+            observed_date = fixed_date or self._to_date(flight_date or departure_time)
+            if observed_date is None:
+                continue
+
+            rows.append({
+                'origin': origin.upper(),
+                'destination': destination.upper(),
+                'departure_date': observed_date,
+                'observed_at': observed_at,
+                'price': float(price),
+                'currency': 'TRY' if currency in (None, 'TL') else currency,
+                'airline': airline,
+                'flight_number': flight_number
+            })
+        return rows
+
+    @staticmethod
+    def _field(flights, *names) -> List:
+        """Column values for the first present field name."""
+        if isinstance(flights, FlightBatch):
+            for name in names:
+                if name in flights.columns:
+                    return flights.column(name)
+            return [None] * len(flights)
+        return [next((f.get(name) for name in names if f.get(name) is not None), None) for f in flights]
+
+    @staticmethod
+    def _to_date(value) -> Optional[date]:
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        try:
+            return date.fromisoformat(str(value)[:10])
+        except (TypeError, ValueError):
+            return None
+
+    def _ensure_flusher(self):
+        # Called with the lock held
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(target=self._run, name='price-history-flush', daemon=True)
+            self._flusher.start()
+            if not self._atexit_registered:
+                # Write what is still buffered when the process exits
+                atexit.register(self.flush)
+                self._atexit_registered = True
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._buffer_started is None:
+                    self._condition.wait()
+                delay = self._buffer_started + self.flush_interval - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+            # Failed writes go back to the buffer with a new deadline
+            self.flush()
+
+    def _app_context(self):
+        return self.app.app_context() if self.app is not None else nullcontext()
+
+
+# Shared by the request handlers in the process
+price_history = PriceHistoryStore()
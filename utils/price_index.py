@@ -0,0 +1,220 @@
+"""
+In-memory range index of price watch thresholds.
+Implements MYK Level 5 notification standards.
+"""
+
+import math
+import time
+import threading
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import or_
+
+from app import db
+from models.models import FlightSearch, WatchChange
+
+
+class WatchEntry(NamedTuple):
+    """The parts of a FlightSearch needed to evaluate a price."""
+    id: str
+    user_id: str
+    max_price: Optional[float]
+    airline_preference: Optional[str]
+
+
+def watch_key(origin: str, destination: str, departure_date: date, passengers: int = 1) -> Tuple:
+    """Route key shared by the index and the price watch engine."""
+    return (origin.upper(), destination.upper(), departure_date, passengers or 1)
+
+
+class _RouteWatches:
+    """Watches of one route key kept sorted by threshold."""
+
+    __slots__ = ('thresholds', 'entries')
+
+    def __init__(self):
+        self.thresholds: List[float] = []
+        self.entries: List[WatchEntry] = []
+
+
+class PriceThresholdIndex:
+    """Maps a route key to its watches sorted by ``max_price``.
+
+    ``match`` returns every watch whose threshold is at or above an observed
+    price with one bisect, i.e. O(log n + k). Watches without a max_price
+    are stored with an infinite threshold so they are always returned.
+    Only active, notification-enabled searches are indexed.
+
+    The index lives in the price watch process, while searches change in the
+    web process. Writers call ``mark_changed`` in the transaction of the
+    change, which logs the search id for notification-enabled searches, and
+    the owner of an index applies the logged searches with
+    ``apply_changes`` instead of reloading everything.
+    """
+
+    # Changes this recent are applied again, in case a transaction with a
+    # lower change id committed after a higher one was read
+    CHANGE_OVERLAP = 60
+    # Logged changes are pruned on a full load once this old
+    CHANGE_RETENTION = 86400
+
+    def __init__(self):
+        self._routes: Dict[Tuple, _RouteWatches] = {}
+        self._by_id: Dict[str, Tuple[Tuple, float]] = {}
+        self._lock = threading.RLock()
+        self.loaded_at: Optional[float] = None
+        self.change_id = 0
+
+    @staticmethod
+    def mark_changed(*searches: FlightSearch):
+        """Log changes to watched searches in the current transaction.
+
+        Searches with notifications off are never indexed, so only
+        notification-enabled ones are logged.
+        """
+        if any(search.id is None for search in searches):
+            # New searches get their id and column defaults on flush
+            db.session.flush()
+        WatchChange.record(search.id for search in searches if search.notification_enabled)
+
+    @staticmethod
+    def mark_deleted(search_ids: Iterable[str]):
+        """Log searches deleted in bulk in the current transaction."""
+        WatchChange.record(search_ids)
+
+    def apply_changes(self) -> int:
+        """Re-read the searches logged since the last load or apply; returns how many."""
+        recent = datetime.utcnow() - timedelta(seconds=self.CHANGE_OVERLAP)
+        changes = db.session.query(WatchChange.id, WatchChange.search_id).filter(
+            or_(WatchChange.id > self.change_id, WatchChange.created_at >= recent)
+        ).all()
+        if not changes:
+            return 0
+
+        search_ids = {change.search_id for change in changes}
+        searches = FlightSearch.query.filter(FlightSearch.id.in_(search_ids)).all()
+        with self._lock:
+            for search in searches:
+                self.upsert(search)
+            for search_id in search_ids - {search.id for search in searches}:
+                self._remove(search_id)
+            self.change_id = max(self.change_id, max(change.id for change in changes))
+        return len(search_ids)
+
+    def load(self):
+        """Rebuild the index from the database."""
+        # Read first, so changes committed during the load are applied afterwards
+        change_id = WatchChange.latest()
+        query = db.session.query(
+            FlightSearch.id,
+            FlightSearch.user_id,
+            FlightSearch.origin,
+            FlightSearch.destination,
+            FlightSearch.departure_date,
+            FlightSearch.passenger_count,
+            FlightSearch.max_price,
+            FlightSearch.airline_preference
+        ).filter(
+            FlightSearch.is_active.is_(True),
+            FlightSearch.notification_enabled.is_(True),
+            FlightSearch.departure_date >= date.today()
+        ).execution_options(yield_per=1000)
+
+        grouped: Dict[Tuple, List[Tuple[float, WatchEntry]]] = {}
+        for row in query:
+            key = watch_key(row.origin, row.destination, row.departure_date, row.passenger_count)
+            threshold = math.inf if row.max_price is None else row.max_price
+            grouped.setdefault(key, []).append(
+                (threshold, WatchEntry(row.id, row.user_id, row.max_price, row.airline_preference))
+            )
+
+        routes = {}
+        by_id = {}
+        for key, watches in grouped.items():
+            watches.sort(key=lambda item: item[0])
+            route = _RouteWatches()
+            route.thresholds = [threshold for threshold, _ in watches]
+            route.entries = [entry for _, entry in watches]
+            routes[key] = route
+            for threshold, entry in watches:
+                by_id[entry.id] = (key, threshold)
+
+        with self._lock:
+            self._routes = routes
+            self._by_id = by_id
+            self.loaded_at = time.monotonic()
+            self.change_id = change_id
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.CHANGE_RETENTION)
+        WatchChange.query.filter(WatchChange.created_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+
+    def is_stale(self, max_age: float) -> bool:
+        """True if never loaded or loaded more than max_age seconds ago."""
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > max_age
+
+    def upsert(self, search: FlightSearch):
+        """Add, move or drop a search after it was created or changed."""
+        with self._lock:
+            self._remove(search.id)
+            if search.is_active and search.notification_enabled:
+                key = watch_key(search.origin, search.destination, search.departure_date,
+                                search.passenger_count)
+                threshold = math.inf if search.max_price is None else search.max_price
+                route = self._routes.get(key)
+                if route is None:
+                    route = self._routes[key] = _RouteWatches()
+                position = bisect_left(route.thresholds, threshold)
+                route.thresholds.insert(position, threshold)
+                route.entries.insert(position, WatchEntry(
+                    search.id, search.user_id, search.max_price, search.airline_preference
+                ))
+                self._by_id[search.id] = (key, threshold)
+
+    def remove(self, watch_id: str) -> bool:
+        """Drop a search from the index."""
+        with self._lock:
+            return self._remove(watch_id)
+
+    def _remove(self, watch_id: str) -> bool:
+        location = self._by_id.pop(watch_id, None)
+        if location is None:
+            return False
+
+        key, threshold = location
+        route = self._routes[key]
+        position = bisect_left(route.thresholds, threshold)
+        while route.entries[position].id != watch_id:
+            position += 1
+        del route.thresholds[position]
+        del route.entries[position]
+        if not route.entries:
+            del self._routes[key]
+        return True
+
+    def match(self, key: Tuple, price: float) -> List[WatchEntry]:
+        """All watches on key whose threshold is at or above price."""
+        with self._lock:
+            route = self._routes.get(key)
+            if route is None:
+                return []
+            return route.entries[bisect_left(route.thresholds, price):]
+
+    def keys(self, since: Optional[date] = None) -> List[Tuple]:
+        """Route keys with at least one watch, optionally from a departure date on."""
+        with self._lock:
+            return [key for key in self._routes if since is None or key[2] >= since]
+
+    def watch_ids(self):
+        with self._lock:
+            return set(self._by_id)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._by_id)
+
+
+# Shared by the price watch engine
+price_index = PriceThresholdIndex()
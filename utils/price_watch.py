@@ -0,0 +1,213 @@
+"""
+Batched price watch evaluation for saved flight searches.
+Implements MYK Level 5 notification standards.
+"""
+
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import click
+from flask.cli import with_appcontext
+
+from utils.flight_batch import FlightBatch
+from utils.price_index import price_index as shared_price_index
+
+
+class PriceWatchEngine:
+    """Re-checks active saved searches and notifies users about price drops.
+
+    Watches come from a PriceThresholdIndex keyed by (origin, destination,
+    departure_date, passengers), so a single provider fetch serves every
+    watcher of the same search and only watches whose max_price is at or
+    above the cheapest fare are evaluated. Searches changed by the flights
+    blueprint or removed by the retention job are applied to the index at
+    the start of each cycle, and the whole index is reloaded from the
+    database every ``reload_interval`` seconds. The lowest notified price
+    per watch is kept between cycles; a user is only notified again when
+    the price falls below it.
+    """
+
+    def __init__(self, app=None, api_client=None, notification_service=None, index=None,
+                 max_workers: Optional[int] = None, reload_interval: Optional[float] = None):
+        self.app = app
+        self._api_client = api_client
+        self._notification_service = notification_service
+        self.index = index if index is not None else shared_price_index
+        self.max_workers = max_workers or int(os.getenv('PRICE_WATCH_WORKERS', '8'))
+        self.reload_interval = (reload_interval if reload_interval is not None
+                                else float(os.getenv('PRICE_INDEX_RELOAD_INTERVAL', '300')))
+        self._last_prices: Dict[str, float] = {}
+        self.logger = logging.getLogger(__name__)
+
+    def init_app(self, app):
+        """Bind the engine to an application."""
+        self.app = app
+
+    @property
+    def api_client(self):
+        if self._api_client is None:
+            from routes.flights import api_client
+            self._api_client = api_client
+        return self._api_client
+
+    @property
+    def notification_service(self):
+        if self._notification_service is None:
+            from utils.notifications import NotificationService
+            self._notification_service = NotificationService()
+        return self._notification_service
+
+    def run_cycle(self) -> Dict:
+        """Evaluate every active watch once and send notifications."""
+        started = time.monotonic()
+        stats = {'watches': 0, 'groups': 0, 'candidates': 0, 'fetch_errors': 0, 'triggered': 0,
+                 'notified': 0, 'notify_errors': 0}
+
+        with self._app_context():
+            if self.index.is_stale(self.reload_interval):
+                self.index.load()
+                changed = True
+            else:
+                changed = self.index.apply_changes() > 0
+            if changed:
+                # Forget watches that were deleted or disabled
+                watch_ids = self.index.watch_ids()
+                self._last_prices = {k: v for k, v in self._last_prices.items() if k in watch_ids}
+
+            keys = self.index.keys(since=date.today())
+            stats['groups'] = len(keys)
+            stats['watches'] = len(self.index)
+
+            results = self._fetch_groups(keys)
+
+            for key in keys:
+                flights = results.get(key)
+                if flights is None:
+                    stats['fetch_errors'] += 1
+                    continue
+
+                offers = _OfferIndex(flights)
+                cheapest = offers.cheapest(None)
+                if cheapest is None:
+                    continue
+
+                # Watches below the cheapest fare cannot trigger
+                for watch in self.index.match(key, cheapest[0]):
+                    stats['candidates'] += 1
+                    offer = offers.cheapest(watch.airline_preference)
+                    if offer is None:
+                        continue
+
+                    price, flight = offer
+                    previous = self._last_prices.get(watch.id)
+                    old_price = previous if previous is not None else watch.max_price
+                    if old_price is None:
+                        # First sighting without a target price only sets the baseline
+                        self._last_prices[watch.id] = price
+                        continue
+                    if price >= old_price or (watch.max_price is not None and price > watch.max_price):
+                        continue
+
+                    stats['triggered'] += 1
+                    self._last_prices[watch.id] = price
+                    try:
+                        if self.notification_service.notify_price_drop(
+                                watch.user_id, flight, old_price, price) is not False:
+                            stats['notified'] += 1
+                    except Exception as e:
+                        stats['notify_errors'] += 1
+                        self.logger.error(f"Price drop notification failed for watch {watch.id}: {e}")
+
+        stats['elapsed'] = round(time.monotonic() - started, 3)
+        stats['watches_per_second'] = round(stats['watches'] / stats['elapsed'], 1) if stats['elapsed'] else 0
+        self.logger.info(f"Price watch cycle finished: {stats}")
+        return stats
+
+    def run_forever(self, interval: float):
+        """Run cycles every interval seconds until interrupted."""
+        while True:
+            cycle_started = time.monotonic()
+            try:
+                self.run_cycle()
+            except Exception as e:
+                self.logger.error(f"Price watch cycle failed: {e}")
+            time.sleep(max(0.0, interval - (time.monotonic() - cycle_started)))
+
+    def _fetch_groups(self, keys: List[Tuple]) -> Dict[Tuple, FlightBatch]:
+        """Fetch one result set per route key concurrently."""
+        if not keys:
+            return {}
+
+        def fetch(key):
+            origin, destination, departure_date, passengers = key
+            try:
+                return key, self.api_client.search_flights(
+                    origin=origin,
+                    destination=destination,
+                    departure_date=departure_date,
+                    passengers=passengers
+                )
+            except Exception as e:
+                self.logger.error(f"Price watch fetch failed for {key}: {e}")
+                return key, None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='price-watch') as executor:
+            return dict(executor.map(fetch, keys))
+
+    def _app_context(self):
+        return self.app.app_context() if self.app is not None else nullcontext()
+
+
+class _OfferIndex:
+    """Cheapest offer lookups per airline preference over one result set."""
+
+    def __init__(self, flights: FlightBatch):
+        self.flights = flights
+        prices = flights.column('price') if len(flights) else []
+        self.order = sorted((i for i, p in enumerate(prices) if p is not None), key=prices.__getitem__)
+        self.prices = prices
+        self.airlines = [(a or '').lower() for a in flights.column('airline')] if len(flights) else []
+        self._memo = {}
+
+    def cheapest(self, airline_preference: Optional[str]):
+        """(price, flight dict) of the cheapest matching flight, or None."""
+        preference = (airline_preference or '').strip().lower()
+        if preference in self._memo:
+            return self._memo[preference]
+
+        offer = None
+        for i in self.order:
+            if not preference or preference in self.airlines[i]:
+                offer = (self.prices[i], self.flights[i])
+                break
+
+        self._memo[preference] = offer
+        return offer
+
+
+# Shared engine used by the CLI command
+price_watch_engine = PriceWatchEngine()
+
+
+@click.command('price-watch')
+@click.option('--interval', type=float, default=lambda: float(os.getenv('PRICE_WATCH_INTERVAL', '900')),
+              help='Seconds between cycles.')
+@click.option('--once', is_flag=True, help='Run a single cycle and exit.')
+@with_appcontext
+def price_watch_command(interval, once):
+    """Evaluate saved searches and send price drop notifications."""
+    from flask import current_app
+
+    price_watch_engine.init_app(current_app._get_current_object())
+    if once:
+        click.echo(price_watch_engine.run_cycle())
+        # Do not wait for the digest window before exiting
+        from utils.notification_digest import price_drop_digest
+        price_drop_digest.flush()
+    else:
+        price_watch_engine.run_forever(interval)
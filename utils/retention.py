@@ -0,0 +1,205 @@
+"""
+Retention and archival of flights, searches and notifications.
+Implements MYK Level 5 data storage standards.
+"""
+
+import os
+import gzip
+import json
+import time
+import logging
+from collections import Counter
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import and_, delete, or_, select
+
+from app import db
+from models.models import Flight, FlightSearch, Notification, NotificationCounter
+from utils.price_index import PriceThresholdIndex
+
+
+class RetentionJob:
+    """Deletes, and optionally archives, rows that fell out of their retention window.
+
+    Each policy walks the table in primary key order and removes at most
+    ``chunk_size`` rows per transaction, so writers never wait on one long
+    delete. With ``archive_dir`` set, every chunk is appended to a gzipped
+    JSON lines file per table before it is deleted. Deleting unread
+    notifications lowers the affected users' materialized unread counters in
+    the same transaction.
+    """
+
+    def __init__(self, app=None, chunk_size: Optional[int] = None, pause: Optional[float] = None,
+                 archive_dir: Optional[str] = None, flight_days: Optional[int] = None,
+                 search_days: Optional[int] = None, read_notification_days: Optional[int] = None,
+                 unread_notification_days: Optional[int] = None):
+        self.app = app
+        self.chunk_size = chunk_size or int(os.getenv('RETENTION_CHUNK_SIZE', '500'))
+        self.pause = pause if pause is not None else float(os.getenv('RETENTION_CHUNK_PAUSE', '0'))
+        self.archive_dir = archive_dir if archive_dir is not None else os.getenv('RETENTION_ARCHIVE_DIR', '')
+        # A window of 0 days or less disables the policy
+        self.days = {
+            'flights': self._days(flight_days, 'RETENTION_FLIGHT_DAYS', 30),
+            'flight_searches': self._days(search_days, 'RETENTION_SEARCH_DAYS', 30),
+            'read_notifications': self._days(read_notification_days, 'RETENTION_READ_NOTIFICATION_DAYS', 90),
+            'unread_notifications': self._days(unread_notification_days,
+                                               'RETENTION_UNREAD_NOTIFICATION_DAYS', 365)
+        }
+        self.logger = logging.getLogger(__name__)
+
+    def init_app(self, app):
+        """Bind the job to an application."""
+        self.app = app
+
+    def policies(self, now: Optional[datetime] = None) -> Dict:
+        """Policy name -> (model, filter) of the rows due for removal at now."""
+        now = now or datetime.utcnow()
+        days = self.days
+        policies = {}
+
+        if days['flights'] > 0:
+            # Flights that departed more than N days ago
+            policies['flights'] = (Flight, Flight.departure_time < now - timedelta(days=days['flights']))
+        if days['flight_searches'] > 0:
+            # Searches whose departure date passed more than N days ago
+            cutoff = now.date() - timedelta(days=days['flight_searches'])
+            policies['flight_searches'] = (FlightSearch, FlightSearch.departure_date < cutoff)
+
+        notification_filters = []
+        if days['read_notifications'] > 0:
+            notification_filters.append(and_(
+                Notification.is_read.is_(True),
+                Notification.created_at < now - timedelta(days=days['read_notifications'])
+            ))
+        if days['unread_notifications'] > 0:
+            notification_filters.append(
+                Notification.created_at < now - timedelta(days=days['unread_notifications'])
+            )
+        if notification_filters:
+            policies['notifications'] = (Notification, or_(*notification_filters))
+        return policies
+
+    def run(self, tables: Optional[Iterable[str]] = None, dry_run: bool = False,
+            now: Optional[datetime] = None) -> Dict[str, Dict]:
+        """Apply the policies (all, or the named tables) and report each one."""
+        report = {}
+        with self._app_context():
+            for name, (model, criterion) in self.policies(now).items():
+                if tables is not None and name not in tables:
+                    continue
+                if dry_run:
+                    report[name] = {'due': db.session.query(model).filter(criterion).count()}
+                else:
+                    report[name] = self.purge(name, model, criterion)
+        return report
+
+    def purge(self, name: str, model, criterion) -> Dict:
+        """Remove the rows of model matching criterion in keyed chunks."""
+        started = time.monotonic()
+        result = {'processed': 0, 'archived': 0, 'chunks': 0}
+        table = model.__table__
+        columns = list(table.c) if self.archive_dir else [table.c.id] + self._extra_columns(model)
+        archive_file = None
+        last_id = None
+        try:
+            while True:
+                query = select(*columns).where(criterion)
+                if last_id is not None:
+                    query = query.where(table.c.id > last_id)
+                rows = db.session.execute(query.order_by(table.c.id).limit(self.chunk_size)).mappings().all()
+                if not rows:
+                    break
+
+                last_id = rows[-1]['id']
+                try:
+                    if self.archive_dir:
+                        archive_file = archive_file or self._open_archive(name)
+                        for row in rows:
+                            archive_file.write(json.dumps(dict(row), default=self._serialize) + '\n')
+                        result['archived'] += len(rows)
+                    self._delete_chunk(model, rows)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    raise
+
+                if model is Notification:
+                    self._invalidate_unread(rows)
+                result['processed'] += len(rows)
+                result['chunks'] += 1
+                if self.pause:
+                    # Leave a gap for other writers between chunks
+                    time.sleep(self.pause)
+        finally:
+            if archive_file is not None:
+                archive_file.close()
+
+        result['elapsed'] = round(time.monotonic() - started, 3)
+        result['per_second'] = round(result['processed'] / result['elapsed'], 1) if result['elapsed'] else 0
+        if result['processed']:
+            self.logger.info(f"Retention {name}: {result['processed']} rows in {result['elapsed']}s "
+                             f"({result['per_second']} rows/s)")
+        return result
+
+    def _delete_chunk(self, model, rows: List):
+        db.session.execute(delete(model).where(model.id.in_([row['id'] for row in rows])))
+        if model is Notification:
+            # Keep the materialized unread counters in step with the deleted rows
+            unread = Counter(row['user_id'] for row in rows if not row['is_read'])
+            for user_id, count in unread.items():
+                NotificationCounter.adjust(user_id, -count)
+        elif model is FlightSearch:
+            # Price watch indexes in other processes drop the deleted watches
+            PriceThresholdIndex.mark_deleted([row['id'] for row in rows if row['notification_enabled']])
+
+    @staticmethod
+    def _extra_columns(model) -> List:
+        if model is Notification:
+            return [Notification.__table__.c.user_id, Notification.__table__.c.is_read]
+        if model is FlightSearch:
+            return [FlightSearch.__table__.c.notification_enabled]
+        return []
+
+    @staticmethod
+    def _invalidate_unread(rows: List):
+        from utils.unread_counter import unread_counter
+        for user_id in {row['user_id'] for row in rows if not row['is_read']}:
+            unread_counter.invalidate(user_id)
+
+    def _open_archive(self, name: str):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{name}-{datetime.utcnow():%Y%m%d%H%M%S}.jsonl.gz")
+        return gzip.open(path, 'at', encoding='utf-8')
+
+    @staticmethod
+    def _serialize(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return str(value)
+
+    @staticmethod
+    def _days(value: Optional[int], env_name: str, default: int) -> int:
+        return value if value is not None else int(os.getenv(env_name, str(default)))
+
+    def _app_context(self):
+        return self.app.app_context() if self.app is not None else nullcontext()
+
+
+# Shared job used by the retention command
+retention_job = RetentionJob()
+
+
+@click.command('retention')
+@click.option('--table', 'tables', multiple=True, type=click.Choice(['flights', 'flight_searches', 'notifications']),
+              help='Only apply the policy of this table (repeatable).')
+@click.option('--dry-run', is_flag=True, help='Only count the rows that are due.')
+@with_appcontext
+def retention_command(tables, dry_run):
+    """Delete or archive rows past their retention window."""
+    report = retention_job.run(tables=tables or None, dry_run=dry_run)
+    for name, result in report.items():
+        click.echo(f"{name}: {result}")
@@ -0,0 +1,180 @@
+"""
+Flight search result cache with TTL, LRU eviction and stale-while-revalidate.
+Implements MYK Level 5 caching standards.
+"""
+
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from utils.single_flight import SingleFlight
+
+
+def make_search_key(origin: str, destination: str, departure_date, return_date=None,
+                    passengers: int = 1, source: str = '') -> Tuple:
+    """Build a normalized cache key for a flight search.
+
+    ``source`` names the client that produced the result. Clients return
+    differently shaped flights for the same route and date, so each one
+    keeps its entries apart in the shared cache.
+    """
+    def _normalize_date(value):
+        if value is None or value == '':
+            return None
+        if isinstance(value, datetime):
+            return value.date().isoformat()
+        if isinstance(value, date):
+            return value.isoformat()
+        return str(value).strip()
+
+    return (
+        source,
+        (origin or '').strip().upper(),
+        (destination or '').strip().upper(),
+        _normalize_date(departure_date),
+        _normalize_date(return_date),
+        int(passengers or 1)
+    )
+
+
+class SearchCache:
+    """Thread-safe in-memory cache for search results.
+
+    Entries are fresh for ``ttl`` seconds. After that they may still be served
+    for ``stale_ttl`` more seconds while a background refresh fetches a new
+    value. The least recently used entry is evicted once ``max_size`` is hit.
+    Concurrent misses for the same key share a single fetch. Values stored
+    with their own ``ttl`` (such as partial provider results) are not served
+    stale.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, stale_ttl: Optional[float] = None,
+                 max_size: Optional[int] = None, coalesce_timeout: Optional[float] = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('SEARCH_CACHE_TTL', '300'))
+        self.stale_ttl = stale_ttl if stale_ttl is not None else float(os.getenv('SEARCH_CACHE_STALE_TTL', '600'))
+        self.max_size = max_size or int(os.getenv('SEARCH_CACHE_SIZE', '1000'))
+        self.coalesce_timeout = (coalesce_timeout if coalesce_timeout is not None
+                                 else float(os.getenv('SEARCH_COALESCE_TIMEOUT', '30')))
+        self._inflight = SingleFlight()
+        self.partial_ttl = float(os.getenv('SEARCH_CACHE_PARTIAL_TTL', '30'))
+        # key -> (stored_at, value, ttl, stale_ttl)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, float, float]]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0, 'refreshes': 0,
+                       'refresh_errors': 0}
+        self.logger = logging.getLogger(__name__)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a fresh value, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > entry[2]:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value and evict least recently used entries if needed.
+
+        A value given its own ``ttl`` expires after it without a stale window.
+        """
+        entry = (time.monotonic(), value, self.ttl, self.stale_ttl) if ttl is None else \
+            (time.monotonic(), value, ttl, 0.0)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Any],
+                     ttl_for: Optional[Callable[[Any], Optional[float]]] = None) -> Any:
+        """Return the cached value for key, calling fetch on a miss.
+
+        Stale entries are returned immediately and refreshed in the background.
+        Concurrent misses for the same key wait for one shared fetch; its
+        exceptions propagate to every waiter, and waiters give up with
+        TimeoutError after ``coalesce_timeout`` seconds. ``ttl_for`` may give
+        a fetched value its own ttl; returning None keeps the cache defaults.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = time.monotonic() - entry[0]
+                if age <= entry[2]:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return entry[1]
+                if age <= entry[2] + entry[3]:
+                    self._entries.move_to_end(key)
+                    self._stats['stale_hits'] += 1
+                    self._schedule_refresh(key, fetch, ttl_for)
+                    return entry[1]
+                del self._entries[key]
+            self._stats['misses'] += 1
+
+        return self._inflight.do(key, lambda: self._fetch_and_store(key, fetch, ttl_for),
+                                 self.coalesce_timeout)
+
+    def _fetch_and_store(self, key: Hashable, fetch: Callable[[], Any], ttl_for=None) -> Any:
+        # Stored before the in-flight call is released so late arrivals hit the cache
+        value = fetch()
+        self.set(key, value, ttl_for(value) if ttl_for else None)
+        return value
+
+    def _schedule_refresh(self, key: Hashable, fetch: Callable[[], Any], ttl_for=None):
+        """Start a background refresh unless one is already running (lock held)."""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        thread = threading.Thread(target=self._refresh, args=(key, fetch, ttl_for), daemon=True,
+                                  name='search-cache-refresh')
+        thread.start()
+
+    def _refresh(self, key: Hashable, fetch: Callable[[], Any], ttl_for=None):
+        try:
+            self._fetch_and_store(key, fetch, ttl_for)
+            with self._lock:
+                self._stats['refreshes'] += 1
+        except Exception as e:
+            with self._lock:
+                self._stats['refresh_errors'] += 1
+            self.logger.warning(f"Background refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Remove a single entry."""
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        stats['coalesced'] = self._inflight.get_stats()['coalesced']
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['stale_hits']) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+# Shared by the search clients in the process
+search_cache = SearchCache()
@@ -0,0 +1,80 @@
+"""
+Request coalescing for identical in-flight calls.
+Implements MYK Level 5 API integration standards.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    """State shared between the leader of a call and its waiters."""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time.
+
+    Concurrent callers with the same key wait for the first caller (the
+    leader) and receive its result, or its exception.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'coalesced': 0, 'timeouts': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """Call fn once for all concurrent callers sharing key.
+
+        Waiters raise TimeoutError if the leader does not finish within
+        timeout seconds; the leader itself is never interrupted.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['calls'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.event.set()
+
+        if not call.event.wait(timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise TimeoutError(f"Timed out after {timeout}s waiting for in-flight call {key!r}")
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self) -> int:
+        """Number of keys currently being fetched."""
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get leader/coalesced/timeout counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
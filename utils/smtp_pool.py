@@ -0,0 +1,198 @@
+"""
+Pooled SMTP transport that reuses authenticated connections.
+Implements MYK Level 5 notification standards.
+"""
+
+import os
+import time
+import queue
+import smtplib
+import threading
+import logging
+from email.message import Message
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class _PooledConnection:
+    """An authenticated SMTP session and its usage counters."""
+
+    __slots__ = ('server', 'last_used', 'sent')
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.last_used = time.monotonic()
+        self.sent = 0
+
+
+class SMTPConnectionPool:
+    """Keeps up to ``size`` authenticated SMTP connections alive.
+
+    Each connection is reused for up to ``max_messages_per_connection``
+    messages. Connections idle for more than ``idle_timeout`` seconds are
+    checked with NOOP before reuse, and a message whose connection dropped
+    is retried once on a fresh connection.
+    """
+
+    # Replies refusing one message; smtplib resets the session after them
+    REJECTIONS = (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 size: Optional[int] = None, use_tls: bool = True, timeout: float = 30,
+                 idle_timeout: Optional[float] = None, max_messages_per_connection: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size or int(os.getenv('SMTP_POOL_SIZE', '2'))
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.idle_timeout = (idle_timeout if idle_timeout is not None
+                             else float(os.getenv('SMTP_IDLE_TIMEOUT', '60')))
+        self.max_messages_per_connection = (max_messages_per_connection or
+                                            int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', '100')))
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._stats = {'connections_opened': 0, 'connections_closed': 0, 'messages_sent': 0,
+                       'send_failures': 0, 'reconnects': 0}
+        self.logger = logging.getLogger(__name__)
+
+    def send_message(self, msg: Message, from_addr: Optional[str] = None,
+                     to_addrs: Optional[List[str]] = None):
+        """Send one message over a pooled connection."""
+        with self._slots:
+            connection = self._checkout()
+            try:
+                self._send(connection, msg, from_addr, to_addrs)
+            except self.REJECTIONS:
+                # Server rejected this message; the session itself is still usable.
+                # Checked first because SMTP errors are OSError subclasses.
+                self._count('send_failures')
+                self._checkin(connection)
+                raise
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                # The session went away between messages; retry once on a new one
+                self.logger.info(f"SMTP connection lost, reconnecting: {e}")
+                self._discard(connection)
+                self._count('reconnects')
+                connection = self._connect()
+                try:
+                    self._send(connection, msg, from_addr, to_addrs)
+                except self.REJECTIONS:
+                    self._count('send_failures')
+                    self._checkin(connection)
+                    raise
+                except Exception:
+                    self._count('send_failures')
+                    self._discard(connection)
+                    raise
+            except Exception:
+                self._count('send_failures')
+                self._discard(connection)
+                raise
+            self._checkin(connection)
+
+    def send_many(self, messages: Iterable[Tuple[Message, Optional[str], Optional[List[str]]]]) -> Dict:
+        """Send (msg, from_addr, to_addrs) tuples, reusing one session where possible."""
+        sent = 0
+        failed = []
+        for msg, from_addr, to_addrs in messages:
+            try:
+                self.send_message(msg, from_addr, to_addrs)
+                sent += 1
+            except Exception as e:
+                failed.append((msg.get('To'), str(e)))
+        return {'sent': sent, 'failed': failed}
+
+    def close(self):
+        """Close every idle connection; connections in use close when released."""
+        self._closed = True
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(connection)
+
+    def get_stats(self) -> Dict:
+        """Get connection and delivery counters."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['idle_connections'] = self._idle.qsize()
+        opened = stats['connections_opened']
+        stats['messages_per_connection'] = round(stats['messages_sent'] / opened, 2) if opened else 0.0
+        return stats
+
+    def _send(self, connection: _PooledConnection, msg: Message, from_addr, to_addrs):
+        connection.server.send_message(msg, from_addr, to_addrs)
+        connection.sent += 1
+        connection.last_used = time.monotonic()
+        self._count('messages_sent')
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            if time.monotonic() - connection.last_used <= self.idle_timeout:
+                return connection
+            try:
+                if connection.server.noop()[0] == 250:
+                    return connection
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._discard(connection)
+
+    def _checkin(self, connection: _PooledConnection):
+        if self._closed or connection.sent >= self.max_messages_per_connection:
+            self._discard(connection)
+        else:
+            self._idle.put(connection)
+
+    def _connect(self) -> _PooledConnection:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self._count('connections_opened')
+        return _PooledConnection(server)
+
+    def _discard(self, connection: _PooledConnection):
+        try:
+            connection.server.quit()
+        except Exception:
+            connection.server.close()
+        self._count('connections_closed')
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+
+_pools: Dict[Tuple, SMTPConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_smtp_pool(host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                  **kwargs) -> SMTPConnectionPool:
+    """Return the process-wide pool for an SMTP server and account.
+
+    A pool whose password changed is replaced and its sessions are closed.
+    """
+    key = (host, port, username)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.password != password:
+            replaced = pool
+            pool = _pools[key] = SMTPConnectionPool(host, port, username, password, **kwargs)
+            if replaced is not None:
+                replaced.close()
+        return pool
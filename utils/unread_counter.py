@@ -0,0 +1,84 @@
+"""
+Cached reads of the materialized unread notification counters.
+Implements MYK Level 5 notification standards.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app import db
+from models.models import Notification, NotificationCounter
+
+
+class UnreadCounterCache:
+    """Per-process TTL cache in front of the notification_counters table.
+
+    The dashboard and the navigation badge read the count on every page,
+    so it is served from memory for ``ttl`` seconds. Writers in this
+    process invalidate a user's entry after committing; other processes
+    see the change once the entry expires.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_size: int = 10000):
+        self.ttl = ttl if ttl is not None else float(os.getenv('UNREAD_COUNT_CACHE_TTL', '30'))
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def get(self, user_id: str) -> int:
+        """Unread notification count of a user."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self._stats['hits'] += 1
+                return entry[0]
+            self._stats['misses'] += 1
+
+        count = self._load(user_id)
+        with self._lock:
+            self._entries[user_id] = (count, now + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return count
+
+    def invalidate(self, user_id: Optional[str] = None):
+        """Forget one user's count, or every count."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def rebuild(self, user_id: str) -> int:
+        """Recount a user's unread notifications and store the result."""
+        count = Notification.query.filter_by(user_id=user_id, is_read=False).count()
+        NotificationCounter.reset(user_id, count)
+        db.session.commit()
+        self.invalidate(user_id)
+        return count
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        return stats
+
+    def _load(self, user_id: str) -> int:
+        counter = db.session.get(NotificationCounter, user_id)
+        if counter is None:
+            # No counter row yet (e.g. notifications created before counters existed).
+            # Counted read-only: this runs while templates render, and the first
+            # write through NotificationCounter.adjust or reset creates the row.
+            return Notification.query.filter_by(user_id=user_id, is_read=False).count()
+        return counter.unread
+
+
+# Shared by the notification service, models and templates
+unread_counter = UnreadCounterCache()
@@ -0,0 +1,108 @@
+"""
+Per-process cache of authenticated users for the login manager.
+Implements MYK Level 5 security standards.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app import db
+from models.models import User
+
+
+class UserCache:
+    """TTL cache in front of the user lookup done on every authenticated request.
+
+    Entries are plain column snapshots, never ORM instances, so nothing is
+    shared between sessions: each request gets its own instance attached to
+    its session without a SELECT. Committed updates and deletes of a User
+    in this process invalidate its entry; other processes see the change
+    once the entry expires. Bulk ``query.update()`` calls bypass the ORM
+    events and must call ``invalidate`` themselves.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_size: int = 10000):
+        self.ttl = ttl if ttl is not None else float(os.getenv('USER_CACHE_TTL', '60'))
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation so loads that raced with one are not stored
+        self._generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        self._columns = [attr.key for attr in inspect(User).column_attrs]
+
+    def get(self, user_id: str) -> Optional[User]:
+        """User with user_id attached to the current session, or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self._stats['hits'] += 1
+                return self._attach(entry[0])
+            self._stats['misses'] += 1
+            generation = self._generation
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+
+        snapshot = {key: getattr(user, key) for key in self._columns}
+        with self._lock:
+            if generation == self._generation:
+                self._entries[user_id] = (snapshot, now + self.ttl)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return user
+
+    def invalidate(self, user_id: Optional[str] = None):
+        """Forget one user, or every user."""
+        with self._lock:
+            self._generation += 1
+            self._stats['invalidations'] += 1
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        return stats
+
+    def _attach(self, snapshot: Dict) -> User:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+
+# Shared by the login manager and the invalidation hooks below
+user_cache = UserCache()
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _remember_changed_user(mapper, connection, target):
+    # Profile, password and activation changes all flush through here
+    session = inspect(target).session
+    if session is not None:
+        session.info.setdefault('changed_user_ids', set()).add(target.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop('changed_user_ids', ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changed_users(session):
+    session.info.pop('changed_user_ids', None)